@@ -10,24 +10,30 @@ from typing import Optional, Callable
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform, EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import HomeAssistant, Event, callback
-from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryAuthFailed
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import HomeAssistant, Event, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryAuthFailed, HomeAssistantError
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.update_coordinator import UpdateFailed
 
 from .const import (
     DOMAIN, _LOGGER, CONF_DEVICE_SN, CONF_DEVICE_ID, CONF_HTTP_TOKEN,
-    DEFAULT_POLLING_INTERVAL
+    DEFAULT_POLLING_INTERVAL, CONF_STORAGE_BACKEND, STORAGE_BACKEND_SQLITE
 )
 from .core.api_client import LumentreeHttpApiClient, AuthException, ApiException
+from .core.http_session import async_get_http_session, async_release_http_session
+from .core.limiter import RequestPriority, background_job
 from .core.mqtt_client import LumentreeMqttClient
 from .coordinators.daily_coordinator import DailyStatsCoordinator
 from .coordinators.monthly_coordinator import MonthlyStatsCoordinator
 from .coordinators.yearly_coordinator import YearlyStatsCoordinator
 from .coordinators.total_coordinator import TotalStatsCoordinator
 from .services.aggregator import StatsAggregator
+from .services.backfill_jobs import BackfillJobManager
+from .services.device_info_store import DeviceInfoStore
 from .services import cache as cache_io
+from .services.lifetime_totals import LIFETIME_TOTALS
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
@@ -47,6 +53,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     mqtt_client: Optional[LumentreeMqttClient] = None
     remove_interval: Optional[Callable] = None
     remove_nightly: Optional[Callable] = None
+    session_acquired = False
 
     try:
         device_sn = entry.data[CONF_DEVICE_SN]
@@ -58,33 +65,74 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         if device_id != entry.data.get(CONF_DEVICE_ID):
             _LOGGER.warning(f"Using SN {device_sn} as Device ID.")
 
-        session = async_get_clientsession(hass)
-        api_client = LumentreeHttpApiClient(session)
+        # Dedicated keep-alive session for the Lumentree host (shared by all entries)
+        session = async_get_http_session(hass)
+        session_acquired = True
+        api_client = LumentreeHttpApiClient(session, device_id)
         api_client.set_token(http_token)
         hass.data[DOMAIN][entry.entry_id]["api_client"] = api_client
 
-        _LOGGER.info(f"Fetching device info via HTTP for {device_id}...")
-        try:
-            device_api_info = await api_client.get_device_info(device_id)
-            if "_error" in device_api_info:
-                _LOGGER.error(f"API error getting device info: {device_api_info['_error']}")
-                raise ConfigEntryNotReady(f"API error: {device_api_info['_error']}")
+        @callback
+        def _on_token_refreshed(token: str) -> None:
+            """Persist a token renewed by automatic re-authentication."""
+            if entry.data.get(CONF_HTTP_TOKEN) != token:
+                hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_HTTP_TOKEN: token})
+
+        hass.data[DOMAIN][entry.entry_id]["remove_token_listener"] = api_client.add_token_listener(
+            _on_token_refreshed
+        )
+
+        # Use persisted device info if we have it so setup doesn't wait for the cloud;
+        # it is refreshed in the background once HA has started
+        device_info_store = DeviceInfoStore(hass, device_id)
+        device_api_info = await device_info_store.async_load()
+        if device_api_info:
             hass.data[DOMAIN][entry.entry_id]['device_api_info'] = device_api_info
             _LOGGER.info(
-                f"Stored API info: Model={device_api_info.get('deviceType')}, "
+                f"Using stored device info: Model={device_api_info.get('deviceType')}, "
                 f"ID={device_api_info.get('deviceId')}"
             )
-        except (ApiException, AuthException) as api_err:
-            _LOGGER.error(f"Failed initial device info fetch {device_id}: {api_err}.")
-            raise ConfigEntryNotReady(f"Failed device info: {api_err}") from api_err
+
+            async def _refresh_device_info(_hass: HomeAssistant) -> None:
+                await _async_refresh_device_info(hass, entry, api_client, device_info_store)
+
+            hass.data[DOMAIN][entry.entry_id]["remove_device_info_refresh"] = async_at_started(
+                hass, _refresh_device_info
+            )
+        else:
+            _LOGGER.info(f"Fetching device info via HTTP for {device_id}...")
+            try:
+                device_api_info = await api_client.get_device_info(device_id)
+                if "_error" in device_api_info:
+                    _LOGGER.error(f"API error getting device info: {device_api_info['_error']}")
+                    raise ConfigEntryNotReady(f"API error: {device_api_info['_error']}")
+                hass.data[DOMAIN][entry.entry_id]['device_api_info'] = device_api_info
+                _LOGGER.info(
+                    f"Stored API info: Model={device_api_info.get('deviceType')}, "
+                    f"ID={device_api_info.get('deviceId')}"
+                )
+            except (ApiException, AuthException) as api_err:
+                _LOGGER.error(f"Failed initial device info fetch {device_id}: {api_err}.")
+                raise ConfigEntryNotReady(f"Failed device info: {api_err}") from api_err
+            await device_info_store.async_save(device_api_info)
 
         mqtt_client = LumentreeMqttClient(hass, entry, device_sn, device_id)
         hass.data[DOMAIN][entry.entry_id]["mqtt_client"] = mqtt_client
         await mqtt_client.connect()
 
+        # Optional shared SQLite statistics store (per-year files otherwise)
+        if entry.options.get(CONF_STORAGE_BACKEND) == STORAGE_BACKEND_SQLITE:
+            await hass.async_add_executor_job(cache_io.enable_sqlite, device_id)
+        # Year caches are shared in memory and written back in the background
+        cache_io.YEAR_CACHE.async_attach(hass, device_id)
+
         # Create aggregators and coordinators
         aggregator = StatsAggregator(hass, api_client, device_id)
         hass.data[DOMAIN][entry.entry_id]["aggregator"] = aggregator
+        # Long backfills run as checkpointed jobs that survive restarts
+        job_manager = BackfillJobManager(hass, aggregator, device_id)
+        await job_manager.async_load()
+        hass.data[DOMAIN][entry.entry_id]["backfill_jobs"] = job_manager
 
         daily_coord = DailyStatsCoordinator(hass, api_client, aggregator, device_sn)
         monthly_coord = MonthlyStatsCoordinator(hass, aggregator, device_sn, entry.entry_id)
@@ -171,12 +219,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             if isinstance(client_to_stop, LumentreeMqttClient):
                 _LOGGER.info(f"Disconnecting MQTT {device_sn}.")
                 await client_to_stop.disconnect()
+            # Write statistics still waiting in the year cache
+            await cache_io.YEAR_CACHE.async_flush(device_id)
 
         entry.async_on_unload(_cancel_timer_on_unload)
         entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop_mqtt))
 
         # Services: backfill_now, recompute_month_year, purge_cache, backfill_all, backfill_gaps,
-        #            mark_empty_dates, mark_coverage_range
+        #            mark_empty_dates, mark_coverage_range, get_range_totals
         async def _svc_backfill(call):
             days = int(call.data.get("days", 365))
             await aggregator.backfill_last_n_days(days)
@@ -184,9 +234,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         async def _svc_recompute(call):
             # Recompute aggregates for the current year
             now = datetime.datetime.now()
-            c = cache_io.load_year(device_id, now.year)
-            cache_io.recompute_aggregates(c)
-            cache_io.save_year(device_id, now.year, c)
+            async with cache_io.YEAR_CACHE.year(device_id, now.year) as tx:
+                cache_io.recompute_aggregates(tx.data)
 
         async def _svc_optimize_cache(call):
             """Optimize cache by removing empty days."""
@@ -197,9 +246,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             
             if all_years:
                 max_years = int(call.data.get("max_years", 10))
-                result = await hass.async_add_executor_job(
-                    cache_optimizer.optimize_all_years, device_id, max_years, dry_run
-                )
+                result = await cache_optimizer.async_optimize_all_years(device_id, max_years, dry_run)
                 summary = result["summary"]
                 _LOGGER.info(
                     f"Optimize cache (all years): removed {summary['total_removed']} empty days, "
@@ -208,9 +255,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 )
             else:
                 year = int(call.data.get("year", datetime.datetime.now().year))
-                result = await hass.async_add_executor_job(
-                    cache_optimizer.optimize_year_cache, device_id, year, dry_run
-                )
+                result = await cache_optimizer.async_optimize_year_cache(device_id, year, dry_run)
                 if result["status"] == "optimized":
                     _LOGGER.info(
                         f"Optimize cache ({year}): removed {result['removed']} empty days, "
@@ -224,9 +269,24 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             year = int(call.data.get("year", datetime.datetime.now().year))
             cache_io.purge_year(device_id, year)
 
+        async def _svc_export_cache(call):
+            """Export cached years as pretty-printed JSON (the store itself is binary)."""
+            year_val = call.data.get("year")
+            if year_val is not None:
+                years = [int(year_val)]
+            else:
+                this_year = datetime.datetime.now().year
+                years = list(range(this_year - 9, this_year + 1))
+            for year in years:
+                path = await hass.async_add_executor_job(cache_io.export_year_json, device_id, year)
+                if path:
+                    _LOGGER.info(f"Exported cache {device_id}/{year} to {path}")
+
         async def _svc_purge_all(call):
             """Purge all cache files for this device."""
             _LOGGER.info(f"Purging all cache for device {device_id}")
+            # A running job would keep writing the purged years
+            await job_manager.async_cancel()
             result = await hass.async_add_executor_job(cache_io.purge_device, device_id)
             _LOGGER.info(f"Purge all cache result: {result}")
 
@@ -237,41 +297,49 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             optimize_cache = call.data.get("optimize_cache", True)
             
             _LOGGER.warning(f"Purging ALL cache for device {device_id} and starting fresh smart backfill...")
+            # Stop any running job first so it cannot write old data after the purge
+            await job_manager.async_cancel()
             result = await hass.async_add_executor_job(cache_io.purge_device, device_id)
             _LOGGER.info(f"Purge result: {result}")
             
             _LOGGER.info(f"Starting smart backfill for {max_years} years...")
-            stats = await aggregator.smart_backfill(max_years=max_years, optimize_cache=optimize_cache)
-            _LOGGER.info(f"Purge and smart backfill completed: {stats}")
+            await job_manager.async_start("smart_backfill", max_years=max_years, optimize_cache=optimize_cache)
 
         async def _svc_smart_backfill(call):
             """Smart backfill using getYearData/getMonthData APIs."""
             max_years = int(call.data.get("max_years", 10))
             optimize_cache = call.data.get("optimize_cache", True)
-            stats = await aggregator.smart_backfill(max_years=max_years, optimize_cache=optimize_cache)
-            _LOGGER.info(f"Smart backfill completed: {stats}")
+            await job_manager.async_start("smart_backfill", max_years=max_years, optimize_cache=optimize_cache)
 
         async def _svc_backfill_all(call):
             max_years_val = call.data.get("max_years")
             max_years = int(max_years_val) if max_years_val is not None else None
             empty_streak = int(call.data.get("empty_streak", 14))
-            await aggregator.backfill_all(max_years=max_years, empty_streak=empty_streak)
+            await job_manager.async_start("backfill_all", max_years=max_years, empty_streak=empty_streak)
 
         async def _svc_backfill_gaps(call):
             max_years = int(call.data.get("max_years", 3))
             max_days_per_run = int(call.data.get("max_days_per_run", 30))
-            await aggregator.backfill_gaps(max_years=max_years, max_days_per_run=max_days_per_run)
+            await job_manager.async_start("backfill_gaps", max_years=max_years, max_days_per_run=max_days_per_run)
 
         async def _svc_backfill_empty_dates(call):
             max_years = int(call.data.get("max_years", 5))
             max_days_per_run = int(call.data.get("max_days_per_run", 100))
-            result = await aggregator.backfill_empty_dates(max_years=max_years, max_days_per_run=max_days_per_run)
-            _LOGGER.info(
-                f"backfill_empty_dates service completed: "
-                f"recovered={result.get('recovered', 0)}, "
-                f"confirmed_empty={result.get('confirmed_empty', 0)}, "
-                f"errors={result.get('errors', 0)}"
+            await job_manager.async_start(
+                "backfill_empty_dates", max_years=max_years, max_days_per_run=max_days_per_run
             )
+
+        async def _svc_pause_backfill(call):
+            if not await job_manager.async_pause():
+                _LOGGER.info(f"No running backfill job to pause for {device_id}")
+
+        async def _svc_resume_backfill(call):
+            if not await job_manager.async_resume():
+                _LOGGER.info(f"No paused backfill job to resume for {device_id}")
+
+        async def _svc_cancel_backfill(call):
+            if not await job_manager.async_cancel():
+                _LOGGER.info(f"No active backfill job to cancel for {device_id}")
         
         async def _svc_enable_purge_on_startup(call):
             """Enable purge and backfill on next startup."""
@@ -287,26 +355,56 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             hass.config_entries.async_update_entry(entry, options=new_options)
             _LOGGER.info("purge_and_backfill_on_startup has been disabled.")
 
+        async def _svc_set_storage_backend(call):
+            """Switch between per-year files and the shared SQLite store."""
+            backend = call.data["backend"]
+            if backend == STORAGE_BACKEND_SQLITE:
+                await hass.async_add_executor_job(cache_io.enable_sqlite, device_id)
+            else:
+                # Write the database back to the year files so no data is lost
+                await hass.async_add_executor_job(cache_io.disable_sqlite, device_id, True)
+            new_options = entry.options.copy()
+            new_options[CONF_STORAGE_BACKEND] = backend
+            hass.config_entries.async_update_entry(entry, options=new_options)
+            _LOGGER.info(f"Statistics storage for {device_id} set to {backend}")
+
         async def _svc_mark_empty_dates(call):
             year = int(call.data["year"])  # required
             dates = list(call.data.get("dates", []))
-            c = cache_io.load_year(device_id, year)
-            for ds in dates:
-                c = cache_io.mark_empty(c, ds)
-            cache_io.save_year(device_id, year, c)
+            try:
+                async with cache_io.YEAR_CACHE.year(device_id, year) as tx:
+                    for ds in dates:
+                        cache_io.mark_empty(tx.data, str(ds), year)
+            except ValueError as err:
+                # Nothing is committed: the transaction ends with the error
+                raise HomeAssistantError(f"Invalid empty date: {err}") from err
 
         async def _svc_mark_coverage_range(call):
             year = int(call.data["year"])  # required
             earliest = call.data.get("earliest")
             latest = call.data.get("latest")
-            c = cache_io.load_year(device_id, year)
-            meta = c.setdefault("meta", {})
-            cov = meta.setdefault("coverage", {"earliest": None, "latest": None})
-            if earliest is not None:
-                cov["earliest"] = earliest
-            if latest is not None:
-                cov["latest"] = latest
-            cache_io.save_year(device_id, year, c)
+            async with cache_io.YEAR_CACHE.year(device_id, year) as tx:
+                meta = tx.data.setdefault("meta", {})
+                cov = meta.setdefault("coverage", {"earliest": None, "latest": None})
+                if earliest is not None:
+                    cov["earliest"] = earliest
+                if latest is not None:
+                    cov["latest"] = latest
+
+        async def _svc_get_range_totals(call: ServiceCall) -> ServiceResponse:
+            """Energy totals of a date range (prefix-sum index, see cache.get_range_totals)."""
+            try:
+                start = datetime.date.fromisoformat(str(call.data["start"]))
+                end = datetime.date.fromisoformat(str(call.data.get("end") or datetime.date.today()))
+                if end < start:
+                    raise ValueError(f"end {end} is before start {start}")
+                metrics = call.data.get("metrics") or None
+                totals = await hass.async_add_executor_job(
+                    cache_io.get_range_totals, device_id, start, end, metrics
+                )
+            except ValueError as err:
+                raise HomeAssistantError(f"Invalid range query: {err}") from err
+            return {"device_id": device_id, "start": start.isoformat(), "end": end.isoformat(), "totals": totals}
 
         hass.services.async_register(DOMAIN, "backfill_now", _svc_backfill)
         hass.services.async_register(DOMAIN, "recompute_month_year", _svc_recompute)
@@ -314,12 +412,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.services.async_register(DOMAIN, "smart_backfill", _svc_smart_backfill)
         hass.services.async_register(DOMAIN, "purge_cache", _svc_purge)
         hass.services.async_register(DOMAIN, "purge_all_cache", _svc_purge_all)
+        hass.services.async_register(DOMAIN, "export_cache", _svc_export_cache)
+        hass.services.async_register(DOMAIN, "set_storage_backend", _svc_set_storage_backend)
         hass.services.async_register(DOMAIN, "purge_and_backfill", _svc_purge_and_backfill)
         hass.services.async_register(DOMAIN, "backfill_all", _svc_backfill_all)
         hass.services.async_register(DOMAIN, "backfill_gaps", _svc_backfill_gaps)
         hass.services.async_register(DOMAIN, "backfill_empty_dates", _svc_backfill_empty_dates)
+        hass.services.async_register(DOMAIN, "pause_backfill", _svc_pause_backfill)
+        hass.services.async_register(DOMAIN, "resume_backfill", _svc_resume_backfill)
+        hass.services.async_register(DOMAIN, "cancel_backfill", _svc_cancel_backfill)
         hass.services.async_register(DOMAIN, "mark_empty_dates", _svc_mark_empty_dates)
         hass.services.async_register(DOMAIN, "mark_coverage_range", _svc_mark_coverage_range)
+        hass.services.async_register(
+            DOMAIN, "get_range_totals", _svc_get_range_totals, supports_response=SupportsResponse.ONLY
+        )
         hass.services.async_register(DOMAIN, "enable_purge_on_startup", _svc_enable_purge_on_startup)
         hass.services.async_register(DOMAIN, "disable_purge_on_startup", _svc_disable_purge_on_startup)
 
@@ -330,22 +436,27 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         async def _first_run_backfill() -> None:
             try:
                 if should_purge_on_startup:
+                    await job_manager.async_cancel()
                     _LOGGER.warning("PURGE_AND_BACKFILL_ON_STARTUP is enabled - purging all cache...")
                     result = await hass.async_add_executor_job(cache_io.purge_device, device_id)
                     _LOGGER.info(f"Purge result: {result}")
                     _LOGGER.warning("Starting smart backfill for 5 years...")
-                    # Use smart backfill for faster performance
-                    stats = await aggregator.smart_backfill(max_years=5, optimize_cache=True)
-                    _LOGGER.info(f"Smart backfill completed: {stats}")
+                    # Use smart backfill for faster performance; as a job it is
+                    # checkpointed, resumable after a restart and cancellable
+                    started = await job_manager.async_start("smart_backfill", max_years=5, optimize_cache=True)
+                elif job_manager.async_resume_interrupted():
+                    _LOGGER.info("Auto backfill: resumed interrupted backfill job, skipping startup smart backfill")
+                    return
                 else:
                     _LOGGER.info("Auto backfill: starting smart backfill for last 5 years (background)")
                     # Use smart backfill - much faster than daily backfill
-                    stats = await aggregator.smart_backfill(max_years=5, optimize_cache=True)
-                    _LOGGER.info(f"Auto backfill: completed 5-year history - {stats}")
+                    # (the job queues behind other devices' backfills, below live polling)
+                    started = await job_manager.async_start("smart_backfill", max_years=5, optimize_cache=True)
                 
-                # Auto-disable purge_and_backfill_on_startup after successful backfill
-                if should_purge_on_startup:
-                    _LOGGER.info("Backfill completed successfully. Auto-disabling PURGE_AND_BACKFILL_ON_STARTUP...")
+                # Auto-disable purge_and_backfill_on_startup once the backfill job is
+                # recorded: after a restart the job resumes instead of purging again
+                if should_purge_on_startup and started:
+                    _LOGGER.info("Backfill job started. Auto-disabling PURGE_AND_BACKFILL_ON_STARTUP...")
                     # Update entry options to disable the flag
                     new_options = entry.options.copy()
                     new_options["purge_and_backfill_on_startup"] = False
@@ -359,13 +470,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 today = datetime.date.today()
                 yesterday = today - datetime.timedelta(days=1)
                 _LOGGER.info("Nightly backfill: %s → %s", yesterday, today)
-                # Backfill yesterday and today using daily API (for accuracy)
-                await aggregator.backfill_days(yesterday, today)
-                # Use smart backfill to fill gaps in recent months (much faster)
-                # Only check last 3 months for gaps
-                stats = await aggregator.smart_backfill(max_years=1, optimize_cache=False)
-                if stats.get("days_added", 0) > 0:
-                    _LOGGER.info(f"Nightly smart backfill: added {stats['days_added']} days")
+                async with background_job(RequestPriority.RECENT):
+                    # Refresh only the dirty window (partial, recently empty or
+                    # mismatching days) using the daily API (for accuracy)
+                    stats = await aggregator.refresh_dirty()
+                if stats["refreshed"] or stats["errors"]:
+                    _LOGGER.info(f"Nightly delta: {stats}")
             except Exception as err:
                 _LOGGER.error(f"Nightly backfill error: {err}")
 
@@ -386,6 +496,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             await mqtt_client.disconnect()
         if entry.entry_id in hass.data.get(DOMAIN, {}):
             hass.data[DOMAIN].pop(entry.entry_id, None)
+        if session_acquired:
+            await async_release_http_session(hass)
         raise
     except Exception as final_exception:
         _LOGGER.exception(f"Unexpected setup error {entry.title}")
@@ -393,8 +505,53 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             await mqtt_client.disconnect()
         if entry.entry_id in hass.data.get(DOMAIN, {}):
             hass.data[DOMAIN].pop(entry.entry_id, None)
+        if session_acquired:
+            await async_release_http_session(hass)
         return False
 
+async def _async_refresh_device_info(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    api_client: LumentreeHttpApiClient,
+    store: DeviceInfoStore,
+) -> None:
+    """Refresh stored device info from the cloud and update the device registry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if entry_data is None:
+        return
+    device_sn = entry.data[CONF_DEVICE_SN]
+    device_id = entry.data.get(CONF_DEVICE_ID, device_sn)
+    try:
+        info = await api_client.get_device_info(device_id)
+    except (ApiException, AuthException) as err:
+        _LOGGER.warning(f"Background device info refresh failed for {device_id}: {err}")
+        return
+    if "_error" in info:
+        _LOGGER.warning(f"Background device info refresh failed for {device_id}: {info['_error']}")
+        return
+
+    previous = entry_data.get("device_api_info") or {}
+    entry_data["device_api_info"] = info
+    await store.async_save(info)
+    if info == previous:
+        return
+
+    # Keep the registry in sync when model/firmware changed since the stored copy
+    device_registry = dr.async_get(hass)
+    device = device_registry.async_get_device(identifiers={(DOMAIN, device_sn)})
+    if device is not None:
+        device_registry.async_update_device(
+            device.id,
+            model=info.get("deviceType"),
+            sw_version=info.get("controllerVersion"),
+            hw_version=info.get("liquidCrystalVersion"),
+        )
+    _LOGGER.info(
+        f"Device info refreshed for {device_id}: Model={info.get('deviceType')}, "
+        f"Controller={info.get('controllerVersion')}"
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     device_sn = entry.data.get(CONF_DEVICE_SN, "unknown")
@@ -427,6 +584,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             except Exception as timer_err:
                 _LOGGER.warning(f"Error cancelling nightly timer {device_sn}: {timer_err}")
         
+        for remove_key in ("remove_device_info_refresh", "remove_token_listener"):
+            remove_listener = entry_data.get(remove_key)
+            if callable(remove_listener):
+                remove_listener()
+        
         # Cleanup coordinators (they should be cleaned up by platform unload, but ensure cleanup)
         for coord_key in ["daily_coordinator", "monthly_coordinator", "yearly_coordinator", "total_coordinator"]:
             coord = entry_data.get(coord_key)
@@ -436,6 +598,21 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 except Exception as coord_err:
                     _LOGGER.warning(f"Error shutting down {coord_key} {device_sn}: {coord_err}")
         
+        # Stop the backfill job; its checkpoint stays resumable
+        job_manager = entry_data.get("backfill_jobs")
+        if isinstance(job_manager, BackfillJobManager):
+            try:
+                await job_manager.async_shutdown()
+            except Exception as job_err:
+                _LOGGER.warning(f"Error stopping backfill job {device_sn}: {job_err}")
+        
+        # Write back pending year caches, then release the shared SQLite
+        # store (closed with its last device)
+        device_id = entry.data.get(CONF_DEVICE_ID, device_sn)
+        await cache_io.YEAR_CACHE.async_detach(device_id)
+        await hass.async_add_executor_job(LIFETIME_TOTALS.close, device_id)
+        await hass.async_add_executor_job(cache_io.disable_sqlite, device_id)
+        
         # Cleanup aggregator if any
         aggregator = entry_data.get("aggregator")
         if aggregator and hasattr(aggregator, "cleanup"):
@@ -444,8 +621,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             except Exception:
                 pass
         
-        # Cleanup API client reference (session is managed by HA)
-        entry_data.pop("api_client", None)
+        # Cleanup API client and release the shared HTTP session
+        if entry_data.pop("api_client", None) is not None:
+            await async_release_http_session(hass)
         
         # Remove entry data from domain
         hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
@@ -456,4 +634,12 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.warning(f"No entry data {entry.entry_id} to clean.")
     
     _LOGGER.info(f"Unload {entry.title}: {'OK' if unload_ok else 'Failed'}.")
-    return unload_ok
\ No newline at end of file
+    return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete stored data of a removed config entry."""
+    device_id = entry.data.get(CONF_DEVICE_ID, entry.data.get(CONF_DEVICE_SN, "unknown"))
+    try:
+        await DeviceInfoStore(hass, device_id).async_remove()
+    except Exception as err:
+        _LOGGER.warning(f"Failed to remove stored device info for {device_id}: {err}")
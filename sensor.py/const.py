@@ -27,6 +27,24 @@ DEFAULT_HEADERS: Final = {
     "Accept-Language": "en-US,en;q=0.9"
 }
 
+# --- HTTP connection pool (dedicated session for the Lumentree host) ---
+DATA_HTTP_SESSION: Final = f"{DOMAIN}_http_session"
+BACKFILL_CONCURRENCY: Final = 4            # Days fetched in parallel during backfill
+HTTP_LIMIT_PER_HOST: Final = BACKFILL_CONCURRENCY * 3 + 4  # 3 day endpoints per day + live coordinators
+# Requests a priority may hold together with every lower priority (the rest is
+# reserved for more urgent work, so live refreshes never wait behind backfill)
+API_BUDGET_FINALIZE: Final = HTTP_LIMIT_PER_HOST - 4
+API_BUDGET_RECENT: Final = HTTP_LIMIT_PER_HOST - 6
+API_BUDGET_HISTORY: Final = HTTP_LIMIT_PER_HOST - 8
+MAX_CONCURRENT_BACKFILL_JOBS: Final = 2    # Devices backfilling at once (others queue by priority)
+MAX_HISTORY_BACKFILL_JOBS: Final = 1       # Of those, long historical jobs
+HTTP_KEEPALIVE_TIMEOUT: Final = 60         # Seconds an idle connection is kept open
+HTTP_DNS_CACHE_TTL: Final = 300            # Seconds resolved addresses are cached
+HTTP_CONNECT_TIMEOUT: Final = 10           # Pool wait + TCP connect
+HTTP_SOCK_CONNECT_TIMEOUT: Final = 5       # TCP connect only
+HTTP_READ_TIMEOUT: Final = 20              # Max gap between received chunks
+HTTP_TOTAL_TIMEOUT: Final = 45             # Upper bound for a whole request
+
 # --- MQTT Constants ---
 MQTT_BROKER: Final = "lesvr.suntcn.com"
 MQTT_PORT: Final = 1886
@@ -42,6 +60,9 @@ CONF_DEVICE_ID: Final = "device_id"
 CONF_DEVICE_SN: Final = "device_sn"
 CONF_DEVICE_NAME: Final = "device_name"
 CONF_HTTP_TOKEN: Final = "http_token"
+CONF_STORAGE_BACKEND: Final = "storage_backend"  # Entry option: "file" (default) or "sqlite"
+STORAGE_BACKEND_FILE: Final = "file"
+STORAGE_BACKEND_SQLITE: Final = "sqlite"
 
 # --- Polling and Timeout ---
 DEFAULT_POLLING_INTERVAL = 5
@@ -52,6 +73,15 @@ DEFAULT_DAILY_INTERVAL: Final = 300        # 5 minutes (server updates every 5 m
 DEFAULT_MONTHLY_INTERVAL: Final = 300      # 5 minutes (to match daily update frequency)
 DEFAULT_YEARLY_INTERVAL: Final = 300       # 5 minutes (to match daily update frequency)
 
+# --- Day rollover finalization ---
+FINALIZE_SPREAD: Final = 900               # Per-device offset window after midnight (seconds)
+FINALIZE_RETRY_DELAYS: Final = (600, 1800, 3600)  # Re-fetches until the server data stops changing
+
+# --- In-memory year cache (shared by all devices) ---
+YEAR_CACHE_MAX_YEARS: Final = 32           # Year caches kept in memory (least recently used are evicted)
+YEAR_CACHE_FLUSH_DELAY: Final = 15.0       # Seconds changes are collected before being written to disk
+YEAR_TX_RETRIES: Final = 3                 # Replays of buffered year changes after a concurrent save
+
 # --- Savings / Tariffs ---
 DEFAULT_TARIFF_VND_PER_KWH: Final = 2900   # Fixed tariff for savings calculation (2.9k/kWh - average for ~400 kWh/month)
 
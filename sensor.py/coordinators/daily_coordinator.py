@@ -5,6 +5,7 @@ from __future__ import annotations
 import datetime as dt
 import asyncio
 import logging
+import zlib
 from typing import Dict, Optional, Any
 
 from homeassistant.core import HomeAssistant
@@ -12,8 +13,15 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Upda
 from homeassistant.util import dt as dt_util
 
 from ..core.api_client import LumentreeHttpApiClient
-from ..core.exceptions import ApiException, AuthException
-from ..const import DEFAULT_DAILY_INTERVAL, DEFAULT_TARIFF_VND_PER_KWH
+from ..core.exceptions import ApiException, AuthException, CircuitOpenException
+from ..core.limiter import RequestPriority, request_priority
+from ..core.series import MetricSeries
+from ..const import (
+    DEFAULT_DAILY_INTERVAL,
+    DEFAULT_TARIFF_VND_PER_KWH,
+    FINALIZE_RETRY_DELAYS,
+    FINALIZE_SPREAD,
+)
 from ..services.aggregator import StatsAggregator
 from ..services import cache as cache_io
 
@@ -34,6 +42,15 @@ class DailyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         self.aggregator = aggregator
         self.device_sn = device_sn
         self._last_date: Optional[str] = None
+        # Series of the previous refresh, reused for incremental intraday merges
+        self._series_date: Optional[str] = None
+        self._prev_series: Dict[str, MetricSeries] = {}
+        # True while serving last known data because the API circuit is open
+        self.data_stale = False
+        # Background finalization of finished days, keyed by date
+        self._finalize_tasks: Dict[str, asyncio.Task] = {}
+        # Stable per-device offset after midnight spreads rollover load across a fleet
+        self._finalize_offset = zlib.crc32(device_sn.encode()) % FINALIZE_SPREAD
 
         super().__init__(
             hass,
@@ -48,14 +65,16 @@ class DailyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             timezone = dt_util.get_time_zone(self.hass.config.time_zone) or dt_util.get_default_time_zone()
             today_str = dt_util.now(timezone).strftime("%Y-%m-%d")
             
-            # Check if day has changed - if so, save yesterday's data to cache
+            # Check if day has changed - if so, finalize yesterday's data in the background
             if self._last_date is not None and self._last_date != today_str:
-                await self._save_yesterday_to_cache(self._last_date)
+                self._schedule_finalization(self._last_date)
             
             # Fetch today's data with extended timeout (retry logic is in API client)
             async with asyncio.timeout(90):  # Extended timeout for retries
                 new_data = await self.api.get_daily_stats(self.device_sn, today_str)
             
+            self._merge_intraday_series(today_str, new_data)
+            
             # Calculate savings: Energy saved = Total Load - Grid Import
             # This represents energy not purchased from grid (from PV + battery discharge)
             total_load = float(new_data.get("total_load_today") or 0.0)
@@ -69,9 +88,20 @@ class DailyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             
             # Update last_date tracking
             self._last_date = today_str
+            self.data_stale = False
             
             return new_data
             
+        except CircuitOpenException as err:
+            # API known to be down: keep today's last data (marked stale) instead of
+            # failing every entity; never carry yesterday's totals into a new day
+            if self.data is not None and self._last_date == today_str:
+                if not self.data_stale:
+                    _LOGGER.warning(f"Lumentree API unavailable, serving last daily data as stale: {err}")
+                self.data_stale = True
+                return self.data
+            raise UpdateFailed(f"API unavailable: {err}") from err
+            
         except AuthException as err:
             # Auth errors - don't retry, requires user intervention
             _LOGGER.error(f"Authentication failed: {err}. Please check configuration.")
@@ -106,86 +136,122 @@ class DailyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             _LOGGER.exception("Unexpected daily update error")
             raise UpdateFailed(f"Unexpected error: {err}") from err
 
-    async def _save_yesterday_to_cache(self, yesterday_date: str) -> None:
-        """Save yesterday's data to cache by querying API for final data.
-        
+    def _merge_intraday_series(self, date_str: str, new_data: Dict[str, Any]) -> None:
+        """Carry derived series views over from the previous refresh of the same day.
+
+        Between two refreshes usually only the newest 5-minute slot(s) change, so
+        kWh/hourly views already computed for the previous data are patched for the
+        changed slots instead of being rebuilt. A new day or inconsistent revisions
+        fall back to a full (lazy) rebuild.
+        """
+        if self._series_date != date_str:
+            self._prev_series = {}
+            self._series_date = date_str
+
+        current: Dict[str, MetricSeries] = {}
+        for key, series in new_data.items():
+            if not isinstance(series, MetricSeries):
+                continue
+            previous = self._prev_series.get(key)
+            if previous is not None and type(previous) is type(series) and not series.adopt(previous):
+                _LOGGER.debug(f"Inconsistent revisions in {key} for {date_str}, rebuilding series")
+            current[key] = series
+        self._prev_series = current
+
+    def _schedule_finalization(self, date_str: str) -> None:
+        """Finalize a finished day in the background.
+
+        The first refresh of the new day must not wait for yesterday's data,
+        so finalization runs as a separate task with FINALIZE request priority.
+        """
+        task = self._finalize_tasks.get(date_str)
+        if task is not None and not task.done():
+            return
+        task = self.hass.async_create_background_task(
+            self._async_finalize_day(date_str),
+            name=f"lumentree_finalize_{self.device_sn}_{date_str}",
+        )
+        self._finalize_tasks[date_str] = task
+        task.add_done_callback(lambda _t: self._finalize_tasks.pop(date_str, None))
+
+    async def _async_finalize_day(self, date_str: str) -> None:
+        """Save a finished day to cache once the server data is final.
+
+        Starts after a per-device offset (so a fleet does not hit the cloud at
+        00:00), then re-fetches on ``FINALIZE_RETRY_DELAYS`` until two fetches
+        agree, since the day endpoints finalize at different times.
+        """
+        with request_priority(RequestPriority.FINALIZE):
+            await asyncio.sleep(self._finalize_offset)
+            previous: Optional[Dict[str, float]] = None
+            for attempt, delay in enumerate((0, *FINALIZE_RETRY_DELAYS)):
+                if delay:
+                    await asyncio.sleep(delay)
+                try:
+                    values = await self._fetch_finalized_values(date_str, skip_cached=attempt == 0)
+                except Exception as err:
+                    _LOGGER.warning(f"Failed to fetch finalized data for {date_str} (attempt {attempt + 1}): {err}")
+                    continue
+                if values is None or values == previous:
+                    return
+                await self._save_finalized_values(date_str, values)
+                previous = values
+            _LOGGER.debug(f"Finalized data for {date_str} still changing after {attempt + 1} fetches")
+            # Leave the rest to the nightly delta
+            try:
+                await self.aggregator.mark_dirty(date_str)
+            except Exception as err:
+                _LOGGER.debug(f"Failed to mark {date_str} dirty: {err}")
+
+    async def _fetch_finalized_values(self, date_str: str, skip_cached: bool) -> Optional[Dict[str, float]]:
+        """Query the API once more for a finished day.
+
         Instead of using data from memory (which may be incomplete if different
-        endpoints finalize at different times), we query the API one more time
-        for yesterday's date to ensure we get the final, finalized data from server.
+        endpoints finalize at different times), the day is fetched again.
+
+        Returns:
+            Day totals, or None if the day is already cached and ``skip_cached`` is set
         """
-        try:
-            
-            year = int(yesterday_date[:4])
+        if skip_cached:
             cache = await self.hass.async_add_executor_job(
-                cache_io.load_year, self.aggregator._device_id, year
+                cache_io.load_year, self.aggregator._device_id, int(date_str[:4])
             )
-            
             # Skip if already exists (avoid unnecessary API call)
-            if yesterday_date in cache.get("daily", {}):
-                _LOGGER.debug(f"Data for {yesterday_date} already exists in cache, skipping")
-                return
-            
-            # Query API one more time with yesterday's date to get finalized data
-            # This ensures all 6 data types are synchronized from the same API call
-            _LOGGER.info(f"Fetching finalized data for {yesterday_date} from API...")
-            async with asyncio.timeout(60):
-                finalized_data = await self.api.get_daily_stats(self.device_sn, yesterday_date)
-            
-            # Extract values from API response format to cache format
-            # API returns integers divided by 10, so precision is 1 decimal place for kWh
-            load_val = float(finalized_data.get("load_today") or 0.0)
-            essential_val = float(finalized_data.get("essential_today") or 0.0)
-            # Use total_load_today from API if available (most accurate), otherwise calculate from raw values
-            total_load_val = float(finalized_data.get("total_load_today") or 0.0)
-            if total_load_val == 0.0 and (load_val > 0.0 or essential_val > 0.0):
-                # Calculate from raw values, then round to match API precision (1 decimal)
-                total_load_val = round(load_val + essential_val, 1)
-            else:
-                total_load_val = round(total_load_val, 1)
-            
-            grid_val = round(float(finalized_data.get("grid_in_today") or 0.0), 1)
-            saved_kwh = max(0.0, round(total_load_val - grid_val, 1))
-            savings_vnd = round(saved_kwh * DEFAULT_TARIFF_VND_PER_KWH, 0)  # Money: no decimals
-            values = {
-                "pv": round(float(finalized_data.get("pv_today") or 0.0), 1),
-                "grid": grid_val,
-                "load": round(load_val, 1),
-                "essential": round(essential_val, 1),
-                "total_load": total_load_val,
-                "charge": round(float(finalized_data.get("charge_today") or 0.0), 1),
-                "discharge": round(float(finalized_data.get("discharge_today") or 0.0), 1),
-                "saved_kwh": saved_kwh,
-                "savings_vnd": savings_vnd,
-            }
-            
+            if date_str in cache.get("daily", {}):
+                _LOGGER.debug(f"Data for {date_str} already exists in cache, skipping")
+                return None
+
+        _LOGGER.info(f"Fetching finalized data for {date_str} from API...")
+        async with asyncio.timeout(60):
+            return await self.aggregator.fetch_day(date_str)
+
+    async def _save_finalized_values(self, date_str: str, values: Dict[str, float]) -> None:
+        """Write finalized day totals (or an empty marker) to the year cache."""
+        year = int(date_str[:4])
+        # Transaction: a backfill writing the same year meanwhile is not overwritten
+        async with cache_io.YEAR_CACHE.year(self.aggregator._device_id, year) as tx:
+            cache = tx.data
             # Check if data is meaningful (not all zeros)
-            is_empty = all(abs(v) < 1e-6 for v in values.values())
-            
-            if is_empty:
-                _LOGGER.debug(f"Finalized data for {yesterday_date} is empty, marking as empty")
-                cache = cache_io.mark_empty(cache, yesterday_date)
-                await self.hass.async_add_executor_job(
-                    cache_io.save_year, self.aggregator._device_id, year, cache
-                )
-                return
-            
-            # Update cache with finalized data
-            cache, _m, _ = cache_io.update_daily(cache, yesterday_date, values)
-            cache.setdefault("meta", {})["last_backfill_date"] = yesterday_date
-            
-            # Save cache
-            await self.hass.async_add_executor_job(
-                cache_io.save_year, self.aggregator._device_id, year, cache
-            )
-            
-            _LOGGER.info(
-                f"Auto-saved finalized data for {yesterday_date} to cache: "
-                f"PV={values['pv']:.2f}kWh, Grid={values['grid']:.2f}kWh, "
-                f"Load={values['load']:.2f}kWh, Charge={values['charge']:.2f}kWh, "
-                f"Discharge={values['discharge']:.2f}kWh"
-            )
-        except Exception as err:
-            _LOGGER.warning(f"Failed to auto-save finalized data for {yesterday_date}: {err}")
-            # Don't raise - this is a best-effort operation
+            if all(abs(v) < 1e-6 for v in values.values()):
+                _LOGGER.debug(f"Finalized data for {date_str} is empty, marking as empty")
+                cache_io.mark_empty(cache, date_str, year)
+                # The server may deliver the day late: the nightly delta checks it again
+                cache_io.mark_dirty(cache, date_str)
+            else:
+                cache_io.update_daily(cache, date_str, values)
+                meta = cache.setdefault("meta", {})
+                meta["last_backfill_date"] = max(meta.get("last_backfill_date") or "", date_str)
 
+        _LOGGER.info(
+            f"Auto-saved finalized data for {date_str} to cache: "
+            f"PV={values.get('pv', 0.0):.2f}kWh, Grid={values.get('grid', 0.0):.2f}kWh, "
+            f"Load={values.get('load', 0.0):.2f}kWh, Charge={values.get('charge', 0.0):.2f}kWh, "
+            f"Discharge={values.get('discharge', 0.0):.2f}kWh"
+        )
 
+    async def async_shutdown(self) -> None:
+        """Cancel pending finalization tasks."""
+        for task in list(self._finalize_tasks.values()):
+            task.cancel()
+        self._finalize_tasks.clear()
+        await super().async_shutdown()
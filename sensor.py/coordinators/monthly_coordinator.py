@@ -198,19 +198,10 @@ class MonthlyStatsCoordinator(DataUpdateCoordinator[Dict[str, float]]):
         """Finalize previous month's data by ensuring cache is up-to-date."""
         try:
             _LOGGER.info(f"Month changed: Finalizing data for {previous_year}-{previous_month:02d}")
-            # Load cache
-            cache = await self.hass.async_add_executor_job(
-                cache_io.load_year, self.aggregator._device_id, previous_year
-            )
-            
-            # Ensure monthly aggregates are recomputed for the previous month
-            # This is already done by update_daily, but we recompute to be safe
-            cache = cache_io.recompute_aggregates(cache)
-            
-            # Save finalized cache
-            await self.hass.async_add_executor_job(
-                cache_io.save_year, self.aggregator._device_id, previous_year, cache
-            )
+            async with cache_io.YEAR_CACHE.year(self.aggregator._device_id, previous_year) as tx:
+                # Ensure monthly aggregates are recomputed for the previous month
+                # This is already done by update_daily, but we recompute to be safe
+                cache_io.recompute_aggregates(tx.data)
             
             _LOGGER.info(f"Finalized data for month {previous_year}-{previous_month:02d}")
         except Exception as err:
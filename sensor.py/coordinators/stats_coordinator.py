@@ -11,7 +11,7 @@ from homeassistant.util import dt as dt_util
 from homeassistant.exceptions import ConfigEntryAuthFailed
 
 from ..core.api_client import LumentreeHttpApiClient
-from ..core.exceptions import ApiException, AuthException
+from ..core.exceptions import ApiException, AuthException, CircuitOpenException
 from ..const import DOMAIN, DEFAULT_STATS_INTERVAL, CONF_DEVICE_SN
 
 _LOGGER = logging.getLogger(__name__)
@@ -20,7 +20,7 @@ _LOGGER = logging.getLogger(__name__)
 class LumentreeStatsCoordinator(DataUpdateCoordinator[Dict[str, Optional[float]]]):
     """Coordinator to fetch daily statistics via HTTP API."""
 
-    __slots__ = ("api_client", "device_sn")
+    __slots__ = ("api_client", "device_sn", "data_stale")
 
     def __init__(
         self, hass: HomeAssistant, api_client: LumentreeHttpApiClient, device_sn: str
@@ -34,6 +34,8 @@ class LumentreeStatsCoordinator(DataUpdateCoordinator[Dict[str, Optional[float]]
         """
         self.api_client = api_client
         self.device_sn = device_sn
+        # True while serving last known data because the API circuit is open
+        self.data_stale = False
         update_interval = datetime.timedelta(seconds=DEFAULT_STATS_INTERVAL)
 
         super().__init__(
@@ -105,8 +107,17 @@ class LumentreeStatsCoordinator(DataUpdateCoordinator[Dict[str, Optional[float]]
             if _LOGGER.isEnabledFor(logging.DEBUG):
                 _LOGGER.debug("Successfully fetched daily stats: %s", stats_data)
 
+            self.data_stale = False
             return stats_data
 
+        except CircuitOpenException as err:
+            # API known to be down: keep last data and mark it stale
+            if self.data is not None:
+                if not self.data_stale:
+                    _LOGGER.warning(f"Lumentree API unavailable, serving last stats as stale: {err}")
+                self.data_stale = True
+                return self.data
+            raise UpdateFailed(f"API unavailable: {err}") from err
         except AuthException as err:
             _LOGGER.error(
                 f"Authentication error fetching stats: {err}. Reconfiguration required"
@@ -5,7 +5,6 @@ from __future__ import annotations
 import datetime as dt
 import asyncio
 import logging
-import os
 from typing import Dict, Optional, Any
 
 from homeassistant.core import HomeAssistant
@@ -13,7 +12,7 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Upda
 from homeassistant.util import dt as dt_util
 
 from ..services.aggregator import StatsAggregator
-from ..services import cache as cache_io
+from ..services.lifetime_totals import LIFETIME_TOTALS
 from ..const import (
     DOMAIN,
     DEFAULT_YEARLY_INTERVAL,  # Use same interval as yearly
@@ -31,6 +30,10 @@ from ..const import (
 _LOGGER = logging.getLogger(__name__)
 
 
+# Years summed back from the current one
+LIFETIME_YEARS = 10
+
+
 class TotalStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
     def __init__(self, hass: HomeAssistant, aggregator: StatsAggregator, device_sn: str, entry_id: str | None = None) -> None:
         self.aggregator = aggregator
@@ -45,108 +48,52 @@ class TotalStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
 
     async def _async_update_data(self) -> Dict[str, Any]:
         try:
-            _LOGGER.info(f"Total coordinator: Calculating lifetime totals for {self.device_sn}")
-            
-            # Calculate totals from all cached years
-            total_pv = 0.0
-            total_grid = 0.0
-            total_load = 0.0
-            total_essential = 0.0
-            total_total_load = 0.0
-            total_charge = 0.0
-            total_discharge = 0.0
-            total_saved_kwh = 0.0
-            total_savings_vnd = 0.0
-            
-            # Get current year and scan backwards
-            current_year = dt_util.now().year
-            years_processed = 0
-            earliest_year = None
-            latest_year = None
-            
-            for year_offset in range(10):  # Check last 10 years
-                year = current_year - year_offset
-                cache = await self.hass.async_add_executor_job(
-                    cache_io.load_year, self.aggregator._device_id, year
-                )
-                
-                if not cache.get("daily"):  # No data for this year
-                    continue
-                
-                years_processed += 1
-                if earliest_year is None:
-                    earliest_year = year
-                latest_year = year
-                
-                # Sum from yearly_total if available, otherwise calculate from daily
-                yearly_totals = cache.get("yearly_total", {})
-                if yearly_totals:
-                    total_pv += float(yearly_totals.get("pv", 0.0))
-                    total_grid += float(yearly_totals.get("grid", 0.0))
-                    load_val = float(yearly_totals.get("load", 0.0))
-                    essential_val = float(yearly_totals.get("essential", 0.0))
-                    total_load += load_val
-                    total_essential += essential_val
-                    # Backward compatibility: calculate total_load if missing in old data
-                    cached_total_load = yearly_totals.get("total_load")
-                    if cached_total_load is not None:
-                        total_total_load += float(cached_total_load)
-                    else:
-                        # Old data: calculate from load + essential
-                        total_total_load += load_val + essential_val
-                    total_charge += float(yearly_totals.get("charge", 0.0))
-                    total_discharge += float(yearly_totals.get("discharge", 0.0))
-                    total_saved_kwh += float(yearly_totals.get("saved_kwh", 0.0))
-                    total_savings_vnd += float(yearly_totals.get("savings_vnd", 0.0))
-                else:
-                    # Fallback: sum from daily data
-                    daily_data = cache.get("daily", {})
-                    for date_str, day_data in daily_data.items():
-                        total_pv += float(day_data.get("pv", 0.0))
-                        total_grid += float(day_data.get("grid", 0.0))
-                        total_load += float(day_data.get("load", 0.0))
-                        total_essential += float(day_data.get("essential", 0.0))
-                        total_total_load += float(day_data.get("total_load", float(day_data.get("load", 0.0)) + float(day_data.get("essential", 0.0))))
-                        total_charge += float(day_data.get("charge", 0.0))
-                        total_discharge += float(day_data.get("discharge", 0.0))
-                        total_saved_kwh += float(day_data.get("saved_kwh", 0.0))
-                        total_savings_vnd += float(day_data.get("savings_vnd", 0.0))
-                
-                _LOGGER.debug(f"Total coordinator: Year {year} - PV: {yearly_totals.get('pv', 0.0):.1f} kWh")
-            
-            # Add current year's data if we haven't included it yet (cộng dồn năm hiện tại)
-            # Only add if current year is not already processed in the loop above
+            _LOGGER.debug(f"Total coordinator: Reading lifetime totals for {self.device_sn}")
+
+            # Per-year totals are kept (and persisted) by the lifetime tracker and
+            # updated as days are finalized, so this is a memory read after the
+            # first refresh instead of loading every year file
             current_year = dt_util.now().year
-            if latest_year is None or latest_year < current_year:
+            lifetime = await self.hass.async_add_executor_job(
+                LIFETIME_TOTALS.read,
+                self.aggregator._device_id,
+                current_year - LIFETIME_YEARS + 1,
+                current_year,
+            )
+            totals = dict(lifetime["totals"])
+            years = list(lifetime["years"])
+
+            # Add current year's data if it has no cache yet (cộng dồn năm hiện tại)
+            if current_year not in years:
                 current_year_data = self._get_current_year_data()
                 if current_year_data:
-                    total_pv += float(current_year_data.get("pv", 0.0))
-                    total_grid += float(current_year_data.get("grid", 0.0))
-                    total_load += float(current_year_data.get("load", 0.0))
-                    total_essential += float(current_year_data.get("essential", 0.0))
-                    total_total_load += float(current_year_data.get("total_load", float(current_year_data.get("load", 0.0)) + float(current_year_data.get("essential", 0.0))))
-                    total_charge += float(current_year_data.get("charge", 0.0))
-                    total_discharge += float(current_year_data.get("discharge", 0.0))
-                    total_saved_kwh += float(current_year_data.get("saved_kwh", 0.0))
-                    total_savings_vnd += float(current_year_data.get("savings_vnd", 0.0))
-                    latest_year = current_year
-            
-            _LOGGER.info(f"Total coordinator: Processed {years_processed} years ({earliest_year}-{latest_year})")
-            _LOGGER.info(f"Total coordinator: Lifetime totals - PV: {total_pv:.1f} kWh, Charge: {total_charge:.1f} kWh")
-            
+                    for key, value in current_year_data.items():
+                        totals[key] = totals.get(key, 0.0) + value
+                    totals["total_load"] = totals.get("total_load", 0.0) + float(
+                        current_year_data.get("load", 0.0)
+                    ) + float(current_year_data.get("essential", 0.0))
+                    years.append(current_year)
+
+            earliest_year = min(years) if years else None
+            latest_year = max(years) if years else None
+            _LOGGER.debug(
+                f"Total coordinator: {len(years)} years ({earliest_year}-{latest_year}), "
+                f"PV: {totals.get('pv', 0.0):.1f} kWh, Charge: {totals.get('charge', 0.0):.1f} kWh"
+            )
+
             return {
                 # Lifetime totals (including current year if applicable) - keep full precision
-                KEY_TOTAL_PV_KWH: total_pv,
-                KEY_TOTAL_GRID_IN_KWH: total_grid,
-                KEY_TOTAL_LOAD_KWH: total_load,
-                KEY_TOTAL_ESSENTIAL_KWH: total_essential,
-                KEY_TOTAL_TOTAL_LOAD_KWH: total_total_load,
-                KEY_TOTAL_CHARGE_KWH: total_charge,
-                KEY_TOTAL_DISCHARGE_KWH: total_discharge,
-                KEY_TOTAL_SAVED_KWH: total_saved_kwh,
-                KEY_TOTAL_SAVINGS_VND: total_savings_vnd,
+                KEY_TOTAL_PV_KWH: totals.get("pv", 0.0),
+                KEY_TOTAL_GRID_IN_KWH: totals.get("grid", 0.0),
+                KEY_TOTAL_LOAD_KWH: totals.get("load", 0.0),
+                KEY_TOTAL_ESSENTIAL_KWH: totals.get("essential", 0.0),
+                KEY_TOTAL_TOTAL_LOAD_KWH: totals.get("total_load", 0.0),
+                KEY_TOTAL_CHARGE_KWH: totals.get("charge", 0.0),
+                KEY_TOTAL_DISCHARGE_KWH: totals.get("discharge", 0.0),
+                KEY_TOTAL_SAVED_KWH: totals.get("saved_kwh", 0.0),
+                KEY_TOTAL_SAVINGS_VND: totals.get("savings_vnd", 0.0),
                 # Metadata
-                "years_processed": years_processed,
+                "years_processed": len(years),
                 "earliest_year": earliest_year,
                 "latest_year": latest_year,
                 "last_updated": dt_util.now().isoformat(),
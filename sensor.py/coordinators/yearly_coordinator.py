@@ -80,13 +80,10 @@ class YearlyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             # Ensure monthly arrays are recomputed from daily data for accuracy
             # This ensures all months with daily data are properly aggregated
             # Note: load_year() already auto-recomputes if needed, but we recompute here to ensure
-            # consistency after potential API data updates
+            # consistency after potential API data updates. Nothing is saved: the year store
+            # derives monthly arrays from the days, so the stored year is unchanged.
             if cache.get("daily"):
                 cache = cache_io.recompute_aggregates(cache)
-                # Save updated cache back
-                await self.hass.async_add_executor_job(
-                    cache_io.save_year, self.aggregator._device_id, year, cache
-                )
             
             # Get monthly arrays for charting (12 months)
             # Priority: API data > cache data
@@ -109,8 +106,8 @@ class YearlyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
                 from ..const import DEFAULT_TARIFF_VND_PER_KWH
                 monthly_savings_vnd = [round(saved * DEFAULT_TARIFF_VND_PER_KWH, 0) for saved in monthly_saved_kwh]
                 
-                # Update cache with API monthly data (more accurate than daily aggregation)
-                # This ensures cache has correct monthly arrays from API
+                # Use the API monthly data (more accurate than daily aggregation) for this
+                # update; it is not saved since stored monthly arrays are derived from the days
                 cache["monthly"] = {
                     "pv": monthly_pv,
                     "grid": monthly_grid,
@@ -123,11 +120,6 @@ class YearlyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
                     "savings_vnd": monthly_savings_vnd,
                 }
                 
-                # Save updated cache with API monthly data
-                await self.hass.async_add_executor_job(
-                    cache_io.save_year, self.aggregator._device_id, year, cache
-                )
-                
                 # For current month, only override with cache if cache has more complete data
                 # (e.g., includes today's data that API might not have yet)
                 current_year = now.year
@@ -291,18 +283,9 @@ class YearlyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         """Finalize previous year's data by ensuring cache is up-to-date."""
         try:
             _LOGGER.info(f"Year changed: Finalizing data for year {previous_year}")
-            # Load cache and ensure aggregates are recomputed
-            cache = await self.hass.async_add_executor_job(
-                cache_io.load_year, self.aggregator._device_id, previous_year
-            )
-            
-            # Recompute aggregates to ensure monthly and yearly totals are accurate
-            cache = cache_io.recompute_aggregates(cache)
-            
-            # Save finalized cache
-            await self.hass.async_add_executor_job(
-                cache_io.save_year, self.aggregator._device_id, previous_year, cache
-            )
+            async with cache_io.YEAR_CACHE.year(self.aggregator._device_id, previous_year) as tx:
+                # Recompute aggregates to ensure monthly and yearly totals are accurate
+                cache_io.recompute_aggregates(tx.data)
             
             _LOGGER.info(f"Finalized data for year {previous_year}")
         except Exception as err:
@@ -14,6 +14,7 @@ __all__ = [
     "LumentreeException",
     "ApiException",
     "AuthException",
+    "CircuitOpenException",
     "MqttException",
     "ParseException",
 ]
@@ -1,16 +1,23 @@
 """HTTP API client for Lumentree integration."""
 
 import asyncio
-from typing import Any, Dict, Optional, List
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, List
 import logging
+import time
+from urllib.parse import urlsplit
 
 import aiohttp
 from aiohttp.client import ClientTimeout
 from aiohttp import ClientConnectorError, ServerConnectionError
 
 from ..const import (
+    BACKFILL_CONCURRENCY,
     BASE_URL,
     DEFAULT_HEADERS,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_SOCK_CONNECT_TIMEOUT,
+    HTTP_TOTAL_TIMEOUT,
     URL_GET_SERVER_TIME,
     URL_SHARE_DEVICES,
     URL_DEVICE_MANAGE,
@@ -20,19 +27,36 @@ from ..const import (
     URL_GET_YEAR_DATA,
     URL_GET_MONTH_DATA,
 )
-from .exceptions import ApiException, AuthException
+from .circuit_breaker import CircuitBreaker, get_breaker
+from .exceptions import ApiException, AuthException, CircuitOpenException
+from .limiter import API_LIMITER, RequestPriority, create_task_with_priority
+from .series import BatterySeries, MetricSeries
+from ..models.day_result import DayResult
 
 _LOGGER = logging.getLogger(__name__)
 
-DEFAULT_TIMEOUT = ClientTimeout(total=30)
+# Fail fast on connect, allow slow but progressing responses
+DEFAULT_TIMEOUT = ClientTimeout(
+    total=HTTP_TOTAL_TIMEOUT,
+    connect=HTTP_CONNECT_TIMEOUT,
+    sock_connect=HTTP_SOCK_CONNECT_TIMEOUT,
+    sock_read=HTTP_READ_TIMEOUT,
+)
 AUTH_RETRY_DELAY = 0.5
 AUTH_MAX_RETRIES = 3
 
+# Backoff between failed automatic re-authentications
+REAUTH_BACKOFF_BASE = 30.0  # seconds
+REAUTH_BACKOFF_MAX = 1800.0  # Cap at 30 minutes
+
 # Retry configuration for API requests
 API_MAX_RETRIES = 3
 API_RETRY_BASE_DELAY = 1.0  # Start with 1 second
 API_RETRY_MAX_DELAY = 10.0  # Cap at 10 seconds
 
+# How often fetch_days re-queues a day that hit an open circuit before giving up
+FETCH_DAYS_CIRCUIT_RETRIES = 3
+
 # Cache for device info (device info rarely changes)
 _device_info_cache: Dict[str, tuple[Dict[str, Any], float]] = {}
 _cache_timeout = 3600  # 1 hour
@@ -41,16 +65,41 @@ _cache_timeout = 3600  # 1 hour
 class LumentreeHttpApiClient:
     """HTTP API client for Lumentree cloud services."""
 
-    __slots__ = ("_session", "_token")
-
-    def __init__(self, session: aiohttp.ClientSession) -> None:
+    __slots__ = (
+        "_session",
+        "_base_url",
+        "_token",
+        "_device_id",
+        "_token_generation",
+        "_auth_lock",
+        "_reauth_failures",
+        "_reauth_retry_at",
+        "_token_listeners",
+    )
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        device_id: Optional[str] = None,
+        base_url: str = BASE_URL,
+    ) -> None:
         """Initialize the API client.
 
         Args:
             session: aiohttp client session for HTTP requests
+            device_id: Device used to re-authenticate when the token expires
+            base_url: API root (overridden by tests and benchmarks)
         """
         self._session = session
+        self._base_url = base_url.rstrip("/")
         self._token: Optional[str] = None
+        self._device_id = device_id
+        # Bumped on every token change so waiters can tell a refresh happened
+        self._token_generation = 0
+        self._auth_lock = asyncio.Lock()
+        self._reauth_failures = 0
+        self._reauth_retry_at = 0.0
+        self._token_listeners: List[Callable[[str], None]] = []
 
     # ---------------------------
     # Helpers for statistics
@@ -69,31 +118,21 @@ class LumentreeHttpApiClient:
             return out
         return []
 
-    @staticmethod
-    def _series_5min_kwh(series_w: List[float]) -> List[float]:
-        # Convert W (5‑minute interval) → kWh for each step - keep full precision
-        factor = (5.0 / 60.0) / 1000.0
-        return [w * factor for w in series_w]
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Circuit breaker guarding the Lumentree cloud host."""
+        return get_breaker(urlsplit(self._base_url).hostname or self._base_url)
 
-    @staticmethod
-    def _series_hour_kwh(series_kwh5: List[float]) -> List[float]:
-        # 12 steps of 5‑min per hour
-        if not series_kwh5:
-            return []
-        hours = []
-        for h in range(24):
-            start = h * 12
-            end = start + 12
-            if start >= len(series_kwh5):
-                hours.append(0.0)
-            else:
-                hours.append(sum(series_kwh5[start:end]))  # Keep full precision
-        return hours
+    async def wait_for_circuit(self) -> None:
+        """Sleep until the circuit breaker lets requests through again.
 
-    @staticmethod
-    def _sum(series: List[float]) -> float:
-        # Keep full precision
-        return sum(series) if series else 0.0
+        Used by backfills so they pause during an outage instead of spinning
+        through days that all fail fast.
+        """
+        retry_after = self.circuit_breaker.retry_after
+        if retry_after > 0:
+            _LOGGER.info(f"Lumentree API unavailable, waiting {retry_after:.0f}s before continuing")
+            await asyncio.sleep(retry_after)
 
     def set_token(self, token: Optional[str]) -> None:
         """Set the authentication token.
@@ -102,9 +141,69 @@ class LumentreeHttpApiClient:
             token: Authentication token
         """
         self._token = token
+        self._token_generation += 1
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("API token %s.", "set" if token else "cleared")
 
+    def add_token_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """Register a callback for tokens obtained by automatic re-authentication.
+
+        Args:
+            listener: Called with the new token
+
+        Returns:
+            Function that removes the listener
+        """
+        self._token_listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._token_listeners:
+                self._token_listeners.remove(listener)
+
+        return _remove
+
+    async def _refresh_token(self, seen_generation: int) -> None:
+        """Re-authenticate once for all callers that saw the same expired token.
+
+        The first caller re-authenticates while holding the lock; callers that
+        were waiting find a newer token generation and return immediately.
+
+        Args:
+            seen_generation: Token generation used by the failed request
+
+        Raises:
+            AuthException: If re-authentication fails or is backing off
+        """
+        async with self._auth_lock:
+            if self._token_generation != seen_generation:
+                return
+
+            remaining = self._reauth_retry_at - time.monotonic()
+            if remaining > 0:
+                raise AuthException(f"Token expired; re-authentication backing off for {remaining:.0f}s")
+
+            _LOGGER.info(f"Token rejected, re-authenticating device {self._device_id}")
+            try:
+                token = await self.authenticate_device(self._device_id)
+            except Exception as exc:
+                self._reauth_failures += 1
+                delay = min(REAUTH_BACKOFF_BASE * 2 ** (self._reauth_failures - 1), REAUTH_BACKOFF_MAX)
+                self._reauth_retry_at = time.monotonic() + delay
+                _LOGGER.error(
+                    f"Re-authentication failed ({self._reauth_failures} in a row): {exc}. "
+                    f"Next attempt in {delay:.0f}s"
+                )
+                raise AuthException(f"Re-authentication failed: {exc}") from exc
+
+            self._reauth_failures = 0
+            self._reauth_retry_at = 0.0
+
+        for listener in list(self._token_listeners):
+            try:
+                listener(token)
+            except Exception:
+                _LOGGER.exception("Error in token listener")
+
     async def _request(
         self,
         method: str,
@@ -115,7 +214,50 @@ class LumentreeHttpApiClient:
         requires_auth: bool = True,
         max_retries: int = API_MAX_RETRIES,
     ) -> Dict[str, Any]:
-        """Make HTTP request to API.
+        """Make HTTP request to API, re-authenticating once if the token is rejected.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint URL or path
+            params: Query parameters
+            data: Request body data
+            extra_headers: Additional headers
+            requires_auth: Whether authentication is required
+            max_retries: Maximum number of retry attempts for network/server errors
+
+        Returns:
+            Response JSON data
+
+        Raises:
+            AuthException: If authentication fails and cannot be renewed
+            CircuitOpenException: If the host's circuit breaker is open
+            ApiException: If API request fails
+        """
+        generation = self._token_generation
+        try:
+            return await self._request_once(
+                method, endpoint, params, data, extra_headers, requires_auth, max_retries
+            )
+        except AuthException:
+            if not requires_auth or not self._device_id:
+                raise
+        await self._refresh_token(generation)
+        # Replay with the new token
+        return await self._request_once(
+            method, endpoint, params, data, extra_headers, requires_auth, max_retries
+        )
+
+    async def _request_once(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+        requires_auth: bool = True,
+        max_retries: int = API_MAX_RETRIES,
+    ) -> Dict[str, Any]:
+        """Make a single HTTP request to API (network retries only).
 
         Args:
             method: HTTP method (GET, POST, etc.)
@@ -131,6 +273,7 @@ class LumentreeHttpApiClient:
 
         Raises:
             AuthException: If authentication fails
+            CircuitOpenException: If the host's circuit breaker is open
             ApiException: If API request fails
         """
         # Support absolute endpoint URLs
@@ -139,7 +282,8 @@ class LumentreeHttpApiClient:
         ):
             url = endpoint
         else:
-            url = f"{BASE_URL}{endpoint}"
+            url = f"{self._base_url}{endpoint}"
+        breaker = get_breaker(urlsplit(url).hostname or url)
 
         headers = DEFAULT_HEADERS.copy()
         if extra_headers:
@@ -164,12 +308,20 @@ class LumentreeHttpApiClient:
         delay = API_RETRY_BASE_DELAY
 
         for attempt in range(max_retries):
+            # Fail fast while the host is known to be down (also stops retries mid-loop)
+            breaker.before_request()
             try:
-                async with self._session.request(
+                # Global limiter: waiting requests are admitted by priority
+                async with API_LIMITER.slot(), self._session.request(
                     method, url, headers=headers, params=params, data=data, timeout=DEFAULT_TIMEOUT
                 ) as response:
                     if _LOGGER.isEnabledFor(logging.DEBUG):
                         _LOGGER.debug("HTTP %s response: %s", url, response.status)
+                    # Any 5xx counts against the host, whatever its body says
+                    if response.status >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
 
                     resp_text = await response.text()
                     resp_text_short = resp_text[:300]
@@ -209,6 +361,7 @@ class LumentreeHttpApiClient:
                 raise
             except (asyncio.TimeoutError, ClientConnectorError, ServerConnectionError) as exc:
                 # Network/connection errors - retry with exponential backoff
+                breaker.record_failure()
                 last_exc = exc
                 error_type = type(exc).__name__
                 
@@ -227,7 +380,7 @@ class LumentreeHttpApiClient:
                 # HTTP status errors - don't retry except for server errors (5xx)
                 if exc.status in [401, 403]:
                     raise AuthException(f"Auth error ({exc.status}): {exc.message}") from exc
-                
+
                 # Retry on 5xx server errors
                 if 500 <= exc.status < 600 and attempt < max_retries - 1:
                     _LOGGER.warning(
@@ -242,6 +395,7 @@ class LumentreeHttpApiClient:
                     raise ApiException(f"HTTP error: {exc.status}") from exc
             except aiohttp.ClientError as exc:
                 # Other client errors - retry
+                breaker.record_failure()
                 last_exc = exc
                 if attempt < max_retries - 1:
                     _LOGGER.warning(
@@ -444,6 +598,9 @@ class LumentreeHttpApiClient:
 
         Returns:
             Dictionary with daily statistics
+
+        Raises:
+            CircuitOpenException: If the API circuit breaker is open
         """
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Fetching daily stats for %s @ %s", device_identifier, query_date)
@@ -458,9 +615,199 @@ class LumentreeHttpApiClient:
         # Wait for all to complete
         results = await asyncio.gather(pv_task, bat_task, other_task, return_exceptions=True)
 
+        # Server down: surface it instead of returning an empty day
+        for result in results:
+            if isinstance(result, CircuitOpenException):
+                raise result
+
         # Merge results
         return self._merge_stats_results(results)
 
+    async def fetch_day_totals(self, device_identifier: str, query_date: str) -> Dict[str, float]:
+        """Fetch one day and return normalized totals in kWh.
+
+        Args:
+            device_identifier: Device ID or serial number
+            query_date: Date in YYYY-MM-DD format
+
+        Returns:
+            Dictionary with keys pv, grid, load, essential, total_load, charge, discharge
+
+        Raises:
+            CircuitOpenException: If the API circuit breaker is open (instead of
+                returning an all-zero day)
+        """
+        params = {"deviceId": device_identifier, "queryDate": query_date}
+        results = await asyncio.gather(
+            self._fetch_pv_data(params),
+            self._fetch_battery_data(params),
+            self._fetch_other_data(params),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, CircuitOpenException):
+                raise result
+        return self._normalize_day_totals(query_date, *results)
+
+    @staticmethod
+    def _normalize_day_totals(query_date: str, pv: Any, bat: Any, oth: Any) -> Dict[str, float]:
+        """Turn raw day fetch results into totals, falling back to series sums."""
+        # Track API failures for logging
+        api_failures = []
+        
+        # Handle exceptions gracefully
+        if isinstance(pv, Exception):
+            api_failures.append(f"PV: {type(pv).__name__}")
+            pv = {}
+        if isinstance(bat, Exception):
+            api_failures.append(f"Battery: {type(bat).__name__}")
+            bat = {}
+        if isinstance(oth, Exception):
+            api_failures.append(f"Other: {type(oth).__name__}")
+            oth = {}
+
+        # Extract values with fallback to series sums if tableValue is None
+        # (series totals are only computed when the fallback is actually needed)
+        # PV: prefer tableValue, fallback to the PV series sum
+        pv_value = pv.get("pv_today")
+        if pv_value is None and pv.get("pv_series"):
+            pv_value = pv["pv_series"].total_kwh
+        pv_final = float(pv_value or 0.0)
+        
+        # Grid
+        grid_value = oth.get("grid_in_today")
+        if grid_value is None and oth.get("grid_series"):
+            grid_value = oth["grid_series"].total_kwh
+        grid_final = float(grid_value or 0.0)
+        
+        # Load and Essential
+        load_value = oth.get("load_today")
+        if load_value is None and oth.get("load_series"):
+            load_value = oth["load_series"].total_kwh
+        load_final = float(load_value or 0.0)
+        
+        essential_value = oth.get("essential_today")
+        if essential_value is None and oth.get("essential_series"):
+            essential_value = oth["essential_series"].total_kwh
+        essential_final = float(essential_value or 0.0)
+        
+        total_load_value = load_final + essential_final
+        
+        # Battery charge/discharge
+        charge_value = float(bat.get("charge_today") or 0.0)
+        discharge_value = float(bat.get("discharge_today") or 0.0)
+        
+        # Log API failures if any
+        if api_failures:
+            _LOGGER.warning(
+                f"API failures for {query_date}: {', '.join(api_failures)}. "
+                f"Values: pv={pv_final:.2f}, grid={grid_final:.2f}, load={load_final:.2f}, "
+                f"essential={essential_final:.2f}, charge={charge_value:.2f}, discharge={discharge_value:.2f}"
+            )
+        
+        return {
+            "pv": pv_final,
+            "grid": grid_final,
+            "load": load_final,
+            "essential": essential_final,
+            "total_load": total_load_value,
+            "charge": charge_value,
+            "discharge": discharge_value,
+        }
+
+    async def fetch_days(
+        self,
+        dates: Iterable[str],
+        *,
+        device_identifier: Optional[str] = None,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        priority: RequestPriority = RequestPriority.HISTORY,
+        ordered: bool = False,
+    ) -> AsyncIterator[DayResult]:
+        """Fetch many days with up to ``concurrency`` days in flight.
+
+        Requests go through the global limiter with the given priority, so
+        live coordinator refreshes are never starved by a backfill. Days that
+        hit an open circuit breaker are retried after the cooldown.
+
+        Args:
+            dates: Dates in YYYY-MM-DD format (consumed lazily)
+            device_identifier: Device ID (defaults to the client's device)
+            concurrency: Maximum number of days fetched at once
+            priority: Limiter priority of the requests
+            ordered: Yield results in input order instead of completion order
+
+        Yields:
+            DayResult per date, with normalized totals or the error
+        """
+        device = device_identifier or self._device_id
+        if not device:
+            raise ValueError("fetch_days requires a device identifier")
+
+        date_iter = iter(dates)
+        retry_queue: List[str] = []
+        circuit_retries: Dict[str, int] = {}
+        pending: Dict[asyncio.Task, str] = {}
+        # For ordered mode: input order and finished results waiting to be yielded
+        order: List[str] = []
+        done_results: Dict[str, DayResult] = {}
+        exhausted = False
+
+        def _next_date() -> Optional[str]:
+            nonlocal exhausted
+            if retry_queue:
+                return retry_queue.pop(0)
+            if exhausted:
+                return None
+            try:
+                date_str = next(date_iter)
+            except StopIteration:
+                exhausted = True
+                return None
+            if ordered:
+                order.append(date_str)
+            return date_str
+
+        try:
+            while True:
+                while len(pending) < max(1, concurrency):
+                    date_str = _next_date()
+                    if date_str is None:
+                        break
+                    task = create_task_with_priority(self.fetch_day_totals(device, date_str), priority)
+                    pending[task] = date_str
+                if not pending:
+                    break
+
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    date_str = pending.pop(task)
+                    exc = task.exception()
+                    if isinstance(exc, CircuitOpenException):
+                        attempts = circuit_retries.get(date_str, 0) + 1
+                        circuit_retries[date_str] = attempts
+                        if attempts <= FETCH_DAYS_CIRCUIT_RETRIES:
+                            retry_queue.append(date_str)
+                            continue
+                    result = DayResult(date_str, error=exc) if exc else DayResult(date_str, totals=task.result())
+                    if ordered:
+                        done_results[date_str] = result
+                    else:
+                        yield result
+
+                if ordered:
+                    while order and order[0] in done_results:
+                        yield done_results.pop(order.pop(0))
+
+                if retry_queue:
+                    # Pause new work until the breaker lets a probe through
+                    await self.wait_for_circuit()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
     async def get_year_data(self, device_identifier: str, year: int) -> Dict[str, Any]:
         """Get yearly statistics data (12 months aggregated).
 
@@ -552,6 +899,9 @@ class LumentreeHttpApiClient:
                     result[key] = []
             
             return result
+        except CircuitOpenException:
+            # Don't report an outage as a month without data
+            raise
         except Exception as exc:
             _LOGGER.error(f"Error fetching month data for {device_identifier} @ {year}-{month:02d}: {exc}")
             # Return empty arrays on error
@@ -582,21 +932,14 @@ class LumentreeHttpApiClient:
             val = pv_data.get("tableValue")
             result["pv_today"] = float(val) / 10.0 if val is not None else None
 
-            # Optional series (5‑minute W)
-            series_w = self._to_float_list(pv_data.get("tableValueInfo"))
-            if series_w:
-                series_kwh5 = self._series_5min_kwh(series_w)
-                series_hour = self._series_hour_kwh(series_kwh5)
-                result.update(
-                    {
-                        "pv_series_5min_w": series_w,
-                        "pv_series_5min_kwh": series_kwh5,
-                        "pv_series_hour_kwh": series_hour,
-                        "pv_sum_kwh": self._sum(series_kwh5),
-                    }
-                )
+            # Optional series (5‑minute W); kWh/hourly views are derived lazily
+            series = MetricSeries.from_values(pv_data.get("tableValueInfo"))
+            if series:
+                result["pv_series"] = series
 
             return result
+        except CircuitOpenException:
+            raise
         except (ApiException, AuthException) as exc:
             _LOGGER.warning(f"Failed PV stats ({type(exc).__name__}): {exc}")
             return {"pv_today": None}
@@ -618,7 +961,7 @@ class LumentreeHttpApiClient:
             data = resp.get("data", {})
             bats_data = data.get("bats", [])
 
-            result: Dict[str, Optional[float]] = {"charge_today": None, "discharge_today": None}
+            result: Dict[str, Any] = {"charge_today": None, "discharge_today": None}
 
             if isinstance(bats_data, list):
                 if len(bats_data) > 0 and "tableValue" in bats_data[0]:
@@ -631,26 +974,16 @@ class LumentreeHttpApiClient:
             # This contradicts API_PROTOCOL.md but matches actual device behavior
             # Positive (+) = Discharge (pin phát năng lượng)
             # Negative (-) = Charge (pin nhận năng lượng)
-            series_w = self._to_float_list(data.get("tableValueInfo"))
-            if series_w:
+            series = MetricSeries.from_values(data.get("tableValueInfo"))
+            if series:
                 # Invert signs: API positive = discharge, API negative = charge
-                # For processing: Charge = negative values (invert to positive for kWh), Discharge = positive values
-                # But keep original signed in battery_series_5min_w for chart (will be inverted in sensor)
-                inverted_series_w = [-w for w in series_w]  # Invert: positive becomes negative (charge), negative becomes positive (discharge)
-                # Charge: was negative in API, now positive after inversion
-                charge_kwh5 = self._series_5min_kwh([w if w > 0 else 0.0 for w in inverted_series_w])
-                # Discharge: was positive in API, now negative after inversion
-                discharge_kwh5 = self._series_5min_kwh([abs(w) if w < 0 else 0.0 for w in inverted_series_w])
-                # Store inverted series for sensor processing (sensor expects: positive = charge, negative = discharge)
-                result.update(
-                    {
-                        "battery_series_5min_w": inverted_series_w,
-                        "battery_charge_series_hour_kwh": self._series_hour_kwh(charge_kwh5),
-                        "battery_discharge_series_hour_kwh": self._series_hour_kwh(discharge_kwh5),
-                    }
-                )
+                # After inversion: positive = charge, negative = discharge (what the sensor expects)
+                # Charge/discharge views are split lazily by BatterySeries
+                result["battery_series"] = BatterySeries(series.w.negated())
 
             return result
+        except CircuitOpenException:
+            raise
         except (ApiException, AuthException) as exc:
             _LOGGER.warning(f"Failed battery stats ({type(exc).__name__}): {exc}")
             return {"charge_today": None, "discharge_today": None}
@@ -671,21 +1004,16 @@ class LumentreeHttpApiClient:
             resp = await self._request("GET", URL_GET_OTHER_DAY_DATA, params=base_params, requires_auth=True)
             data = resp.get("data", {})
 
-            result: Dict[str, Optional[float]] = {"grid_in_today": None, "load_today": None}
+            result: Dict[str, Any] = {"grid_in_today": None, "load_today": None}
 
             # Grid
             grid_data = data.get("grid", {})
             grid_val = grid_data.get("tableValue")
             if grid_val is not None:
                 result["grid_in_today"] = float(grid_val) / 10.0
-            grid_series_w = self._to_float_list(grid_data.get("tableValueInfo"))
-            if grid_series_w:
-                g5 = self._series_5min_kwh(grid_series_w)
-                result.update({
-                    "grid_series_5min_w": grid_series_w,
-                    "grid_series_5min_kwh": g5,
-                    "grid_series_hour_kwh": self._series_hour_kwh(g5),
-                })
+            grid_series = MetricSeries.from_values(grid_data.get("tableValueInfo"))
+            if grid_series:
+                result["grid_series"] = grid_series
 
             # Load and Essential (read together, process together)
             load_data = data.get("homeload", {})
@@ -708,57 +1036,30 @@ class LumentreeHttpApiClient:
                 if total_load_value > 0 or (load_value is not None and essential_value is not None):
                     result["total_load_today"] = total_load_value
             
-            # Extract and process series data in parallel
-            load_series_w = self._to_float_list(load_data.get("tableValueInfo")) if load_data else []
-            e_series_w = self._to_float_list(essential_data.get("tableValueInfo")) if isinstance(essential_data, dict) else []
-            
-            # Process load series
-            if load_series_w:
-                l5 = self._series_5min_kwh(load_series_w)
-                result.update({
-                    "load_series_5min_w": load_series_w,
-                    "load_series_5min_kwh": l5,
-                    "load_series_hour_kwh": self._series_hour_kwh(l5),
-                })
+            # Extract and process series data
+            load_series = MetricSeries.from_values(load_data.get("tableValueInfo") if load_data else None)
+            e_series = MetricSeries.from_values(
+                essential_data.get("tableValueInfo") if isinstance(essential_data, dict) else None
+            )
             
-            # Process essential series
-            if e_series_w:
-                e5 = self._series_5min_kwh(e_series_w)
-                result.update({
-                    "essential_series_5min_w": e_series_w,
-                    "essential_series_5min_kwh": e5,
-                    "essential_series_hour_kwh": self._series_hour_kwh(e5),
-                })
+            if load_series:
+                result["load_series"] = load_series
+            if e_series:
+                result["essential_series"] = e_series
             
-            # Calculate total_load series immediately when we have both series
-            load_w = result.get("load_series_5min_w", [])
-            essential_w = result.get("essential_series_5min_w", [])
-            if load_w and essential_w:
-                # Handle different lengths by padding with zeros
-                max_len = max(len(load_w), len(essential_w))
-                load_w_padded = list(load_w) + [0.0] * (max_len - len(load_w))
-                essential_w_padded = list(essential_w) + [0.0] * (max_len - len(essential_w))
-                total_load_w = [float(l or 0) + float(e or 0) for l, e in zip(load_w_padded, essential_w_padded)]
-                
-                load_5min_kwh = result.get("load_series_5min_kwh", [])
-                essential_5min_kwh = result.get("essential_series_5min_kwh", [])
-                # Handle different lengths for kWh series too
-                max_len_kwh = max(len(load_5min_kwh), len(essential_5min_kwh))
-                load_5min_kwh_padded = list(load_5min_kwh) + [0.0] * (max_len_kwh - len(load_5min_kwh))
-                essential_5min_kwh_padded = list(essential_5min_kwh) + [0.0] * (max_len_kwh - len(essential_5min_kwh))
-                total_load_5min_kwh = [float(l or 0) + float(e or 0) for l, e in zip(load_5min_kwh_padded, essential_5min_kwh_padded)]
-                
-                result.update({
-                    "total_load_series_5min_w": total_load_w,
-                    "total_load_series_5min_kwh": total_load_5min_kwh,
-                    "total_load_series_hour_kwh": self._series_hour_kwh(total_load_5min_kwh),
-                })
+            # Total load series when we have both series; the element-wise sum
+            # (shorter series padded with zeros) is only built when read
+            if load_series and e_series:
+                total_load_series = MetricSeries.sum_of(load_series, e_series)
+                result["total_load_series"] = total_load_series
                 
                 # If we have series but no daily total yet, calculate from series sum
-                if "total_load_today" not in result and total_load_5min_kwh:
-                    result["total_load_today"] = self._sum(total_load_5min_kwh)
+                if "total_load_today" not in result:
+                    result["total_load_today"] = total_load_series.total_kwh
 
             return result
+        except CircuitOpenException:
+            raise
         except (ApiException, AuthException) as exc:
             _LOGGER.warning(f"Failed other stats ({type(exc).__name__}): {exc}")
             return {"grid_in_today": None, "load_today": None}
@@ -786,12 +1087,12 @@ class LumentreeHttpApiClient:
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Merged daily stats: %s", merged)
 
-        # Filter out None values but keep lists (series data) and other valid values
+        # Filter out None values but keep series data and other valid values
         # This preserves series data even if tableValue is None
         filtered = {}
         for k, v in merged.items():
-            # Keep lists (series data) and non-None values, skip None scalar values
-            if isinstance(v, list) or v is not None:
+            # Keep series data and non-None values, skip None scalar values
+            if v is not None:
                 filtered[k] = v
         
         return filtered
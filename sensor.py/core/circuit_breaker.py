@@ -0,0 +1,140 @@
+"""Per-host circuit breaker for the Lumentree cloud API.
+
+While the server is unreachable every coordinator and backfill would keep
+retrying with long timeouts. The breaker counts consecutive network/5xx
+failures per host and, once the threshold is reached, fails requests fast
+until a cooldown has passed. After the cooldown a single probe request is let
+through (half-open): success closes the circuit, failure re-opens it.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+from .exceptions import CircuitOpenException
+
+_LOGGER = logging.getLogger(__name__)
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 60.0  # seconds
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one API host."""
+
+    __slots__ = (
+        "host",
+        "_failure_threshold",
+        "_cooldown",
+        "_clock",
+        "_failures",
+        "_opened_at",
+        "_probe_started",
+    )
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        cooldown: float = CIRCUIT_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the breaker.
+
+        Args:
+            host: Host name the breaker guards (for logging)
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown: Seconds to fail fast before allowing a probe
+            clock: Monotonic time source
+        """
+        self.host = host
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Current state of the circuit."""
+        if self._opened_at is None:
+            return STATE_CLOSED
+        if self._clock() - self._opened_at < self._cooldown:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until a request may be attempted again (0 when allowed)."""
+        if self._opened_at is None:
+            return 0.0
+        now = self._clock()
+        remaining = self._opened_at + self._cooldown - now
+        if remaining > 0:
+            return remaining
+        if self._probe_started is not None:
+            # A probe is in flight; it times out after another cooldown period
+            return max(0.0, self._probe_started + self._cooldown - now)
+        return 0.0
+
+    def before_request(self) -> None:
+        """Check whether a request may be sent.
+
+        Raises:
+            CircuitOpenException: If the circuit is open or a probe is in flight
+        """
+        state = self.state
+        if state == STATE_CLOSED:
+            return
+        if state == STATE_HALF_OPEN:
+            now = self._clock()
+            if self._probe_started is None or now - self._probe_started >= self._cooldown:
+                self._probe_started = now
+                _LOGGER.info(f"Lumentree API circuit for {self.host} half-open, sending probe request")
+                return
+        raise CircuitOpenException(
+            f"Lumentree API circuit open for {self.host}, retry in {self.retry_after:.0f}s",
+            retry_after=self.retry_after,
+        )
+
+    def record_success(self) -> None:
+        """Record a response from the server (closes the circuit)."""
+        if self._opened_at is not None:
+            _LOGGER.info(f"Lumentree API circuit for {self.host} closed, server reachable again")
+        self._failures = 0
+        self._opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        """Record a network or server failure."""
+        self._failures += 1
+        if self._opened_at is not None:
+            # Failed probe: start a new cooldown
+            self._opened_at = self._clock()
+            self._probe_started = None
+            return
+        if self._failures >= self._failure_threshold:
+            self._opened_at = self._clock()
+            _LOGGER.warning(
+                f"Lumentree API circuit for {self.host} opened after {self._failures} consecutive failures; "
+                f"failing fast for {self._cooldown:.0f}s"
+            )
+
+
+# One breaker per host, shared by all clients (and config entries) in the process
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """Return the shared breaker for a host."""
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(host)
+    return breaker
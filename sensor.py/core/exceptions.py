@@ -30,3 +30,11 @@ class ParseException(LumentreeException):
 
     pass
 
+
+
+class CircuitOpenException(ApiException):
+    """Exception raised while the API circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float = 0.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,189 @@
+"""Dedicated aiohttp session for the Lumentree cloud API.
+
+Home Assistant's shared session is tuned for many different hosts. All of our
+traffic goes to a single plain-HTTP backend, so the integration keeps one
+session of its own (shared by all config entries) with a connector that keeps
+connections alive, caches DNS and allows enough parallel connections for
+backfill. Connection pool metrics are collected through aiohttp tracing.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant
+
+from ..const import (
+    DATA_HTTP_SESSION,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_LIMIT_PER_HOST,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HttpPoolMetrics:
+    """Counters for connection reuse, DNS cache and connection setup time."""
+
+    __slots__ = (
+        "requests",
+        "request_errors",
+        "connections_created",
+        "connections_reused",
+        "dns_cache_hits",
+        "dns_cache_misses",
+        "connect_time_total",
+    )
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.request_errors = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+        self.connect_time_total = 0.0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Build a TraceConfig that updates these counters."""
+        trace = aiohttp.TraceConfig()
+
+        async def _on_request_end(session, ctx, params) -> None:
+            self.requests += 1
+
+        async def _on_request_exception(session, ctx, params) -> None:
+            self.requests += 1
+            self.request_errors += 1
+
+        async def _on_create_start(session, ctx, params) -> None:
+            ctx.connect_started = time.monotonic()
+
+        async def _on_create_end(session, ctx, params) -> None:
+            self.connections_created += 1
+            started = getattr(ctx, "connect_started", None)
+            if started is not None:
+                self.connect_time_total += time.monotonic() - started
+
+        async def _on_reuse(session, ctx, params) -> None:
+            self.connections_reused += 1
+
+        async def _on_dns_hit(session, ctx, params) -> None:
+            self.dns_cache_hits += 1
+
+        async def _on_dns_miss(session, ctx, params) -> None:
+            self.dns_cache_misses += 1
+
+        trace.on_request_end.append(_on_request_end)
+        trace.on_request_exception.append(_on_request_exception)
+        trace.on_connection_create_start.append(_on_create_start)
+        trace.on_connection_create_end.append(_on_create_end)
+        trace.on_connection_reuseconn.append(_on_reuse)
+        trace.on_dns_cache_hit.append(_on_dns_hit)
+        trace.on_dns_cache_miss.append(_on_dns_miss)
+        return trace
+
+    def as_dict(self, connector: Optional[aiohttp.BaseConnector] = None) -> Dict[str, Any]:
+        """Return metrics (plus current pool occupancy if a connector is given)."""
+        connections = self.connections_created + self.connections_reused
+        data: Dict[str, Any] = {
+            "requests": self.requests,
+            "request_errors": self.request_errors,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / connections, 3) if connections else None,
+            "avg_connect_ms": (
+                round(self.connect_time_total / self.connections_created * 1000, 1)
+                if self.connections_created else None
+            ),
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
+        if connector is not None:
+            # Pool occupancy comes from connector internals; tolerate aiohttp changes
+            idle = getattr(connector, "_conns", None) or {}
+            acquired = getattr(connector, "_acquired", None) or ()
+            data.update(
+                {
+                    "limit": connector.limit,
+                    "limit_per_host": connector.limit_per_host,
+                    "idle_connections": sum(len(conns) for conns in idle.values()),
+                    "active_connections": len(acquired),
+                    "closed": connector.closed,
+                }
+            )
+        return data
+
+
+class LumentreeHttpSession:
+    """Owner of the shared session, reference-counted by config entries."""
+
+    __slots__ = ("session", "connector", "metrics", "users", "_remove_close_listener")
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.metrics = HttpPoolMetrics()
+        self.connector = aiohttp.TCPConnector(
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            use_dns_cache=True,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self.connector,
+            trace_configs=[self.metrics.trace_config()],
+        )
+        self.users = 0
+        self._remove_close_listener: Optional[Callable[[], None]] = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, self._async_close_on_stop
+        )
+
+    async def _async_close_on_stop(self, event: Event) -> None:
+        self._remove_close_listener = None
+        await self.session.close()
+
+    async def async_close(self) -> None:
+        if self._remove_close_listener is not None:
+            self._remove_close_listener()
+            self._remove_close_listener = None
+        await self.session.close()
+
+
+def async_get_http_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the integration's session, creating it on first use.
+
+    Every call must be paired with ``async_release_http_session``.
+    """
+    holder: Optional[LumentreeHttpSession] = hass.data.get(DATA_HTTP_SESSION)
+    if holder is None or holder.session.closed:
+        holder = LumentreeHttpSession(hass)
+        hass.data[DATA_HTTP_SESSION] = holder
+        _LOGGER.debug(
+            f"Created Lumentree HTTP session (limit_per_host={HTTP_LIMIT_PER_HOST}, "
+            f"keepalive={HTTP_KEEPALIVE_TIMEOUT}s, dns_ttl={HTTP_DNS_CACHE_TTL}s)"
+        )
+    holder.users += 1
+    return holder.session
+
+
+async def async_release_http_session(hass: HomeAssistant) -> None:
+    """Drop one reference; the session is closed when the last entry releases it."""
+    holder: Optional[LumentreeHttpSession] = hass.data.get(DATA_HTTP_SESSION)
+    if holder is None:
+        return
+    holder.users -= 1
+    if holder.users <= 0:
+        hass.data.pop(DATA_HTTP_SESSION, None)
+        await holder.async_close()
+        _LOGGER.debug("Closed Lumentree HTTP session")
+
+
+def get_http_pool_metrics(hass: HomeAssistant) -> Optional[Dict[str, Any]]:
+    """Return connection pool metrics, or None if no session exists."""
+    holder: Optional[LumentreeHttpSession] = hass.data.get(DATA_HTTP_SESSION)
+    if holder is None:
+        return None
+    return holder.metrics.as_dict(holder.connector)
@@ -0,0 +1,217 @@
+"""Global priority-aware limiter for Lumentree API requests.
+
+All config entries share one backend, so concurrency is limited process-wide.
+When the limit is reached, waiting requests are admitted by priority (live
+coordinator refreshes before day finalization before recent gap fills before
+historical backfill) and FIFO within the same priority. Each priority also has
+a budget: the slots it may hold together with all less urgent priorities. The
+remaining slots are reserved for more urgent work, so a large historical
+backfill never occupies the connections a live refresh needs.
+
+Background jobs (startup, nightly and service-triggered backfills of every
+configured device) additionally queue for a job slot (``background_job``), so
+only a few devices backfill at a time and recent work goes first.
+
+The priority of a request is taken from a context variable, so callers set it
+once (``request_priority``) and it follows every request made from that task.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Coroutine, Iterator, List, Mapping, Optional, Tuple
+
+from ..const import (
+    API_BUDGET_FINALIZE,
+    API_BUDGET_HISTORY,
+    API_BUDGET_RECENT,
+    HTTP_LIMIT_PER_HOST,
+    MAX_CONCURRENT_BACKFILL_JOBS,
+    MAX_HISTORY_BACKFILL_JOBS,
+)
+
+
+class RequestPriority(IntEnum):
+    """Request priorities (lower value = served first)."""
+
+    LIVE = 0
+    FINALIZE = 1
+    RECENT = 2
+    HISTORY = 3
+
+
+_current_priority: contextvars.ContextVar[RequestPriority] = contextvars.ContextVar(
+    "lumentree_request_priority", default=RequestPriority.LIVE
+)
+
+
+def current_priority() -> RequestPriority:
+    """Priority of requests made from the current context."""
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(priority: RequestPriority) -> Iterator[None]:
+    """Run requests in this block with the given priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def create_task_with_priority(
+    coro: Coroutine[Any, Any, Any], priority: RequestPriority
+) -> "asyncio.Task[Any]":
+    """Create a task whose requests use ``priority`` (without touching the caller's context)."""
+    ctx = contextvars.copy_context()
+    ctx.run(_current_priority.set, priority)
+    return asyncio.get_running_loop().create_task(coro, context=ctx)
+
+
+class PriorityLimiter:
+    """Concurrency limiter that admits waiters by priority, within per-priority budgets."""
+
+    __slots__ = ("_limit", "_budgets", "_active", "_held", "_waiters", "_counter")
+
+    def __init__(self, limit: int, budgets: Optional[Mapping[RequestPriority, int]] = None) -> None:
+        """Initialize the limiter.
+
+        Args:
+            limit: Maximum slots held at once
+            budgets: Per priority, the slots that priority and all lower ones
+                may hold together (defaults to ``limit``)
+        """
+        self._limit = limit
+        self._budgets: List[int] = []
+        for priority in RequestPriority:
+            budget = min(limit, (budgets or {}).get(priority, limit))
+            # A lower priority never gets more room than a higher one
+            self._budgets.append(min([budget, *self._budgets]))
+        self._active = 0
+        self._held = [0] * len(RequestPriority)
+        self._waiters: List[Tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+
+    @property
+    def active(self) -> int:
+        """Requests currently holding a slot."""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """Requests waiting for a slot."""
+        return sum(1 for _p, _n, fut in self._waiters if not fut.done())
+
+    def held(self, priority: RequestPriority) -> int:
+        """Slots currently held by one priority."""
+        return self._held[priority]
+
+    async def acquire(self, priority: Optional[RequestPriority] = None) -> None:
+        """Wait for a slot.
+
+        Args:
+            priority: Request priority (defaults to the context priority)
+        """
+        if priority is None:
+            priority = current_priority()
+        if not self._waiters and self._can_admit(priority):
+            self._admit(priority)
+            return
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._counter), fut))
+        self._wake()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was handed over right before cancellation; pass it on
+                self.release(priority)
+            raise
+
+    def release(self, priority: Optional[RequestPriority] = None) -> None:
+        """Release a slot and hand it to the highest-priority waiter.
+
+        Args:
+            priority: Priority the slot was acquired with (defaults to the context priority)
+        """
+        if priority is None:
+            priority = current_priority()
+        self._active -= 1
+        self._held[priority] -= 1
+        self._wake()
+
+    def _can_admit(self, priority: int) -> bool:
+        """True if the priority's budget and those of all more urgent priorities have room.
+
+        A slot of ``priority`` also counts against the budget of every more
+        urgent priority (each budget covers its less urgent priorities), so
+        those must not be full either; otherwise e.g. history backfill could
+        take the slot finalization's budget leaves free for live refreshes.
+        The most urgent budget is at most ``limit``, so this covers the limit.
+        """
+        held = sum(self._held[priority + 1:])
+        for more_urgent in range(priority, -1, -1):
+            held += self._held[more_urgent]
+            if held >= self._budgets[more_urgent]:
+                return False
+        return True
+
+    def _admit(self, priority: int) -> None:
+        self._active += 1
+        self._held[priority] += 1
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _n, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            # A less urgent waiter is checked against the same budgets (and
+            # its own), so once the most urgent waiter is over budget every
+            # waiter behind it is too
+            if not self._can_admit(priority):
+                return
+            heapq.heappop(self._waiters)
+            self._admit(priority)
+            fut.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[RequestPriority] = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block."""
+        if priority is None:
+            priority = current_priority()
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+
+# Shared by every client in the process (one backend host)
+API_LIMITER = PriorityLimiter(
+    HTTP_LIMIT_PER_HOST,
+    {
+        RequestPriority.FINALIZE: API_BUDGET_FINALIZE,
+        RequestPriority.RECENT: API_BUDGET_RECENT,
+        RequestPriority.HISTORY: API_BUDGET_HISTORY,
+    },
+)
+
+# Backfill jobs across all devices; one slot stays free for recent work
+JOB_LIMITER = PriorityLimiter(
+    MAX_CONCURRENT_BACKFILL_JOBS, {RequestPriority.HISTORY: MAX_HISTORY_BACKFILL_JOBS}
+)
+
+
+@asynccontextmanager
+async def background_job(priority: RequestPriority) -> AsyncIterator[None]:
+    """Run a background job: wait for a job slot, then make its requests with ``priority``."""
+    async with JOB_LIMITER.slot(priority):
+        with request_priority(priority):
+            yield
@@ -0,0 +1,351 @@
+"""Compact numeric series for Lumentree 5-minute statistics.
+
+The day endpoints return one sample every 5 minutes (288 per day) for each
+metric. Instead of keeping many parallel Python float lists per refresh, the
+samples are held in a contiguous float64 buffer: a NumPy array when NumPy is
+available (it ships with Home Assistant core) and ``array('d')`` otherwise.
+Conversion to plain lists only happens at the entity boundary.
+"""
+
+from __future__ import annotations
+
+from array import array
+from types import ModuleType
+from typing import Any, Iterator, List, Optional, Tuple
+
+np: ModuleType | None
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the runtime environment
+    np = None
+
+SLOTS_PER_HOUR = 12
+HOURS_PER_DAY = 24
+SLOTS_PER_DAY = SLOTS_PER_HOUR * HOURS_PER_DAY
+
+# W averaged over one 5-minute slot -> kWh
+KWH_PER_W_SLOT = (5.0 / 60.0) / 1000.0
+
+# Intraday refreshes normally only append new slots; the server occasionally
+# revises a few recent ones. More revisions than this means the day was
+# reprocessed server-side and derived views are rebuilt from scratch.
+MAX_REVISED_SLOTS = SLOTS_PER_HOUR
+
+
+def _empty_buffer() -> Any:
+    if np is not None:
+        return np.zeros(0, dtype=np.float64)
+    return array("d")
+
+
+class PowerSeries:
+    """Immutable float64 series with vectorized helpers."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Any = None) -> None:
+        """Wrap an existing buffer (NumPy array or ``array('d')``)."""
+        self._data = _empty_buffer() if data is None else data
+
+    @classmethod
+    def from_values(cls, vals: Any) -> "PowerSeries":
+        """Build a series from an API ``tableValueInfo`` list.
+
+        Invalid entries are skipped, matching the previous list-based parser.
+        """
+        if not isinstance(vals, list) or not vals:
+            return cls()
+        try:
+            buf = array("d", vals)
+        except TypeError:
+            buf = array("d")
+            for v in vals:
+                try:
+                    buf.append(float(v))
+                except Exception:
+                    # Skip invalid entries
+                    continue
+        if np is not None:
+            return cls(np.frombuffer(buf, dtype=np.float64))
+        return cls(buf)
+
+    # ---------------------------
+    # Sequence protocol
+    # ---------------------------
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __bool__(self) -> bool:
+        return len(self._data) > 0
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.tolist())
+
+    def __getitem__(self, index: int) -> float:
+        return float(self._data[index])
+
+    def __repr__(self) -> str:
+        return f"PowerSeries(len={len(self._data)})"
+
+    def copy(self) -> "PowerSeries":
+        return PowerSeries(self._data.copy() if np is not None else array("d", self._data))
+
+    def tolist(self) -> list[float]:
+        """Return a plain list of floats (entity attribute boundary)."""
+        return self._data.tolist()
+
+    def total(self) -> float:
+        """Sum of all samples (full precision)."""
+        if not len(self._data):
+            return 0.0
+        if np is not None:
+            return float(self._data.sum())
+        return sum(self._data)
+
+    # ---------------------------
+    # Vector operations
+    # ---------------------------
+
+    def scaled(self, factor: float) -> "PowerSeries":
+        if np is not None:
+            return PowerSeries(self._data * factor)
+        return PowerSeries(array("d", [v * factor for v in self._data]))
+
+    def to_kwh(self) -> "PowerSeries":
+        """Convert 5-minute average W samples to kWh per slot."""
+        return self.scaled(KWH_PER_W_SLOT)
+
+    def hourly(self) -> "PowerSeries":
+        """Reduce 5-minute slots to 24 hourly sums.
+
+        Missing trailing slots count as zero; an empty series stays empty.
+        """
+        n = len(self._data)
+        if not n:
+            return PowerSeries()
+        n = min(n, SLOTS_PER_DAY)
+        if np is not None:
+            padded = np.zeros(SLOTS_PER_DAY, dtype=np.float64)
+            padded[:n] = self._data[:n]
+            return PowerSeries(padded.reshape(HOURS_PER_DAY, SLOTS_PER_HOUR).sum(axis=1))
+        data = self._data
+        return PowerSeries(
+            array(
+                "d",
+                [sum(data[h * SLOTS_PER_HOUR:(h + 1) * SLOTS_PER_HOUR]) for h in range(HOURS_PER_DAY)],
+            )
+        )
+
+    def negated(self) -> "PowerSeries":
+        if np is not None:
+            return PowerSeries(-self._data)
+        return PowerSeries(array("d", [-v for v in self._data]))
+
+    def positive_part(self) -> "PowerSeries":
+        """Samples above zero, other slots set to 0.0."""
+        if np is not None:
+            return PowerSeries(np.where(self._data > 0.0, self._data, 0.0))
+        return PowerSeries(array("d", [v if v > 0.0 else 0.0 for v in self._data]))
+
+    def negative_part(self) -> "PowerSeries":
+        """Samples below zero (sign kept), other slots set to 0.0."""
+        if np is not None:
+            return PowerSeries(np.where(self._data < 0.0, self._data, 0.0))
+        return PowerSeries(array("d", [v if v < 0.0 else 0.0 for v in self._data]))
+
+    def split_sign(self) -> Tuple["PowerSeries", "PowerSeries"]:
+        """Split a signed series into (positive part, magnitude of negative part)."""
+        return self.positive_part(), self.negative_part().negated()
+
+    def changed_slots(self, previous: "PowerSeries") -> Optional[List[int]]:
+        """Return slot indices that differ from an earlier fetch of the same day.
+
+        Covers revised slots and the new tail. Returns ``None`` when the series
+        cannot be an update of ``previous`` (it got shorter, or more than
+        ``MAX_REVISED_SLOTS`` existing slots changed).
+        """
+        n = len(previous._data)
+        cur = self._data
+        if len(cur) < n:
+            return None
+        if np is not None:
+            revised = np.flatnonzero(cur[:n] != previous._data).tolist()
+        else:
+            revised = [i for i, (a, b) in enumerate(zip(cur, previous._data, strict=False)) if a != b]
+        if len(revised) > MAX_REVISED_SLOTS:
+            return None
+        return revised + list(range(n, len(cur)))
+
+    def patched(self, indices: List[int], source: "PowerSeries", factor: float = 1.0) -> "PowerSeries":
+        """Copy of this series, extended to ``len(source)``, with ``indices`` set to ``source * factor``."""
+        size = max(len(self._data), len(source._data))
+        if np is not None:
+            out = np.zeros(size, dtype=np.float64)
+            out[:len(self._data)] = self._data
+            if indices:
+                idx = np.asarray(indices, dtype=np.intp)
+                out[idx] = source._data[idx] * factor
+            return PowerSeries(out)
+        out = array("d", self._data)
+        out.extend([0.0] * (size - len(out)))
+        for i in indices:
+            out[i] = source._data[i] * factor
+        return PowerSeries(out)
+
+    def __add__(self, other: "PowerSeries") -> "PowerSeries":
+        """Element-wise sum; the shorter series is padded with zeros."""
+        a, b = self._data, other._data
+        if len(a) < len(b):
+            a, b = b, a
+        if np is not None:
+            out = a.copy()
+            out[:len(b)] += b
+            return PowerSeries(out)
+        out = array("d", a)
+        for i, v in enumerate(b):
+            out[i] += v
+        return PowerSeries(out)
+
+
+class MetricSeries:
+    """One metric's 5-minute W series with lazily derived views.
+
+    ``kwh_5min``, ``hour_kwh`` and ``total_kwh`` are pure functions of the W
+    samples; they are computed on first access and memoized for the lifetime
+    of the object, i.e. for one coordinator refresh.
+    """
+
+    __slots__ = ("_w", "_sources", "_kwh_5min", "_hour_kwh", "_total_kwh")
+
+    def __init__(self, series_w: PowerSeries | None = None, *, sources: tuple["MetricSeries", ...] = ()) -> None:
+        self._w = series_w
+        self._sources = sources
+        self._kwh_5min: PowerSeries | None = None
+        self._hour_kwh: PowerSeries | None = None
+        self._total_kwh: float | None = None
+
+    @classmethod
+    def from_values(cls, vals: Any) -> "MetricSeries":
+        return cls(PowerSeries.from_values(vals))
+
+    @classmethod
+    def sum_of(cls, *series: "MetricSeries") -> "MetricSeries":
+        """Element-wise sum of several metrics, built on first access."""
+        return cls(sources=series)
+
+    def __bool__(self) -> bool:
+        if self._w is None:
+            return any(self._sources)
+        return bool(self._w)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(len={len(self.w)})"
+
+    @property
+    def w(self) -> PowerSeries:
+        """Raw 5-minute W samples."""
+        if self._w is None:
+            total = PowerSeries()
+            for source in self._sources:
+                total = total + source.w
+            self._w = total
+        return self._w
+
+    @property
+    def kwh_5min(self) -> PowerSeries:
+        """Energy per 5-minute slot in kWh."""
+        if self._kwh_5min is None:
+            self._kwh_5min = self.w.to_kwh()
+        return self._kwh_5min
+
+    @property
+    def hour_kwh(self) -> PowerSeries:
+        """Energy per hour in kWh (24 values, empty if there are no samples)."""
+        if self._hour_kwh is None:
+            self._hour_kwh = self.kwh_5min.hourly()
+        return self._hour_kwh
+
+    @property
+    def total_kwh(self) -> float:
+        """Total energy of the series in kWh."""
+        if self._total_kwh is None:
+            self._total_kwh = self.kwh_5min.total()
+        return self._total_kwh
+
+    def adopt(self, previous: "MetricSeries") -> bool:
+        """Reuse derived views of an earlier fetch of the same day.
+
+        Only the views ``previous`` already materialized are carried over, with
+        just the changed slots (and the hours containing them) recomputed;
+        everything else stays lazy.
+
+        Args:
+            previous: Series of the same metric from the previous refresh
+
+        Returns:
+            False if the revisions look inconsistent and nothing was reused
+        """
+        changed = self.w.changed_slots(previous.w)
+        if changed is None:
+            return False
+        if not changed:
+            self._kwh_5min = previous._kwh_5min
+            self._hour_kwh = previous._hour_kwh
+            self._total_kwh = previous._total_kwh
+            return True
+        if previous._kwh_5min is None:
+            return True
+
+        prev_kwh = previous._kwh_5min
+        kwh = prev_kwh.patched(changed, self.w, KWH_PER_W_SLOT)
+        self._kwh_5min = kwh
+        data = kwh._data
+        if previous._total_kwh is not None:
+            # Summed again rather than adjusted by the changed slots, so the
+            # total never drifts from a fresh fetch of the same day
+            self._total_kwh = kwh.total()
+        if previous._hour_kwh:
+            hours = {i // SLOTS_PER_HOUR for i in changed if i < SLOTS_PER_DAY}
+            hour_kwh = previous._hour_kwh.copy()
+            for h in hours:
+                start = h * SLOTS_PER_HOUR
+                chunk = data[start:start + SLOTS_PER_HOUR]
+                hour_kwh._data[h] = float(chunk.sum()) if np is not None else sum(chunk)
+            self._hour_kwh = hour_kwh
+        return True
+
+
+class BatterySeries(MetricSeries):
+    """Signed battery W series (positive = charge, negative = discharge)."""
+
+    __slots__ = ("_charge", "_discharge")
+
+    def __init__(self, series_w: PowerSeries | None = None) -> None:
+        super().__init__(series_w)
+        self._charge: MetricSeries | None = None
+        self._discharge: MetricSeries | None = None
+
+    @property
+    def charge(self) -> MetricSeries:
+        """Charge power (positive samples)."""
+        if self._charge is None:
+            self._charge = MetricSeries(self.w.positive_part())
+        return self._charge
+
+    @property
+    def discharge(self) -> MetricSeries:
+        """Discharge power as positive magnitudes."""
+        if self._discharge is None:
+            self._discharge = MetricSeries(self.w.negative_part().negated())
+        return self._discharge
+
+    def adopt(self, previous: "MetricSeries") -> bool:
+        if not super().adopt(previous):
+            return False
+        if isinstance(previous, BatterySeries):
+            if previous._charge is not None:
+                self.charge.adopt(previous._charge)
+            if previous._discharge is not None:
+                self.discharge.adopt(previous._discharge)
+        return True
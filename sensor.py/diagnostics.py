@@ -9,7 +9,11 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from .const import DOMAIN, CONF_HTTP_TOKEN, CONF_DEVICE_SN, CONF_DEVICE_ID
+from .core.api_client import LumentreeHttpApiClient
+from .core.http_session import get_http_pool_metrics
 from .core.mqtt_client import LumentreeMqttClient
+from .services.backfill_jobs import BackfillJobManager
+from .services.cache import YEAR_CACHE
 
 TO_REDACT = {CONF_HTTP_TOKEN, "token", "password", "secret"}
 
@@ -72,12 +76,33 @@ async def async_get_config_entry_diagnostics(
             }
             if hasattr(coord, "update_interval"):
                 coord_status["update_interval"] = str(coord.update_interval)
+            if hasattr(coord, "data_stale"):
+                coord_status["data_stale"] = coord.data_stale
             coordinators_status[coord_key] = coord_status
         else:
             coordinators_status[coord_key] = {"status": "not_available"}
     
     diagnostics_data["coordinators"] = coordinators_status
     
+    # API circuit breaker status
+    api_client = entry_data.get("api_client")
+    if isinstance(api_client, LumentreeHttpApiClient):
+        breaker = api_client.circuit_breaker
+        diagnostics_data["api_circuit"] = {
+            "host": breaker.host,
+            "state": breaker.state,
+            "retry_after": round(breaker.retry_after, 1),
+        }
+    
+    # Connection pool of the dedicated HTTP session
+    diagnostics_data["http_pool"] = get_http_pool_metrics(hass) or {"status": "not_initialized"}
+    diagnostics_data["year_cache"] = YEAR_CACHE.stats()
+    
+    # Checkpoint of the current (or last) backfill job
+    job_manager = entry_data.get("backfill_jobs")
+    if isinstance(job_manager, BackfillJobManager):
+        diagnostics_data["backfill_job"] = job_manager.job or {"status": "none"}
+    
     # Aggregator status (if available)
     aggregator = entry_data.get("aggregator")
     if aggregator:
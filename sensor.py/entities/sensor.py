@@ -91,6 +91,7 @@ from ..const import (
     KEY_TOTAL_CHARGE_KWH,
     KEY_TOTAL_DISCHARGE_KWH,
 )
+from ..core.series import BatterySeries, MetricSeries
 from ..coordinators.daily_coordinator import DailyStatsCoordinator
 from ..coordinators.monthly_coordinator import MonthlyStatsCoordinator
 from ..coordinators.yearly_coordinator import YearlyStatsCoordinator
@@ -928,68 +929,40 @@ class LumentreeDailyStatsSensor(CoordinatorEntity[DailyStatsCoordinator], Sensor
         
         # Map sensor keys to series data keys
         series_mapping = {
-            KEY_DAILY_PV_KWH: {
-                "series_5min_w": "pv_series_5min_w",
-                "series_5min_kwh": "pv_series_5min_kwh",
-                "series_hour_kwh": "pv_series_hour_kwh",
-            },
-            KEY_DAILY_GRID_IN_KWH: {
-                "series_5min_w": "grid_series_5min_w",
-                "series_5min_kwh": "grid_series_5min_kwh",
-                "series_hour_kwh": "grid_series_hour_kwh",
-            },
-            KEY_DAILY_LOAD_KWH: {
-                "series_5min_w": "load_series_5min_w",
-                "series_5min_kwh": "load_series_5min_kwh",
-                "series_hour_kwh": "load_series_hour_kwh",
-            },
-            KEY_DAILY_ESSENTIAL_KWH: {
-                "series_5min_w": "essential_series_5min_w",
-                "series_5min_kwh": "essential_series_5min_kwh",
-                "series_hour_kwh": "essential_series_hour_kwh",
-            },
-            KEY_DAILY_TOTAL_LOAD_KWH: {
-                "series_5min_w": "total_load_series_5min_w",
-                "series_5min_kwh": "total_load_series_5min_kwh",
-                "series_hour_kwh": "total_load_series_hour_kwh",
-            },
-            KEY_DAILY_CHARGE_KWH: {
-                "series_hour_kwh": "battery_charge_series_hour_kwh",
-            },
-            KEY_DAILY_DISCHARGE_KWH: {
-                "series_hour_kwh": "battery_discharge_series_hour_kwh",
-            },
+            KEY_DAILY_PV_KWH: "pv_series",
+            KEY_DAILY_GRID_IN_KWH: "grid_series",
+            KEY_DAILY_LOAD_KWH: "load_series",
+            KEY_DAILY_ESSENTIAL_KWH: "essential_series",
+            KEY_DAILY_TOTAL_LOAD_KWH: "total_load_series",
         }
         
-        # Get mapping for this sensor key
+        # Series are kept as lazy MetricSeries in coordinator data: kWh and
+        # hourly views are computed on first access (memoized for this refresh)
+        # and only turned into plain lists here, at the entity attribute boundary.
         if key in series_mapping:
-            mapping = series_mapping[key]
-            for attr_key, data_key in mapping.items():
-                value = self.coordinator.data.get(data_key)
-                if value is not None:
-                    attrs[attr_key] = value
-            
-            # For battery sensors, also include 5min_w if available (charge/discharge separated)
-            if key in (KEY_DAILY_CHARGE_KWH, KEY_DAILY_DISCHARGE_KWH):
-                battery_series = self.coordinator.data.get("battery_series_5min_w")
-                if battery_series and isinstance(battery_series, list):
-                    # Extract only positive (charge) or negative (discharge) values
-                    # Note: API returns positive = discharge, negative = charge, but api_client inverts it
-                    # After inversion in api_client: positive = charge, negative = discharge
-                    # Charge shows as positive (above 0), Discharge shows as negative (below 0)
-                    if key == KEY_DAILY_CHARGE_KWH:
-                        # Charge: keep positive values (show above 0 on chart)
-                        attrs["series_5min_w"] = [w if w > 0 else 0.0 for w in battery_series]
-                    else:  # discharge
-                        # Discharge: keep negative values (show below 0 on chart)
-                        attrs["series_5min_w"] = [w if w < 0 else 0.0 for w in battery_series]
-                    
-                    # Convert to kWh
-                    if attrs.get("series_5min_w"):
-                        attrs["series_5min_kwh"] = [
-                            round(w * (5.0 / 60.0) / 1000.0, 6) 
-                            for w in attrs["series_5min_w"]
-                        ]
+            series = self.coordinator.data.get(series_mapping[key])
+            if isinstance(series, MetricSeries) and series:
+                attrs["series_5min_w"] = series.w.tolist()
+                attrs["series_5min_kwh"] = series.kwh_5min.tolist()
+                attrs["series_hour_kwh"] = series.hour_kwh.tolist()
+        elif key in (KEY_DAILY_CHARGE_KWH, KEY_DAILY_DISCHARGE_KWH):
+            battery_series = self.coordinator.data.get("battery_series")
+            if isinstance(battery_series, BatterySeries) and battery_series:
+                # Note: API returns positive = discharge, negative = charge, but api_client inverts it
+                # After inversion in api_client: positive = charge, negative = discharge
+                # Charge shows as positive (above 0), Discharge shows as negative (below 0)
+                if key == KEY_DAILY_CHARGE_KWH:
+                    # Charge: keep positive values (show above 0 on chart)
+                    split_w = battery_series.w.positive_part()
+                    attrs["series_hour_kwh"] = battery_series.charge.hour_kwh.tolist()
+                else:  # discharge
+                    # Discharge: keep negative values (show below 0 on chart)
+                    split_w = battery_series.w.negative_part()
+                    attrs["series_hour_kwh"] = battery_series.discharge.hour_kwh.tolist()
+                
+                attrs["series_5min_w"] = split_w.tolist()
+                # Convert to kWh
+                attrs["series_5min_kwh"] = [round(v, 6) for v in split_w.to_kwh()]
         
         # Add source date if available (from coordinator update time or query_date)
         # Try to get from data first, otherwise use current date from coordinator
@@ -1001,6 +974,10 @@ class LumentreeDailyStatsSensor(CoordinatorEntity[DailyStatsCoordinator], Sensor
             timezone = dt_util.get_time_zone(self.coordinator.hass.config.time_zone) or dt_util.get_default_time_zone()
             attrs["source_date"] = dt_util.now(timezone).strftime("%Y-%m-%d")
         
+        # Flag values kept from the last good fetch while the API is unreachable
+        if getattr(self.coordinator, "data_stale", False):
+            attrs["data_stale"] = True
+
         # Add savings data if available (calculated in daily coordinator)
         if "saved_kwh" in self.coordinator.data:
             attrs["saved_kwh"] = self.coordinator.data["saved_kwh"]
@@ -4,6 +4,7 @@ This package contains data models and validation.
 """
 
 __all__ = [
+    "DayResult",
     "DeviceInfo",
     "SensorData",
 ]
@@ -0,0 +1,18 @@
+"""Result model for multi-day statistics fetches."""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass(slots=True)
+class DayResult:
+    """Normalized totals for one day, or the error that prevented fetching it."""
+
+    date: str
+    totals: Optional[Dict[str, float]] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether totals were fetched."""
+        return self.error is None and self.totals is not None
@@ -6,18 +6,58 @@ client, and persists results via services.cache.
 
 from __future__ import annotations
 
-import asyncio
+import calendar
+import contextlib
 import datetime as dt
 import logging
 import time
-from typing import Dict, Any, Optional, Tuple
+from functools import partial
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Any, Iterable, List, Optional, Tuple
 
 from homeassistant.core import HomeAssistant
+from ..const import BACKFILL_CONCURRENCY
 from ..core.api_client import LumentreeHttpApiClient
+from ..core.limiter import RequestPriority
+from ..models.day_result import DayResult
 from . import cache as cache_io
+from . import day_bitmap
+
+if TYPE_CHECKING:
+    from .backfill_jobs import BackfillProgress
 
 _LOGGER = logging.getLogger(__name__)
 
+# Ranges starting within this many days are fetched with RECENT priority
+RECENT_DAYS = 30
+
+# Nightly delta: days this recent are checked against getMonthData, refetched
+# when missing and kept dirty while the server still reports them empty
+DIRTY_WINDOW_DAYS = 7
+# getMonthData and day totals are both rounded to 0.1 kWh
+MONTH_MISMATCH_TOLERANCE = 0.15
+
+# A change to a year cache, applied in place by YearCacheManager.async_apply.
+# Backfills collect these while fetching and apply them in short transactions,
+# so coordinators writing the same year in between are not overwritten.
+YearOp = Callable[[Dict[str, Any]], Any]
+
+
+def _store_day(cache: Dict[str, Any], date_str: str, totals: Dict[str, float]) -> None:
+    """Write a fetched day and advance ``last_backfill_date``."""
+    cache_io.update_daily(cache, date_str, totals)
+    meta = cache.setdefault("meta", {})
+    meta["last_backfill_date"] = max(meta.get("last_backfill_date") or "", date_str)
+
+
+def _store_empty_day(cache: Dict[str, Any], date_str: str, keep_dirty: bool) -> None:
+    """Record a day the server still reports empty (see ``refresh_dirty``)."""
+    if date_str not in cache.get("daily", {}):
+        cache_io.mark_empty(cache, date_str)
+    if keep_dirty:
+        cache_io.mark_dirty(cache, date_str)
+    else:
+        cache_io.clear_dirty(cache, date_str)
+
 
 class StatsAggregator:
     def __init__(self, hass: HomeAssistant, api: LumentreeHttpApiClient, device_id: str) -> None:
@@ -72,7 +112,12 @@ class StatsAggregator:
             _LOGGER.error(f"Error getting year data from API for {year}: {err}")
             return None
 
-    async def smart_backfill(self, max_years: int = 10, optimize_cache: bool = True) -> Dict[str, Any]:
+    async def smart_backfill(
+        self,
+        max_years: int = 10,
+        optimize_cache: bool = True,
+        progress: Optional[BackfillProgress] = None,
+    ) -> Dict[str, Any]:
         """Smart backfill using getYearData/getMonthData APIs for optimal performance.
         
         This is much faster than traditional daily backfill because:
@@ -84,12 +129,13 @@ class StatsAggregator:
         Args:
             max_years: Maximum years to backfill
             optimize_cache: If True, optimize cache after backfill
+            progress: Job progress handle (checkpoints, pause) when run by the job manager
             
         Returns:
             Dictionary with backfill statistics
         """
         from .smart_backfill import smart_backfill
-        return await smart_backfill(self._hass, self, max_years, optimize_cache)
+        return await smart_backfill(self._hass, self, max_years, optimize_cache, progress)
 
     async def get_earliest_data_date(self) -> Dict[str, Any] | None:
         """Get earliest date when device has data.
@@ -120,159 +166,165 @@ class StatsAggregator:
     async def fetch_day(self, date_str: str) -> Dict[str, float]:
         """Fetch a single day and return normalized totals in kWh.
 
-        Returns keys: pv, grid, load, essential, charge, discharge
-        Uses parallel API calls for 3x speed improvement.
+        Returns keys: pv, grid, load, essential, total_load, charge, discharge
+        Waits while the API circuit breaker is open and raises
+        CircuitOpenException rather than returning an all-zero day.
         """
-        # Build params once and call all 3 APIs in parallel
-        params = {"deviceId": self._device_id, "queryDate": date_str}
-        pv, bat, oth = await asyncio.gather(
-            self._api._fetch_pv_data(params),
-            self._api._fetch_battery_data(params),
-            self._api._fetch_other_data(params),
-            return_exceptions=True
+        await self._api.wait_for_circuit()
+        return await self._api.fetch_day_totals(self._device_id, date_str)
+
+    def _fetch_days(
+        self, dates: Iterable[str], priority: RequestPriority, ordered: bool = False
+    ) -> AsyncIterator[DayResult]:
+        """Pipelined multi-day fetch for this device (see LumentreeHttpApiClient.fetch_days)."""
+        return self._api.fetch_days(
+            dates,
+            device_identifier=self._device_id,
+            concurrency=BACKFILL_CONCURRENCY,
+            priority=priority,
+            ordered=ordered,
         )
 
-        # Track API failures for logging
-        api_failures = []
-        
-        # Handle exceptions gracefully
-        if isinstance(pv, Exception):
-            api_failures.append(f"PV: {type(pv).__name__}")
-            pv = {}
-        if isinstance(bat, Exception):
-            api_failures.append(f"Battery: {type(bat).__name__}")
-            bat = {}
-        if isinstance(oth, Exception):
-            api_failures.append(f"Other: {type(oth).__name__}")
-            oth = {}
-
-        # Extract values with fallback to series sums if tableValue is None
-        # PV: prefer tableValue, fallback to pv_sum_kwh from series
-        pv_value = pv.get("pv_today")
-        if pv_value is None and "pv_sum_kwh" in pv:
-            pv_value = pv.get("pv_sum_kwh")
-        pv_final = float(pv_value or 0.0)
-        
-        # Grid
-        grid_value = oth.get("grid_in_today")
-        if grid_value is None and "grid_series_5min_kwh" in oth:
-            grid_series = oth.get("grid_series_5min_kwh", [])
-            if grid_series:
-                grid_value = sum(grid_series)
-        grid_final = float(grid_value or 0.0)
-        
-        # Load and Essential
-        load_value = oth.get("load_today")
-        if load_value is None and "load_series_5min_kwh" in oth:
-            load_series = oth.get("load_series_5min_kwh", [])
-            if load_series:
-                load_value = sum(load_series)
-        load_final = float(load_value or 0.0)
-        
-        essential_value = oth.get("essential_today")
-        if essential_value is None and "essential_series_5min_kwh" in oth:
-            essential_series = oth.get("essential_series_5min_kwh", [])
-            if essential_series:
-                essential_value = sum(essential_series)
-        essential_final = float(essential_value or 0.0)
-        
-        total_load_value = load_final + essential_final
-        
-        # Battery charge/discharge
-        charge_value = float(bat.get("charge_today") or 0.0)
-        discharge_value = float(bat.get("discharge_today") or 0.0)
-        
-        # Log API failures if any
-        if api_failures:
-            _LOGGER.warning(
-                f"API failures for {date_str}: {', '.join(api_failures)}. "
-                f"Values: pv={pv_final:.2f}, grid={grid_final:.2f}, load={load_final:.2f}, "
-                f"essential={essential_final:.2f}, charge={charge_value:.2f}, discharge={discharge_value:.2f}"
-            )
-        
-        return {
-            "pv": pv_final,
-            "grid": grid_final,
-            "load": load_final,
-            "essential": essential_final,
-            "total_load": total_load_value,
-            "charge": charge_value,
-            "discharge": discharge_value,
-        }
+    async def _apply(self, year: int, ops: List[YearOp]) -> None:
+        """Apply buffered changes to a year in one transaction (clears ``ops``)."""
+        await cache_io.YEAR_CACHE.async_apply(self._device_id, year, ops)
+
+    async def _checkpoint(self, progress: BackfillProgress, year: int, ops: List[YearOp]) -> None:
+        """Apply and write the year's pending changes, then save the job checkpoint (blocks while the job is paused)."""
+        await self._apply(year, ops)
+        # The cursor may only move past days that are on disk
+        await cache_io.YEAR_CACHE.async_flush(self._device_id)
+        await progress.checkpoint()
 
     async def backfill_days(self, since: dt.date, until: dt.date) -> None:
         """Backfill inclusive date range with optimized batch cache I/O.
 
         Groups days by year and performs batch cache operations for better performance.
-        Uses adaptive delay with exponential backoff on rate limits.
+        Missing days are fetched concurrently through the client's multi-day fetch.
         """
-        # Group days by year for batch processing
-        days_by_year: Dict[int, list[dt.date]] = {}
-        day = since
-        while day <= until:
-            year = day.year
-            if year not in days_by_year:
-                days_by_year[year] = []
-            days_by_year[year].append(day)
-            day += dt.timedelta(days=1)
+        # Recent ranges (nightly delta) go ahead of historical backfill
+        priority = (
+            RequestPriority.RECENT
+            if (dt.date.today() - since).days <= RECENT_DAYS
+            else RequestPriority.HISTORY
+        )
 
         # Process each year's cache once
-        base_delay = 0.2
-        delay = base_delay
-        for year, days in days_by_year.items():
-            # Load cache once per year
+        for year in range(since.year, until.year + 1):
+            # Load cache once per year (snapshot to pick the missing days)
             cache = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
-            cache_dirty = False
+            ops: List[YearOp] = []
 
-            for day in days:
-                date_str = day.strftime("%Y-%m-%d")
-                
-                # Skip if already exists in daily cache
-                # Since server always returns same structure (0s when no data),
-                # we store ALL days in daily cache
-                if date_str in cache.get("daily", {}):
-                    continue
+            # Skip if already exists in daily cache
+            # Since server always returns same structure (0s when no data),
+            # we store ALL days in daily cache
+            missing = day_bitmap.missing(year, cache_io.data_bitmap(cache, year), since, until)
 
-                try:
-                    vals = await self.fetch_day(date_str)
+            async with contextlib.aclosing(self._fetch_days(missing, priority)) as results:
+                async for result in results:
+                    if not result.ok:
+                        _LOGGER.debug(f"Error fetching {result.date}: {result.error}")
+                        continue
                     # Store all days in cache, even if all values are 0
                     # This matches server behavior (always returns same structure)
-                    cache, _m, _ = cache_io.update_daily(cache, date_str, vals)
-                    cache.setdefault("meta", {})["last_backfill_date"] = date_str
-                    cache_dirty = True
-                    
-                    # Reset delay on success
-                    delay = base_delay
-                    
-                except Exception as err:
-                    # Exponential backoff on errors (likely rate limit)
-                    delay = min(delay * 2, 5.0)  # Cap at 5 seconds
-                    # Continue to next day
-                    continue
-                
-                # Polite delay between API calls
-                await asyncio.sleep(delay)
+                    ops.append(partial(_store_day, date_str=result.date, totals=result.totals))
 
-            # Save cache once per year if modified
-            if cache_dirty:
-                await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, year, cache)
+            # Apply once per year if modified
+            await self._apply(year, ops)
 
     async def backfill_last_n_days(self, days: int) -> None:
         today = dt.date.today()
         start = today - dt.timedelta(days=days - 1)
         await self.backfill_days(start, today)
 
+    async def mark_dirty(self, date_str: str) -> None:
+        """Add a day to the dirty window so the nightly delta refreshes it."""
+        year = int(date_str[:4])
+        async with cache_io.YEAR_CACHE.year(self._device_id, year) as tx:
+            cache_io.mark_dirty(tx.data, date_str)
+
+    async def refresh_dirty(self) -> Dict[str, int]:
+        """Nightly delta: refresh only the days in the dirty window.
+
+        Dirty days are days written before they were over, days of the last
+        ``DIRTY_WINDOW_DAYS`` that are missing or still reported empty, and
+        recent days whose getMonthData values disagree with the cache. The
+        cost is one getMonthData per month of the window plus one day fetch
+        per dirty day, instead of a full year scan.
+
+        Returns:
+            Statistics: dirty, refreshed, empty, errors, months_checked
+        """
+        today = dt.date.today()
+        window_start = today - dt.timedelta(days=DIRTY_WINDOW_DAYS)
+        window_str = window_start.isoformat()
+        caches: Dict[int, Dict[str, Any]] = {}
+        for year in range(window_start.year, today.year + 1):
+            caches[year] = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
+
+        dirty = {d for cache in caches.values() for d in cache_io.dirty_dates(cache)}
+
+        # Recent days never saved (e.g. Home Assistant was down at midnight)
+        for year, cache in caches.items():
+            dirty.update(day_bitmap.missing(year, cache_io.data_bitmap(cache, year), window_start, today))
+
+        months = sorted({(window_start.year, window_start.month), (today.year, today.month)})
+        for year, month in months:
+            try:
+                month_data = await self._api.get_month_data(self._device_id, year, month)
+            except Exception as err:
+                _LOGGER.debug(f"Month check {year}-{month:02d} skipped: {err}")
+                continue
+            dirty.update(_month_mismatches(caches[year], year, month, month_data, window_str))
+
+        stats = {"dirty": len(dirty), "refreshed": 0, "empty": 0, "errors": 0, "months_checked": len(months)}
+        ops: Dict[int, List[YearOp]] = {}
+        async with contextlib.aclosing(self._fetch_days(sorted(dirty), RequestPriority.RECENT)) as results:
+            async for result in results:
+                year_ops = ops.setdefault(int(result.date[:4]), [])
+                if not result.ok:
+                    _LOGGER.debug(f"Error refreshing {result.date}: {result.error}")
+                    stats["errors"] += 1
+                    year_ops.append(partial(cache_io.mark_dirty, date_str=result.date))
+                elif all(abs(v) < 1e-6 for v in result.totals.values()):
+                    stats["empty"] += 1
+                    # The server may still deliver the day; give up once it leaves the window
+                    year_ops.append(
+                        partial(_store_empty_day, date_str=result.date, keep_dirty=result.date >= window_str)
+                    )
+                else:
+                    stats["refreshed"] += 1
+                    year_ops.append(partial(_store_day, date_str=result.date, totals=result.totals))
+
+        for year in sorted(ops):
+            await self._apply(year, ops[year])
+        return stats
+
     async def summarize_month(self, year: int, month: int) -> Dict[str, float]:
+        # A slice of the mapped year store; legacy JSON years are loaded in full
+        totals = await self._hass.async_add_executor_job(
+            cache_io.read_month_totals, self._device_id, year, month
+        )
+        if totals is not None:
+            return totals
         # Auto-recompute aggregates if needed when loading cache
         c = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year, True)
         return cache_io.summarize_month(c, month)
 
     async def summarize_year(self, year: int) -> Dict[str, float]:
+        totals = await self._hass.async_add_executor_job(cache_io.read_year_totals, self._device_id, year)
+        if totals is not None:
+            return totals
         # Auto-recompute aggregates if needed when loading cache
         c = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year, True)
         return cache_io.summarize_year(c)
 
-    async def backfill_all(self, max_years: int | None = 5, empty_streak: int = 14) -> None:
+    async def backfill_all(
+        self,
+        max_years: int | None = 5,
+        empty_streak: int = 14,
+        progress: Optional[BackfillProgress] = None,
+    ) -> None:
         """Backfill toàn bộ lịch sử lùi theo ngày với batch cache I/O.
 
         - Nếu `max_years` được chỉ định: quét đủ số năm đó, KHÔNG dừng vì empty_streak
@@ -282,27 +334,23 @@ class StatsAggregator:
         Args:
             max_years: Tối đa số năm cần quét (mặc định 5). None = không giới hạn, chỉ dừng theo empty_streak
             empty_streak: Số ngày liên tiếp không có dữ liệu để dừng (chỉ áp dụng khi max_years=None)
+            progress: Job progress handle (checkpoints, pause) when run by the job manager
         
-        Uses optimized batch processing per year.
+        Uses optimized batch processing per year; missing days of a year are
+        fetched concurrently and applied newest → oldest.
         """
         start_time = time.time()
         today = dt.date.today()
         empty = 0
-        base_delay = 0.1  # Reduced from 0.2s for better performance
-        delay = base_delay
         
         # Statistics tracking
         total_fetched = 0
         total_empty = 0
         total_skipped = 0
         total_errors = 0
-        days_in_current_year = 0
         stop_reason = None
-        
-        # Track current year cache
-        current_year = None
-        cache = None
         last_progress_log = 0
+        prev_date: Optional[dt.date] = None
 
         # Calculate limit_days: None means unlimited (only stop by empty_streak)
         # If max_years is specified, ignore empty_streak and always complete the years
@@ -315,120 +363,103 @@ class StatsAggregator:
         else:
             limit_days = max_years * 366
             limit_info = f"{max_years} years ({limit_days} days, ignoring empty_streak)"
+        oldest = today - dt.timedelta(days=limit_days - 1)
 
         _LOGGER.info(
             f"Backfill started: device_id={self._device_id}, max_years={max_years}, "
-            f"limit={limit_info}, empty_streak={empty_streak if not ignore_empty_streak else 'ignored'}, delay={base_delay}s"
+            f"limit={limit_info}, empty_streak={empty_streak if not ignore_empty_streak else 'ignored'}, "
+            f"concurrency={BACKFILL_CONCURRENCY}"
         )
 
-        for i in range(limit_days):
-            day = today - dt.timedelta(days=i)
-            date_str = day.strftime("%Y-%m-%d")
-            year = day.year
-
-            # Load cache when year changes
-            if year != current_year:
-                if cache is not None and current_year is not None:
-                    # Save previous year's cache
-                    await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, current_year, cache)
-                    _LOGGER.info(
-                        f"Year {current_year} completed: fetched {days_in_current_year} days. "
-                        f"Total progress: {total_fetched} fetched, {total_empty} empty, {total_skipped} skipped"
-                    )
-                
-                cache = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
-                current_year = year
-                days_in_current_year = 0
-                _LOGGER.info(f"Processing year {year}...")
+        for year in range(today.year, oldest.year - 1, -1):
+            year_end = min(today, dt.date(year, 12, 31))
+            year_start = max(oldest, dt.date(year, 1, 1))
+            cache = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
+            days_in_current_year = 0
+            ops: List[YearOp] = []
 
-            # Skip if already exists in daily data
+            # Newest → oldest; cached days are skipped
             # Since server always returns same structure (0s when no data),
-            # we store ALL days in daily cache, so we only skip if already cached
-            if date_str in cache.get("daily", {}):
-                empty = 0
-                total_skipped += 1
-                continue
-
-            # Progress logging every 50 days
-            if total_fetched > 0 and total_fetched % 50 == 0 and total_fetched != last_progress_log:
-                elapsed = time.time() - start_time
-                _LOGGER.info(
-                    f"Progress: {total_fetched} days fetched, {total_empty} empty, "
-                    f"currently at {date_str} (elapsed: {elapsed:.1f}s)"
-                )
-                last_progress_log = total_fetched
-
-            try:
-                vals = await self.fetch_day(date_str)
-                
-                # Since server always returns same structure (0s when no data),
-                # we store ALL days in daily cache, even if all values are 0.
-                # This simplifies logic and allows easy re-checking later.
-                empty = 0  # Reset empty streak when we have a response (even if all zeros)
-                cache, _m, _ = cache_io.update_daily(cache, date_str, vals)
-                cache.setdefault("meta", {})["last_backfill_date"] = date_str
-                total_fetched += 1
-                days_in_current_year += 1
-                
-                # Check if day has meaningful data (for statistics only)
-                has_data = any(abs(vals.get(k, 0.0)) > 0.001 for k in ("pv", "grid", "load", "essential", "charge", "discharge"))
-                if not has_data:
-                    total_empty += 1
-                    
-                # For empty_streak stopping (only in unlimited mode), track consecutive empty days
-                if not ignore_empty_streak:
-                    if not has_data:
-                        empty += 1
-                        # Log empty streak progress
-                        if empty % 5 == 0:
-                            _LOGGER.info(f"Empty streak: {empty}/{empty_streak} consecutive empty days at {date_str}")
-                        
-                        if empty >= empty_streak:
-                            stop_reason = f"empty_streak ({empty} consecutive empty days)"
-                            _LOGGER.info(
-                                f"Backfill stopping: reached {empty_streak} consecutive empty days at {date_str}. "
-                                f"This indicates we've reached the beginning of inverter usage history. "
-                                f"Total fetched: {total_fetched} days, empty: {total_empty} days"
-                            )
-                            # Save before breaking
-                            await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, year, cache)
-                            break
-                    else:
+            # we store ALL days in daily cache, so we only skip if already cached.
+            # Confirmed-empty days are fetched again: they count towards empty_streak
+            cached = cache_io.data_bitmap(cache, year)
+            total_skipped += day_bitmap.count(cached & day_bitmap.span(year, year_start, year_end))
+            missing = day_bitmap.missing(year, cached, year_start, year_end, newest_first=True)
+
+            # Closed on every exit (empty streak, cancellation), which cancels the days in flight
+            fetches = self._fetch_days(missing, RequestPriority.HISTORY, ordered=True)
+            async with contextlib.aclosing(fetches) as results:
+                async for result in results:
+                    current = dt.date.fromisoformat(result.date)
+                    # A cached day between two fetched days resets the empty streak
+                    if prev_date is not None and (prev_date - current).days > 1:
                         empty = 0
-                
-                # Reset delay on success
-                if delay > base_delay:
-                    _LOGGER.info(f"Resetting delay to {base_delay}s after successful fetch")
-                delay = base_delay
-                
-            except Exception as err:
-                total_errors += 1
-                # Exponential backoff on errors (likely rate limit)
-                old_delay = delay
-                delay = min(delay * 2, 5.0)  # Cap at 5 seconds
-                if delay > old_delay:
-                    _LOGGER.warning(
-                        f"Error fetching {date_str}: {err}. Increasing delay to {delay}s "
-                        f"(total errors: {total_errors})"
-                    )
-                else:
-                    _LOGGER.error(f"Error fetching {date_str}: {err}")
-                continue
+                    prev_date = current
 
-            await asyncio.sleep(delay)
+                    if not result.ok:
+                        total_errors += 1
+                        _LOGGER.warning(f"Error fetching {result.date}: {result.error} (total errors: {total_errors})")
+                        if progress is not None:
+                            progress.record_error(f"{result.date}: {result.error}")
+                        continue
 
-        # Check if we hit the limit
-        if stop_reason is None:
-            stop_reason = f"limit_days reached ({limit_days} days)"
+                    vals = result.totals
+                    # Since server always returns same structure (0s when no data),
+                    # we store ALL days in daily cache, even if all values are 0.
+                    # This simplifies logic and allows easy re-checking later.
+                    ops.append(partial(_store_day, date_str=result.date, totals=vals))
+                    total_fetched += 1
+                    days_in_current_year += 1
+                    if progress is not None:
+                        progress.update(result.date, fetched=1)
+                        if progress.checkpoint_due:
+                            await self._checkpoint(progress, year, ops)
+
+                    # Progress logging every 50 days
+                    if total_fetched % 50 == 0 and total_fetched != last_progress_log:
+                        elapsed = time.time() - start_time
+                        _LOGGER.info(
+                            f"Progress: {total_fetched} days fetched, {total_empty} empty, "
+                            f"currently at {result.date} (elapsed: {elapsed:.1f}s)"
+                        )
+                        last_progress_log = total_fetched
+
+                    # Check if day has meaningful data (for statistics only)
+                    has_data = any(abs(vals.get(k, 0.0)) > 0.001 for k in ("pv", "grid", "load", "essential", "charge", "discharge"))
+                    if not has_data:
+                        total_empty += 1
+
+                    # For empty_streak stopping (only in unlimited mode), track consecutive empty days
+                    if not ignore_empty_streak:
+                        if not has_data:
+                            empty += 1
+                            # Log empty streak progress
+                            if empty % 5 == 0:
+                                _LOGGER.info(f"Empty streak: {empty}/{empty_streak} consecutive empty days at {result.date}")
+
+                            if empty >= empty_streak:
+                                stop_reason = f"empty_streak ({empty} consecutive empty days)"
+                                _LOGGER.info(
+                                    f"Backfill stopping: reached {empty_streak} consecutive empty days at {result.date}. "
+                                    f"This indicates we've reached the beginning of inverter usage history. "
+                                    f"Total fetched: {total_fetched} days, empty: {total_empty} days"
+                                )
+                                break
+                        else:
+                            empty = 0
 
-        # Save final year's cache if needed
-        if cache is not None and current_year is not None:
             if days_in_current_year > 0:
+                await self._apply(year, ops)
                 _LOGGER.info(
-                    f"Year {current_year} completed: fetched {days_in_current_year} days. "
+                    f"Year {year} completed: fetched {days_in_current_year} days. "
                     f"Total progress: {total_fetched} fetched, {total_empty} empty, {total_skipped} skipped"
                 )
-            await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, current_year, cache)
+            if stop_reason is not None:
+                break
+
+        # Check if we hit the limit
+        if stop_reason is None:
+            stop_reason = f"limit_days reached ({limit_days} days)"
 
         # Final summary
         elapsed_time = time.time() - start_time
@@ -439,19 +470,24 @@ class StatsAggregator:
             f"elapsed={elapsed_time:.1f}s ({elapsed_time/60:.1f} minutes)"
         )
 
-    async def backfill_gaps(self, max_years: int = 3, max_days_per_run: int = 60) -> int:
+    async def backfill_gaps(
+        self,
+        max_years: int = 3,
+        max_days_per_run: int = 60,
+        progress: Optional[BackfillProgress] = None,
+    ) -> int:
         """Lấp các ngày còn thiếu trong cache theo từng năm với batch I/O.
 
         - max_years: số năm gần nhất để kiểm tra (tính từ năm hiện tại lùi lại)
         - max_days_per_run: giới hạn số ngày được fetch trong một lần chạy
+        - progress: job progress handle khi chạy qua job manager (checkpoint, pause)
 
         Trả về số ngày đã lấp.
-        Uses optimized batch cache operations.
+        Uses optimized batch cache operations and concurrent day fetches.
         """
         today = dt.date.today()
-        filled = 0
-        base_delay = 0.2
-        delay = base_delay
+        # A resumed job keeps counting against the same budget
+        filled = progress.count("filled") if progress is not None else 0
         
         for year_offset in range(max_years):
             if filled >= max_days_per_run:
@@ -464,47 +500,47 @@ class StatsAggregator:
             if year == today.year:
                 end_date = today
 
-            # Load cache once per year
+            # Load cache once per year (snapshot to pick the missing days)
             cache_year = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
-            cache_dirty = False
+            ops: List[YearOp] = []
+
+            # Skip days already in daily cache (server always returns same structure,
+            # we store ALL days even with 0s) and confirmed-empty days, which
+            # backfill_empty_dates re-checks
+            missing = day_bitmap.missing(
+                year,
+                cache_io.known_bitmap(cache_year, year),
+                start_date,
+                end_date,
+                limit=max_days_per_run - filled,
+            )
 
-            day = start_date
-            while day <= end_date:
-                if filled >= max_days_per_run:
-                    # Save before breaking
-                    if cache_dirty:
-                        await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, year, cache_year)
-                    return filled
-                    
-                date_str = day.strftime("%Y-%m-%d")
-                # Skip if already exists in daily cache
-                # Since server always returns same structure, we store ALL days (even with 0s)
-                if date_str not in cache_year.get("daily", {}):
-                    try:
-                        vals = await self.fetch_day(date_str)
-                        # Store all days in cache, even if all values are 0
-                        cache_year, _m, _ = cache_io.update_daily(cache_year, date_str, vals)
-                        cache_year.setdefault("meta", {})["last_backfill_date"] = date_str
-                        cache_dirty = True
-                        filled += 1
-                        delay = base_delay  # Reset on success
-                            
-                    except Exception as err:
-                        # Exponential backoff on errors
-                        delay = min(delay * 2, 5.0)  # Cap at 5 seconds
+            priority = RequestPriority.RECENT if year_offset == 0 else RequestPriority.HISTORY
+            async with contextlib.aclosing(self._fetch_days(missing, priority)) as results:
+                async for result in results:
+                    if not result.ok:
+                        if progress is not None:
+                            progress.record_error(f"{result.date}: {result.error}")
                         continue
-                    
-                    await asyncio.sleep(delay)
-                    
-                day += dt.timedelta(days=1)
+                    # Store all days in cache, even if all values are 0
+                    ops.append(partial(_store_day, date_str=result.date, totals=result.totals))
+                    filled += 1
+                    if progress is not None:
+                        progress.update(result.date, filled=1)
+                        if progress.checkpoint_due:
+                            await self._checkpoint(progress, year, ops)
 
-            # Save cache once per year if modified
-            if cache_dirty:
-                await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, year, cache_year)
+            # Apply once per year if modified
+            await self._apply(year, ops)
 
         return filled
 
-    async def backfill_empty_dates(self, max_years: int = 5, max_days_per_run: int = 100) -> Dict[str, int]:
+    async def backfill_empty_dates(
+        self,
+        max_years: int = 5,
+        max_days_per_run: int = 100,
+        progress: Optional[BackfillProgress] = None,
+    ) -> Dict[str, int]:
         """Backfill lại các ngày đã bị đánh dấu empty để kiểm tra lại với logic mới.
         
         Hữu ích sau khi cải thiện logic fetch/parse để phát hiện các ngày bị đánh dấu
@@ -513,18 +549,25 @@ class StatsAggregator:
         Args:
             max_years: Số năm gần nhất để kiểm tra (tính từ năm hiện tại lùi lại)
             max_days_per_run: Giới hạn số ngày được fetch trong một lần chạy
+            progress: Job progress handle (checkpoints, pause) when run by the job manager
             
         Returns:
             Dictionary với statistics: {"recovered": N, "confirmed_empty": M, "errors": K}
         """
         start_time = time.time()
         today = dt.date.today()
-        base_delay = 0.1
-        delay = base_delay
         
         recovered = 0
         confirmed_empty = 0
         total_errors = 0
+        # Confirmed-empty days stay in the empty bitmap, so a resumed job skips
+        # everything up to its cursor (years newest first, dates ascending)
+        resume_after: Optional[str] = None
+        if progress is not None:
+            recovered = progress.count("recovered")
+            confirmed_empty = progress.count("confirmed_empty")
+            total_errors = progress.count("errors")
+            resume_after = progress.cursor
         
         _LOGGER.info(
             f"Starting backfill_empty_dates: device_id={self._device_id}, "
@@ -536,10 +579,16 @@ class StatsAggregator:
         for year_offset in range(max_years):
             year = today.year - year_offset
             cache = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
-            empty_dates = cache.get("meta", {}).get("empty_dates", [])
-            if empty_dates:
-                empty_dates_by_year[year] = sorted(empty_dates)
-                _LOGGER.info(f"Found {len(empty_dates)} empty dates in year {year}")
+            empty_bits = cache_io.empty_bitmap(cache)
+            if resume_after is not None:
+                resume_year = int(resume_after[:4])
+                if year > resume_year:
+                    continue
+                if year == resume_year:
+                    empty_bits &= ~day_bitmap.span(year, dt.date(year, 1, 1), dt.date.fromisoformat(resume_after))
+            if empty_bits:
+                empty_dates_by_year[year] = day_bitmap.to_dates(year, empty_bits)
+                _LOGGER.info(f"Found {day_bitmap.count(empty_bits)} empty dates in year {year}")
         
         total_empty = sum(len(dates) for dates in empty_dates_by_year.values())
         _LOGGER.info(f"Total empty dates to re-check: {total_empty}")
@@ -550,20 +599,34 @@ class StatsAggregator:
         
         # Process each year
         for year, empty_dates in empty_dates_by_year.items():
-            if recovered + confirmed_empty >= max_days_per_run:
+            budget = max_days_per_run - (recovered + confirmed_empty)
+            if budget <= 0:
                 _LOGGER.info(f"Reached max_days_per_run limit ({max_days_per_run}), stopping")
                 break
             
+            # Local copy for the log messages; changes are applied through ops
             cache = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
+            ops: List[YearOp] = []
             cache_dirty = False
             
-            for date_str in empty_dates:
-                if recovered + confirmed_empty >= max_days_per_run:
-                    break
-                
-                try:
-                    _LOGGER.debug(f"Re-checking empty date: {date_str}")
-                    vals = await self.fetch_day(date_str)
+            fetches = self._fetch_days(empty_dates[:budget], RequestPriority.HISTORY, ordered=progress is not None)
+            async with contextlib.aclosing(fetches) as results:
+                async for result in results:
+                    date_str = result.date
+                    if progress is not None:
+                        # Checkpoint before applying this day so the cursor matches the saved cache
+                        if progress.checkpoint_due:
+                            await self._checkpoint(progress, year, ops)
+                        progress.update(date_str)
+                    if not result.ok:
+                        total_errors += 1
+                        _LOGGER.warning(
+                            f"Error re-checking {date_str}: {result.error} (total errors: {total_errors})"
+                        )
+                        if progress is not None:
+                            progress.record_error(f"{date_str}: {result.error}")
+                        continue
+                    vals = result.totals
                     
                     # Check with improved logic
                     has_data = any(abs(vals.get(k, 0.0)) > 0.001 for k in ("pv", "grid", "load", "essential", "charge", "discharge"))
@@ -571,14 +634,16 @@ class StatsAggregator:
                     if has_data:
                         # Has data - recover it!
                         # Check if it was in empty_dates before
-                        was_empty = date_str in cache.get("meta", {}).get("empty_dates", [])
-                        cache, _m, _ = cache_io.update_daily(cache, date_str, vals)
-                        cache.setdefault("meta", {})["last_backfill_date"] = date_str
+                        was_empty = cache_io.is_confirmed_empty(cache, date_str)
+                        _store_day(cache, date_str, vals)
+                        ops.append(partial(_store_day, date_str=date_str, totals=vals))
                         cache_dirty = True
                         recovered += 1
+                        if progress is not None:
+                            progress.update(recovered=1)
                         
                         # Verify it was removed from empty_dates
-                        still_empty = date_str in cache.get("meta", {}).get("empty_dates", [])
+                        still_empty = cache_io.is_confirmed_empty(cache, date_str)
                         if was_empty and still_empty:
                             _LOGGER.warning(f"WARNING: {date_str} still in empty_dates after recovery!")
                         elif was_empty:
@@ -590,37 +655,22 @@ class StatsAggregator:
                             f"essential={vals.get('essential', 0.0):.2f}, "
                             f"charge={vals.get('charge', 0.0):.2f}, discharge={vals.get('discharge', 0.0):.2f}"
                         )
-                        delay = base_delay  # Reset on success
                     else:
                         # Still empty - confirm it
                         confirmed_empty += 1
+                        if progress is not None:
+                            progress.update(confirmed_empty=1)
                         _LOGGER.debug(
                             f"Confirmed empty {date_str}: all values < 0.001 kWh. "
                             f"Values: pv={vals.get('pv', 0.0):.4f}, grid={vals.get('grid', 0.0):.4f}, "
                             f"load={vals.get('load', 0.0):.4f}, essential={vals.get('essential', 0.0):.4f}, "
                             f"charge={vals.get('charge', 0.0):.4f}, discharge={vals.get('discharge', 0.0):.4f}"
                         )
-                        delay = base_delay
-                    
-                except Exception as err:
-                    total_errors += 1
-                    old_delay = delay
-                    delay = min(delay * 2, 5.0)
-                    if delay > old_delay:
-                        _LOGGER.warning(
-                            f"Error re-checking {date_str}: {err}. Increasing delay to {delay}s "
-                            f"(total errors: {total_errors})"
-                        )
-                    else:
-                        _LOGGER.error(f"Error re-checking {date_str}: {err}")
-                    continue
-                
-                await asyncio.sleep(delay)
             
             # Save cache if modified
             if cache_dirty:
-                await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, year, cache)
-                remaining_empty = len(cache.get("meta", {}).get("empty_dates", []))
+                await self._apply(year, ops)
+                remaining_empty = day_bitmap.count(cache_io.empty_bitmap(cache))
                 _LOGGER.info(
                     f"Saved cache for year {year}: recovered {recovered} days so far. "
                     f"Remaining empty dates in {year}: {remaining_empty}"
@@ -641,3 +691,21 @@ class StatsAggregator:
         return result
 
 
+def _month_mismatches(
+    cache: Dict[str, Any], year: int, month: int, month_data: Dict[str, Any], since: str
+) -> set[str]:
+    """Finished days from ``since`` whose getMonthData values disagree with the cache."""
+    today_str = dt.date.today().isoformat()
+    daily = cache.get("daily", {})
+    days_in_month = calendar.monthrange(year, month)[1]
+    mismatches: set[str] = set()
+    for api_key, cache_key in (("pv", "pv"), ("grid", "grid"), ("homeload", "load")):
+        for idx, api_value in enumerate((month_data.get(api_key) or [])[:days_in_month]):
+            date_str = f"{year}-{month:02d}-{idx + 1:02d}"
+            if date_str < since or date_str >= today_str or date_str in mismatches:
+                continue
+            cached = daily.get(date_str)
+            cached_value = float(cached.get(cache_key, 0.0)) if cached else 0.0
+            if abs(float(api_value) - cached_value) > MONTH_MISMATCH_TOLERANCE:
+                mismatches.add(date_str)
+    return mismatches
@@ -0,0 +1,94 @@
+"""Crash-safe file writes for the statistics cache.
+
+A file is written to a temporary file in the same directory, fsynced and
+moved over the target with ``os.replace``; the directory is fsynced
+afterwards so the rename itself survives a power loss. Readers therefore
+see either the old or the new file, never a truncated one.
+
+Directory syncs can be batched: write several files with ``sync_dir=False``
+and call ``fsync_dir`` once per directory.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+TEMP_SUFFIX = ".tmp"
+QUARANTINE_SUFFIX = ".corrupt"
+
+
+def fsync_dir(path: str) -> None:
+    """Persist renames in a directory (skipped where directories cannot be opened)."""
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: str, payload: bytes, sync_dir: bool = True) -> None:
+    """Replace ``path`` with ``payload`` atomically.
+
+    Raises:
+        OSError: The write failed; the previous file is left untouched
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=TEMP_SUFFIX, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if sync_dir:
+        fsync_dir(directory)
+
+
+def quarantine(path: str) -> Optional[str]:
+    """Move an unreadable file aside (kept for inspection, never overwritten).
+
+    Returns:
+        New path, or None if the file could not be moved
+    """
+    target = f"{path}{QUARANTINE_SUFFIX}-{time.strftime('%Y%m%d%H%M%S')}"
+    try:
+        os.replace(path, target)
+    except OSError as err:
+        _LOGGER.error(f"Failed to quarantine {path}: {err}")
+        return None
+    _LOGGER.error(f"Quarantined unreadable cache file {path} as {target}")
+    return target
+
+
+def remove_stale_temp_files(directory: str) -> int:
+    """Delete temporary files left behind by writes interrupted by a crash."""
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        if name.startswith(".") and name.endswith(TEMP_SUFFIX):
+            try:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
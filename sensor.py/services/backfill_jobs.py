@@ -0,0 +1,296 @@
+"""Resumable backfill jobs with checkpoints in HA storage.
+
+Long backfills (``backfill_all``, ``smart_backfill``, ``backfill_gaps``,
+``backfill_empty_dates``) run as one supervised job per device. The job's
+mode, parameters, cursor, counters and recent errors are saved to
+``.storage`` at checkpoints, so a run interrupted by a restart resumes
+automatically: cached days are skipped, so re-running the mode continues
+where the year caches left off. Progress is fired as an event on every
+checkpoint and the job can be paused, resumed and cancelled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from ..const import DOMAIN
+from ..core.limiter import JOB_LIMITER, RequestPriority, request_priority
+
+if TYPE_CHECKING:
+    from .aggregator import StatsAggregator
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY_FORMAT = f"{DOMAIN}.backfill_job.{{device_id}}"
+
+EVENT_BACKFILL_PROGRESS = f"{DOMAIN}_backfill_progress"
+
+JOB_MODES = ("backfill_all", "smart_backfill", "backfill_gaps", "backfill_empty_dates")
+# Gap filling starts with the current year; the others walk back through history
+JOB_PRIORITIES = {"backfill_gaps": RequestPriority.RECENT}
+
+STATUS_RUNNING = "running"
+STATUS_PAUSED = "paused"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+ACTIVE_STATUSES = (STATUS_RUNNING, STATUS_PAUSED)
+
+CHECKPOINT_INTERVAL = 30.0  # seconds between persisted checkpoints
+MAX_STORED_ERRORS = 10
+
+
+class BackfillProgress:
+    """Handle passed to a backfill method to report progress and honour pause."""
+
+    __slots__ = ("_manager", "_job", "_last_checkpoint")
+
+    def __init__(self, manager: "BackfillJobManager", job: Dict[str, Any]) -> None:
+        self._manager = manager
+        self._job = job
+        self._last_checkpoint = time.monotonic()
+
+    @property
+    def cursor(self) -> Optional[str]:
+        """Last position reported by the job (date or year-month)."""
+        return self._job.get("cursor")
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """Mode-specific resume state, persisted with the checkpoint."""
+        return self._job.setdefault("state", {})
+
+    def count(self, key: str) -> int:
+        """Current value of a job counter."""
+        return self._job["counters"].get(key, 0)
+
+    def update(self, cursor: Optional[str] = None, **counts: int) -> None:
+        """Advance the cursor and add to the job counters."""
+        if cursor is not None:
+            self._job["cursor"] = cursor
+        counters = self._job["counters"]
+        for key, value in counts.items():
+            counters[key] = counters.get(key, 0) + value
+
+    def record_error(self, message: str) -> None:
+        """Count an error and keep its message (most recent only)."""
+        self.update(errors=1)
+        errors: List[str] = self._job["errors"]
+        errors.append(message)
+        del errors[:-MAX_STORED_ERRORS]
+
+    @property
+    def checkpoint_due(self) -> bool:
+        """True when the caller should persist its work and call ``checkpoint``."""
+        return (
+            self._job["status"] == STATUS_PAUSED
+            or time.monotonic() - self._last_checkpoint >= CHECKPOINT_INTERVAL
+        )
+
+    async def checkpoint(self) -> None:
+        """Persist the job state; blocks here while the job is paused.
+
+        Callers save their year cache first, so everything up to the
+        cursor survives a restart.
+        """
+        self._last_checkpoint = time.monotonic()
+        await self._manager.async_checkpoint()
+        await self._manager.wait_resumed()
+
+
+class BackfillJobManager:
+    """Runs at most one backfill job per device and keeps its checkpoint."""
+
+    def __init__(self, hass: HomeAssistant, aggregator: "StatsAggregator", device_id: str) -> None:
+        self._hass = hass
+        self._aggregator = aggregator
+        self._device_id = device_id
+        self._store: Store[Dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY_FORMAT.format(device_id=device_id)
+        )
+        self._job: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._job_priority = RequestPriority.HISTORY
+        self._holds_job_slot = False
+
+    @property
+    def job(self) -> Optional[Dict[str, Any]]:
+        """Current (or last) job record."""
+        return self._job
+
+    @property
+    def is_active(self) -> bool:
+        return self._job is not None and self._job["status"] in ACTIVE_STATUSES
+
+    async def async_load(self) -> None:
+        """Load the stored job; an interrupted running job is resumed by ``async_resume_interrupted``."""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.warning(f"Failed to load backfill checkpoint for {self._device_id}: {err}")
+            return
+        if isinstance(data, dict) and data.get("mode") in JOB_MODES:
+            self._job = data
+            if data["status"] == STATUS_PAUSED:
+                self._resumed.clear()
+
+    def async_resume_interrupted(self) -> bool:
+        """Restart a job that was running when Home Assistant stopped."""
+        if self._job is None or self._job["status"] != STATUS_RUNNING or self._task is not None:
+            return False
+        _LOGGER.info(
+            f"Resuming {self._job['mode']} backfill for {self._device_id} "
+            f"from checkpoint (cursor={self._job.get('cursor')})"
+        )
+        self._job["resumed"] = self._job.get("resumed", 0) + 1
+        self._start_task()
+        return True
+
+    async def async_start(self, mode: str, **params: Any) -> bool:
+        """Start a new job unless one is already active.
+
+        Returns:
+            False if another job is running or paused
+        """
+        if mode not in JOB_MODES:
+            raise ValueError(f"Unknown backfill mode: {mode}")
+        if self.is_active:
+            _LOGGER.warning(
+                f"Backfill {self._job['mode']} already {self._job['status']} for {self._device_id}; "
+                f"cancel it before starting {mode}"
+            )
+            return False
+        now = time.time()
+        self._job = {
+            "mode": mode,
+            "params": params,
+            "status": STATUS_RUNNING,
+            "cursor": None,
+            "counters": {},
+            "errors": [],
+            "started_at": now,
+            "updated_at": now,
+            "finished_at": None,
+            "result": None,
+            "resumed": 0,
+            "state": {},
+        }
+        self._resumed.set()
+        await self.async_checkpoint()
+        self._start_task()
+        return True
+
+    async def async_pause(self) -> bool:
+        """Pause the active job at its next checkpoint."""
+        if self._job is None or self._job["status"] != STATUS_RUNNING:
+            return False
+        self._job["status"] = STATUS_PAUSED
+        self._resumed.clear()
+        await self.async_checkpoint()
+        return True
+
+    async def async_resume(self) -> bool:
+        """Resume a paused job (restarting it if it was paused before a restart)."""
+        if self._job is None or self._job["status"] != STATUS_PAUSED:
+            return False
+        self._job["status"] = STATUS_RUNNING
+        self._resumed.set()
+        await self.async_checkpoint()
+        if self._task is None:
+            self._start_task()
+        return True
+
+    async def async_cancel(self) -> bool:
+        """Cancel the active job; its checkpoint is kept as cancelled."""
+        if not self.is_active:
+            return False
+        self._job["status"] = STATUS_CANCELLED
+        self._job["finished_at"] = time.time()
+        self._resumed.set()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.async_checkpoint()
+        return True
+
+    async def async_shutdown(self) -> None:
+        """Stop the running task but keep the job resumable."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._job is not None:
+            await self.async_checkpoint()
+
+    async def wait_resumed(self) -> None:
+        """Wait while the job is paused; a paused job gives up its job slot."""
+        if self._resumed.is_set():
+            return
+        holding = self._holds_job_slot
+        if holding:
+            self._holds_job_slot = False
+            JOB_LIMITER.release(self._job_priority)
+        await self._resumed.wait()
+        if holding:
+            await JOB_LIMITER.acquire(self._job_priority)
+            self._holds_job_slot = True
+
+    async def async_checkpoint(self) -> None:
+        """Save the job record and fire a progress event."""
+        if self._job is None:
+            return
+        self._job["updated_at"] = time.time()
+        try:
+            # Deep copy: the store serializes later while the job keeps counting
+            await self._store.async_save(copy.deepcopy(self._job))
+        except Exception as err:
+            _LOGGER.warning(f"Failed to save backfill checkpoint for {self._device_id}: {err}")
+        self._hass.bus.async_fire(
+            EVENT_BACKFILL_PROGRESS, {"device_id": self._device_id, **self._job}
+        )
+
+    def _start_task(self) -> None:
+        self._task = self._hass.async_create_background_task(
+            self._async_run(), name=f"lumentree_{self._job['mode']}_{self._device_id}"
+        )
+
+    async def _async_run(self) -> None:
+        job = self._job
+        progress = BackfillProgress(self, job)
+        method = getattr(self._aggregator, job["mode"])
+        priority = self._job_priority = JOB_PRIORITIES.get(job["mode"], RequestPriority.HISTORY)
+        try:
+            await self.wait_resumed()
+            # Queue behind other devices' jobs; requests stay below live polling
+            await JOB_LIMITER.acquire(priority)
+            self._holds_job_slot = True
+            with request_priority(priority):
+                result = await method(**job["params"], progress=progress)
+        except asyncio.CancelledError:
+            # Shutdown keeps the job running in storage so it resumes on restart
+            raise
+        except Exception as err:
+            _LOGGER.error(f"Backfill {job['mode']} failed for {self._device_id}: {err}")
+            progress.record_error(str(err))
+            job["status"] = STATUS_FAILED
+        else:
+            job["status"] = STATUS_COMPLETED
+            job["result"] = result
+        finally:
+            if self._holds_job_slot:
+                self._holds_job_slot = False
+                JOB_LIMITER.release(priority)
+        job["finished_at"] = time.time()
+        self._task = None
+        await self.async_checkpoint()
@@ -1,27 +1,66 @@
-"""Simple JSON cache for Lumentree statistics.
+"""Per-year statistics cache for Lumentree.
 
 Cache layout per device/year:
-  .storage/lumentree_stats/{device_id}/{year}.json
+  .storage/lumentree_stats/{device_id}/{year}.bin   (columnar store, see year_store)
+  .storage/lumentree_stats/{device_id}/{year}.json  (legacy, converted on next save)
+  .storage/lumentree_stats/{device_id}/export/{year}.json  (export_year_json)
 
-Structure:
+In-memory structure (and JSON export):
 {
   "daily": {"YYYY-MM-DD": {"pv": 0.0, "grid": 0.0, "load": 0.0, "essential": 0.0, "charge": 0.0, "discharge": 0.0}},
   "monthly": {
     "pv": [12 floats], "grid": [...], "load": [...], "essential": [...], "charge": [...], "discharge": [...]
   },
   "yearly_total": {"pv": 0.0, "grid": 0.0, "load": 0.0, "essential": 0.0, "charge": 0.0, "discharge": 0.0},
-  "meta": {"version": 1, "last_backfill_date": "YYYY-MM-DD"}
+  "meta": {"version": 1, "last_backfill_date": "YYYY-MM-DD", "empty_bitmap": 0, "dirty_dates": [...]}
 }
+
+Confirmed-empty days are a day bitmap (see day_bitmap); the JSON export lists
+them as ``empty_dates``, the layout older files used.
 """
 
 from __future__ import annotations
 
+import datetime as dt
 import json
+import logging
 import os
-from typing import Dict, Any, Tuple
+from array import array
+from types import ModuleType
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..const import DEFAULT_TARIFF_VND_PER_KWH
+from . import atomic_file, day_bitmap, sqlite_store, year_store
+from .range_index import RangeIndex
+from .year_cache import YearCacheManager
+
+np: ModuleType | None
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the runtime environment
+    np = None
 
+_LOGGER = logging.getLogger(__name__)
 
 CACHE_BASE_DIR = os.path.join(".storage", "lumentree_stats")
+YEAR_STORE_SUFFIX = ".bin"
+SQLITE_DB_PATH = os.path.join(CACHE_BASE_DIR, "stats.db")
+
+# Devices using the SQLite backend (the others use per-year files)
+_sqlite_devices: Dict[str, sqlite_store.StatsDatabase] = {}
+
+# Device directories already checked for interrupted writes, and those with
+# renames not yet fsynced (synced once per write-behind batch)
+_checked_dirs: set[str] = set()
+_resolved_roots: Dict[str, str] = {}
+_unsynced_dirs: set[str] = set()
+
+# Day metrics summed into monthly/yearly aggregates (also the store columns)
+AGGREGATE_KEYS = year_store.COLUMNS
+
+# Cross-check every incremental aggregate update against a full recompute
+# (debugging aid; makes update_daily O(days) again)
+VERIFY_AGGREGATES = os.environ.get("LUMENTREE_VERIFY_AGGREGATES") == "1"
 
 
 def _ensure_dir(path: str) -> None:
@@ -55,16 +94,68 @@ def _empty_cache() -> Dict[str, Any]:
             "last_backfill_date": None,
             # Phạm vi đã có dữ liệu (bao phủ)
             "coverage": {"earliest": None, "latest": None},
-            # Những ngày được xác nhận rỗng (để bỏ qua vĩnh viễn)
-            "empty_dates": [],
+            # Những ngày được xác nhận rỗng (để bỏ qua vĩnh viễn), bitmap theo ngày trong năm
+            "empty_bitmap": 0,
+            # Những ngày chưa chốt số liệu (job hàng đêm sẽ làm mới)
+            "dirty_dates": [],
         },
     }
 
 
-def cache_path(device_id: str, year: int) -> str:
+def cache_root() -> str:
+    """Resolved path of ``CACHE_BASE_DIR`` (resolved once per working directory)."""
+    cwd = os.getcwd()
+    root = _resolved_roots.get(cwd)
+    if root is None:
+        root = _resolved_roots[cwd] = os.path.realpath(CACHE_BASE_DIR)
+    return root
+
+
+def _device_dir(device_id: str) -> str:
     dev_dir = os.path.join(CACHE_BASE_DIR, device_id)
     _ensure_dir(dev_dir)
-    return os.path.join(dev_dir, f"{year}.json")
+    if dev_dir not in _checked_dirs:
+        _checked_dirs.add(dev_dir)
+        atomic_file.remove_stale_temp_files(dev_dir)
+    return dev_dir
+
+
+def cache_path(device_id: str, year: int) -> str:
+    """Path of the binary year store (see ``year_store``)."""
+    return os.path.join(_device_dir(device_id), f"{year}{YEAR_STORE_SUFFIX}")
+
+
+def legacy_cache_path(device_id: str, year: int) -> str:
+    """Path of the old JSON year file (read until the year is saved again)."""
+    return os.path.join(_device_dir(device_id), f"{year}.json")
+
+
+def export_path(device_id: str, year: int) -> str:
+    """Path of the human-readable JSON export of a year."""
+    export_dir = os.path.join(_device_dir(device_id), "export")
+    _ensure_dir(export_dir)
+    return os.path.join(export_dir, f"{year}.json")
+
+
+def lifetime_path(device_id: str) -> str:
+    """Path of the persisted lifetime totals (see ``lifetime_totals``)."""
+    return os.path.join(_device_dir(device_id), "lifetime.json")
+
+
+def year_fingerprint(device_id: str, year: int) -> Optional[List[int]]:
+    """[mtime_ns, size] of a year's file ([0, 0] if none), or None with the SQLite backend.
+
+    Lets derived data kept across restarts notice that a year was rewritten.
+    """
+    if device_id in _sqlite_devices:
+        return None
+    for path in (cache_path(device_id, year), legacy_cache_path(device_id, year)):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        return [st.st_mtime_ns, st.st_size]
+    return [0, 0]
 
 
 def _needs_recompute(cache: Dict[str, Any]) -> bool:
@@ -94,50 +185,272 @@ def _needs_recompute(cache: Dict[str, Any]) -> bool:
     return False
 
 
+def enable_sqlite(device_id: str, path: str = SQLITE_DB_PATH) -> sqlite_store.StatsDatabase:
+    """Switch a device to the shared SQLite backend.
+
+    Years not in the database yet are imported from their files on first load.
+    """
+    db = _sqlite_devices.get(device_id)
+    if db is None:
+        _ensure_dir(os.path.dirname(path))
+        # Years in memory were read from (and must be written to) the files
+        YEAR_CACHE.flush(device_id)
+        YEAR_CACHE.discard(device_id)
+        db = _sqlite_devices[device_id] = sqlite_store.acquire_database(path, device_id)
+    return db
+
+
+def disable_sqlite(device_id: str, export_to_files: bool = False) -> None:
+    """Switch a device back to per-year files.
+
+    Args:
+        device_id: Device ID
+        export_to_files: Write every stored year to its file first (when
+            leaving the SQLite backend for good, so no data is lost); the
+            device's rows are then removed from the database, so enabling
+            SQLite again imports the files instead of reading stale rows
+    """
+    db = _sqlite_devices.get(device_id)
+    if db is None:
+        return
+    YEAR_CACHE.flush(device_id)
+    YEAR_CACHE.discard(device_id)
+    if export_to_files:
+        for year in db.years(device_id):
+            data = _load_year_sqlite(db, device_id, year)
+            if data is not None:
+                _save_year_file(device_id, year, data)
+        db.purge_device(device_id)
+    del _sqlite_devices[device_id]
+    sqlite_store.release_database(db.path, device_id)
+
+
+def sqlite_database(device_id: str) -> Optional[sqlite_store.StatsDatabase]:
+    """The SQLite database of a device, or None when it uses per-year files."""
+    return _sqlite_devices.get(device_id)
+
+
+def _load_year_sqlite(db: sqlite_store.StatsDatabase, device_id: str, year: int) -> Optional[Dict[str, Any]]:
+    data = db.load_year(device_id, year)
+    if data is None:
+        return None
+    _upgrade_empty_dates(year, data)
+    return recompute_aggregates(data)
+
+
 def load_year(device_id: str, year: int, auto_recompute: bool = True) -> Dict[str, Any]:
+    """Load cache for a year (a copy the caller may modify).
+
+    Served from the in-memory year cache; the backend is only read on a miss.
+
+    Args:
+        device_id: Device ID
+        year: Year to load
+        auto_recompute: Kept for existing callers; legacy files are always
+            checked for stale aggregates when they are read
+    """
+    return YEAR_CACHE.load(device_id, year)
+
+
+def _read_year(device_id: str, year: int) -> Tuple[Dict[str, Any], bool]:
+    """Read a year from the device's backend (the year cache's loader).
+
+    With the SQLite backend, a year missing from the database is imported
+    from its file.
+
+    Returns:
+        (cache dict, True if it was read from a legacy JSON file and should be rewritten)
+    """
+    db = _sqlite_devices.get(device_id)
+    if db is None:
+        legacy = not os.path.exists(cache_path(device_id, year)) and os.path.exists(
+            legacy_cache_path(device_id, year)
+        )
+        return _load_year_file(device_id, year), legacy
+    try:
+        data = _load_year_sqlite(db, device_id, year)
+    except Exception as err:
+        _LOGGER.warning(f"SQLite load of {device_id}/{year} failed, reading file: {err}")
+        return _load_year_file(device_id, year), False
+    if data is not None:
+        return data, False
+    data = _load_year_file(device_id, year)
+    if data.get("daily") or empty_bitmap(data):
+        try:
+            db.save_year(device_id, year, data)
+        except Exception as err:
+            _LOGGER.warning(f"Failed to import {device_id}/{year} into SQLite: {err}")
+    return data, False
+
+
+def _load_year_file(device_id: str, year: int, auto_recompute: bool = True) -> Dict[str, Any]:
     """Load cache for a year, optionally auto-recomputing aggregates if needed.
     
+    Reads the binary year store; a legacy JSON file is read when no store
+    exists yet (it is converted on the next save).
+    
     Args:
         device_id: Device ID
         year: Year to load
         auto_recompute: If True, automatically recompute aggregates if they appear incorrect
+            (legacy JSON only; the binary store always derives them)
         
     Returns:
         Cache dictionary
+
+    Raises:
+        OSError: The file exists but could not be read
+        year_store.UnsupportedYearStoreError: The store has a format this
+            version cannot read (e.g. written by a newer release)
+
+    Both leave the file in place: returning an empty year would let the next
+    save overwrite it. Only corrupt files are quarantined.
     """
     path = cache_path(device_id, year)
+    if os.path.exists(path):
+        try:
+            return _upgrade_empty_dates(year, year_store.read_year_file(path))
+        except year_store.UnsupportedYearStoreError as err:
+            _LOGGER.error(f"Cannot read year store {path}: {err}")
+            raise
+        except ValueError as err:
+            # Bad magic, truncated, undecodable trailer: keep it for inspection
+            # instead of overwriting it on the next save, then fall through to
+            # the legacy file, if it is still there
+            _LOGGER.error(f"Corrupt year store {path}: {err}")
+            atomic_file.quarantine(path)
+    path = legacy_cache_path(device_id, year)
     if not os.path.exists(path):
         return _empty_cache()
     try:
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
-            if not isinstance(data, dict):
-                return _empty_cache()
-            
-            # Auto-recompute if monthly arrays appear incorrect
-            if auto_recompute and _needs_recompute(data):
-                import logging
-                _LOGGER = logging.getLogger(__name__)
-                _LOGGER.info(f"Auto-recomputing aggregates for {device_id}/{year} (monthly arrays appear incorrect)")
-                data = recompute_aggregates(data)
-                # Save recomputed cache
-                try:
-                    save_year(device_id, year, data)
-                except Exception:
-                    pass  # Best effort save
-            
-            return data
-    except Exception:
+    except ValueError as err:
+        _LOGGER.error(f"Corrupt legacy cache {path}: {err}")
+        atomic_file.quarantine(path)
+        return _empty_cache()
+    if not isinstance(data, dict):
+        _LOGGER.error(f"Corrupt legacy cache {path}: not a JSON object")
+        atomic_file.quarantine(path)
         return _empty_cache()
+    try:
+        _upgrade_empty_dates(year, data)
+    except (TypeError, ValueError) as err:
+        _LOGGER.error(f"Corrupt legacy cache {path}: {err}")
+        atomic_file.quarantine(path)
+        return _empty_cache()
+
+    # Auto-recompute if monthly arrays appear incorrect
+    if auto_recompute and _needs_recompute(data):
+        _LOGGER.info(f"Auto-recomputing aggregates for {device_id}/{year} (monthly arrays appear incorrect)")
+        data = recompute_aggregates(data)
+        # Save recomputed cache
+        try:
+            _save_year_file(device_id, year, data)
+        except Exception:
+            pass  # Best effort save
+
+    return data
 
 
 def save_year(device_id: str, year: int, data: Dict[str, Any]) -> None:
+    """Save a year.
+
+    Unchanged years are not written; changed ones are written back by the
+    year cache's write-behind flush.
+    """
+    YEAR_CACHE.store(device_id, year, data)
+
+
+def _write_year(device_id: str, year: int, data: Dict[str, Any]) -> None:
+    """Write a year to the device's backend (the year cache's writer).
+
+    Raises on failure so the year stays dirty and is retried. File writes
+    leave the directory fsync to ``_sync_dirs`` at the end of the batch.
+    """
+    db = _sqlite_devices.get(device_id)
+    if db is not None:
+        db.save_year(device_id, year, data)
+        return
+    _save_year_file(device_id, year, data, sync_dir=False)
+
+
+def _sync_dirs() -> None:
+    """Fsync the directories written since the last call (once per flush batch)."""
+    while _unsynced_dirs:
+        atomic_file.fsync_dir(_unsynced_dirs.pop())
+
+
+def _save_year_file(device_id: str, year: int, data: Dict[str, Any], sync_dir: bool = True) -> None:
+    """Write a year store atomically (temp file, fsync, rename).
+
+    Raises:
+        OSError: The write failed; the previous file is intact
+    """
+    path = cache_path(device_id, year)
+    atomic_file.write_atomic(path, year_store.encode_year(year, data), sync_dir=sync_dir)
+    if not sync_dir:
+        _unsynced_dirs.add(os.path.dirname(path))
+    # The store now holds everything the legacy JSON file had
+    legacy = legacy_cache_path(device_id, year)
+    if os.path.exists(legacy):
+        try:
+            os.remove(legacy)
+        except OSError:
+            pass
+
+
+def read_month_totals(device_id: str, year: int, month: int) -> Optional[Dict[str, float]]:
+    """Month totals from memory or the mapped year store (None if neither has the year)."""
+    cached = YEAR_CACHE.peek(device_id, year)
+    if cached is not None:
+        return summarize_month(cached, month)
+    if device_id in _sqlite_devices:
+        return None
     path = cache_path(device_id, year)
+    if not os.path.exists(path):
+        return None
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+        with year_store.MappedYear(path) as columns:
+            return columns.month_totals(month)
+    except Exception as err:
+        _LOGGER.debug(f"Mapped read of {path} failed: {err}")
+        return None
+
+
+def read_year_totals(device_id: str, year: int) -> Optional[Dict[str, float]]:
+    """Year totals from memory or the mapped year store (None if neither has the year)."""
+    cached = YEAR_CACHE.peek(device_id, year)
+    if cached is not None:
+        return summarize_year(cached)
+    if device_id in _sqlite_devices:
+        return None
+    path = cache_path(device_id, year)
+    if not os.path.exists(path):
+        return None
+    try:
+        with year_store.MappedYear(path) as columns:
+            return columns.year_totals()
+    except Exception as err:
+        _LOGGER.debug(f"Mapped read of {path} failed: {err}")
+        return None
+
+
+def export_year_json(device_id: str, year: int) -> Optional[str]:
+    """Write a year as pretty-printed JSON (the old file layout) for inspection.
+
+    Returns:
+        Export path, or None if the year has no data
+    """
+    data = load_year(device_id, year)
+    if not data.get("daily") and not empty_bitmap(data):
+        return None
+    meta = data.setdefault("meta", {})
+    meta["empty_dates"] = empty_dates(data, year)
+    meta.pop("empty_bitmap", None)
+    path = export_path(device_id, year)
+    atomic_file.write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+    return path
 
 
 def update_daily(
@@ -147,6 +460,7 @@ def update_daily(
 
     Returns (cache, month_index, year_changed_flag)
     """
+    old_day = cache.get("daily", {}).get(date_str)
     # Store daily - API returns integers divided by 10, so precision is 1 decimal place for kWh
     load_value = float(values.get("load", 0.0))
     essential_value = float(values.get("essential", 0.0))
@@ -155,7 +469,6 @@ def update_daily(
     grid_value = float(values.get("grid", 0.0))
     # Calculate savings: saved_kwh = total_load - grid_in, savings_vnd = saved_kwh * tariff
     saved_kwh = max(0.0, total_load_value - grid_value)
-    from ..const import DEFAULT_TARIFF_VND_PER_KWH
     savings_vnd = saved_kwh * DEFAULT_TARIFF_VND_PER_KWH
     cache.setdefault("daily", {})[date_str] = {
         "pv": round(float(values.get("pv", 0.0)), 1),  # API precision: 1 decimal
@@ -169,7 +482,7 @@ def update_daily(
         "savings_vnd": round(savings_vnd, 0),  # Money: no decimals
     }
 
-    # Update coverage and remove date from empty_dates if present
+    # Update coverage and clear the day's confirmed-empty bit
     meta = cache.setdefault("meta", {})
     cov = meta.setdefault("coverage", {"earliest": None, "latest": None})
     try:
@@ -179,13 +492,18 @@ def update_daily(
             cov["latest"] = date_str
     except Exception:
         pass
-    try:
-        empties = set(meta.setdefault("empty_dates", []))
-        if date_str in empties:
-            empties.discard(date_str)
-            meta["empty_dates"] = sorted(list(empties))
-    except Exception:
-        pass
+    empties = meta.get("empty_bitmap", 0)
+    if empties:
+        slot = day_bitmap.slot_of(date_str)
+        if slot is not None:
+            meta["empty_bitmap"] = empties & ~(1 << slot)
+
+    # A day written before it is over holds partial totals; it stays in the
+    # dirty window until it is written again afterwards
+    if date_str >= dt.date.today().isoformat():
+        mark_dirty(cache, date_str)
+    else:
+        clear_dirty(cache, date_str)
 
     # Month index from date_str
     # date_str format: YYYY-MM-DD
@@ -195,50 +513,114 @@ def update_daily(
         month = 1
     m_idx = month - 1
 
-    # Recompute that month bucket from daily
-    monthly = cache.setdefault("monthly", {})
-    for key in ("pv", "grid", "load", "essential", "total_load", "charge", "discharge", "saved_kwh", "savings_vnd"):
-        if key not in monthly:
-            monthly[key] = _empty_month()
-        # sum all days of the month - round to 1 decimal for kWh, 0 for VND
-        s = 0.0
-        for d, v in cache["daily"].items():
-            try:
-                if int(d[5:7]) == month:
-                    s += float(v.get(key, 0.0))
-            except Exception:
-                continue
-        # Round based on key type: 1 decimal for kWh, 0 for VND
-        if key == "savings_vnd":
-            monthly[key][m_idx] = round(s, 0)
-        else:
-            monthly[key][m_idx] = round(s, 1)
-
-    # Recompute yearly totals - round to match API precision
-    ytot = cache.setdefault("yearly_total", {})
-    for key in ("pv", "grid", "load", "essential", "total_load", "charge", "discharge", "saved_kwh", "savings_vnd"):
-        s = sum(monthly.get(key, _empty_month()))
-        # Round based on key type: 1 decimal for kWh, 0 for VND
-        if key == "savings_vnd":
-            ytot[key] = round(s, 0)
-        else:
-            ytot[key] = round(s, 1)
+    # Apply the difference to the month bucket and the yearly totals instead of
+    # re-summing the whole year (falls back to a full rebuild for legacy layouts)
+    if _has_aggregates(cache):
+        monthly = cache["monthly"]
+        ytot = cache["yearly_total"]
+        new_values = year_store.day_values(cache["daily"][date_str])
+        old_values = year_store.day_values(old_day) if old_day else (0.0,) * len(AGGREGATE_KEYS)
+        for key, new, old in zip(AGGREGATE_KEYS, new_values, old_values, strict=True):
+            delta = new - old
+            if delta:
+                digits = _round_digits(key)
+                monthly[key][m_idx] = round(monthly[key][m_idx] + delta, digits)
+                ytot[key] = round(ytot[key] + delta, digits)
+    else:
+        recompute_aggregates(cache)
+
+    if VERIFY_AGGREGATES:
+        mismatches = verify_aggregates(cache)
+        if mismatches:
+            _LOGGER.warning(f"Incremental aggregates drifted after {date_str}: {mismatches}; rebuilding")
+            recompute_aggregates(cache)
 
     return cache, m_idx, 1
 
 
-def mark_empty(cache: Dict[str, Any], date_str: str) -> Dict[str, Any]:
-    """Đánh dấu một ngày là rỗng để bỏ qua khi backfill/gap-fill.
+def mark_empty(cache: Dict[str, Any], date_str: str, year: Optional[int] = None) -> Dict[str, Any]:
+    """Mark a day as confirmed empty so backfill and gap filling skip it.
+
+    No daily entry is stored for it; only its bit in ``meta.empty_bitmap`` is set.
+    The bitmap is indexed by day of year, so the date must belong to the
+    cache's year.
 
-    Không lưu daily cho ngày rỗng, chỉ ghi chú trong meta.empty_dates.
+    Args:
+        cache: Year cache dict
+        date_str: Day (YYYY-MM-DD)
+        year: Year of ``cache``; when given, a date of another year (or a
+            malformed one) raises ValueError instead of setting a bit
+
+    Raises:
+        ValueError: ``date_str`` is not a day of ``year``
     """
+    slot = day_bitmap.slot_of(date_str)
+    if year is not None and (slot is None or not date_str.startswith(f"{year}-")):
+        raise ValueError(f"{date_str!r} is not a day of {year}")
     meta = cache.setdefault("meta", {})
-    empties = set(meta.setdefault("empty_dates", []))
-    empties.add(date_str)
-    meta["empty_dates"] = sorted(list(empties))
+    if slot is not None:
+        meta["empty_bitmap"] = meta.get("empty_bitmap", 0) | (1 << slot)
     return cache
 
 
+def empty_bitmap(cache: Dict[str, Any]) -> int:
+    """Bitmap of the confirmed-empty days (see ``mark_empty``)."""
+    return cache.get("meta", {}).get("empty_bitmap", 0)
+
+
+def data_bitmap(cache: Dict[str, Any], year: int) -> int:
+    """Bitmap of the days present in ``daily``."""
+    return day_bitmap.from_dates(year, cache.get("daily", {}))
+
+
+def known_bitmap(cache: Dict[str, Any], year: int) -> int:
+    """Days that need no fetch: cached or confirmed empty."""
+    return data_bitmap(cache, year) | empty_bitmap(cache)
+
+
+def empty_dates(cache: Dict[str, Any], year: int) -> List[str]:
+    """Confirmed-empty days, oldest first."""
+    return day_bitmap.to_dates(year, empty_bitmap(cache))
+
+
+def is_confirmed_empty(cache: Dict[str, Any], date_str: str) -> bool:
+    slot = day_bitmap.slot_of(date_str)
+    return slot is not None and bool(empty_bitmap(cache) >> slot & 1)
+
+
+def _upgrade_empty_dates(year: int, cache: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold the old ``meta.empty_dates`` list into ``meta.empty_bitmap``."""
+    meta = cache.get("meta")
+    if isinstance(meta, dict) and "empty_dates" in meta:
+        dates = meta.pop("empty_dates") or []
+        meta["empty_bitmap"] = meta.get("empty_bitmap", 0) | day_bitmap.from_dates(year, dates)
+    return cache
+
+
+def mark_dirty(cache: Dict[str, Any], date_str: str) -> Dict[str, Any]:
+    """Add a day to the dirty window, so the nightly delta refreshes it."""
+    meta = cache.setdefault("meta", {})
+    dirty = meta.setdefault("dirty_dates", [])
+    if date_str not in dirty:
+        dirty.append(date_str)
+        dirty.sort()
+    return cache
+
+
+def clear_dirty(cache: Dict[str, Any], date_str: str) -> bool:
+    """Remove a day from the dirty window. Returns True if it was dirty."""
+    dirty = cache.get("meta", {}).get("dirty_dates")
+    if not dirty or date_str not in dirty:
+        return False
+    dirty.remove(date_str)
+    return True
+
+
+def dirty_dates(cache: Dict[str, Any]) -> list[str]:
+    """Days of this year in the dirty window (sorted)."""
+    return list(cache.get("meta", {}).get("dirty_dates", []))
+
+
 def _get_total_load(data: Dict[str, float]) -> float:
     """Calculate total_load from load + essential if not present (backward compatibility)."""
     if "total_load" in data:
@@ -285,83 +667,167 @@ def summarize_year(cache: Dict[str, Any]) -> Dict[str, float]:
     return result
 
 
-def recompute_aggregates(cache: Dict[str, Any]) -> Dict[str, Any]:
-    """Rebuild monthly arrays and yearly totals from daily map."""
-    monthly = {
-        "pv": _empty_month(),
-        "grid": _empty_month(),
-        "load": _empty_month(),
-        "essential": _empty_month(),
-        "total_load": _empty_month(),
-        "charge": _empty_month(),
-        "discharge": _empty_month(),
-        "saved_kwh": _empty_month(),
-        "savings_vnd": _empty_month(),
-    }
-    for d, v in cache.get("daily", {}).items():
+def _round_digits(key: str) -> int:
+    # 1 decimal for kWh (API precision), 0 for VND
+    return 0 if key == "savings_vnd" else 1
+
+
+def _has_aggregates(cache: Dict[str, Any]) -> bool:
+    """True if monthly arrays and yearly totals exist for every key (incremental updates possible)."""
+    monthly = cache.get("monthly")
+    ytot = cache.get("yearly_total")
+    if not isinstance(monthly, dict) or not isinstance(ytot, dict):
+        return False
+    for key in AGGREGATE_KEYS:
+        arr = monthly.get(key)
+        if not isinstance(arr, list) or len(arr) != 12 or key not in ytot:
+            return False
+    return True
+
+
+def _pack_columns(daily: Dict[str, Any]) -> Tuple[array, array]:
+    """Pack the daily map into a month-index column and a row-major value matrix.
+
+    Returns:
+        (month index per day, ``len(AGGREGATE_KEYS)`` contributions per day)
+    """
+    months = array("b")
+    values = array("d")
+    for d, v in daily.items():
         try:
             month = int(d[5:7]) - 1
         except Exception:
             continue
-        for key in monthly.keys():
-            if key == "total_load":
-                # Calculate total_load from load + essential if not already stored
-                # Use stored total_load if available, otherwise calculate from load + essential
-                stored_total = v.get("total_load")
-                if stored_total is not None:
-                    monthly[key][month] += float(stored_total)
-                else:
-                    load_val = float(v.get("load", 0.0))
-                    essential_val = float(v.get("essential", 0.0))
-                    monthly[key][month] += round(load_val + essential_val, 1)
-            elif key == "saved_kwh":
-                # Calculate saved_kwh from total_load - grid if not already stored
-                total_load_val = float(v.get("total_load", float(v.get("load", 0.0)) + float(v.get("essential", 0.0))))
-                grid_val = float(v.get("grid", 0.0))
-                saved_kwh_val = max(0.0, total_load_val - grid_val)
-                monthly[key][month] += saved_kwh_val
-            elif key == "savings_vnd":
-                # Calculate savings_vnd from saved_kwh if not already stored
-                total_load_val = float(v.get("total_load", float(v.get("load", 0.0)) + float(v.get("essential", 0.0))))
-                grid_val = float(v.get("grid", 0.0))
-                saved_kwh_val = max(0.0, total_load_val - grid_val)
-                from ..const import DEFAULT_TARIFF_VND_PER_KWH
-                monthly[key][month] += saved_kwh_val * DEFAULT_TARIFF_VND_PER_KWH
-            else:
-                monthly[key][month] += float(v.get(key, 0.0))
+        if not 0 <= month < 12:
+            continue
+        months.append(month)
+        values.extend(year_store.day_values(v))
+    return months, values
+
+
+def _month_sums(daily: Dict[str, Any]) -> List[List[float]]:
+    """Unrounded per-month sums for every aggregate key (``AGGREGATE_KEYS`` order).
+
+    Days are summed in insertion order with NumPy or the pure Python
+    fallback, so both give the same floats as a plain loop.
+    """
+    months, values = _pack_columns(daily)
+    width = len(AGGREGATE_KEYS)
+    if np is not None and months:
+        month_idx = np.frombuffer(months, dtype=np.int8).astype(np.intp)
+        matrix = np.frombuffer(values, dtype=np.float64).reshape(-1, width)
+        return [
+            np.bincount(month_idx, weights=matrix[:, k], minlength=12).tolist()
+            for k in range(width)
+        ]
+    sums = [[0.0] * 12 for _ in range(width)]
+    for row, month in enumerate(months):
+        base = row * width
+        for k in range(width):
+            sums[k][month] += values[base + k]
+    return sums
+
+
+def recompute_aggregates(cache: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild monthly arrays and yearly totals from daily map (columnar)."""
+    sums = _month_sums(cache.get("daily", {}))
     # Round monthly arrays to match API precision
-    cache["monthly"] = {}
-    for k, vals in monthly.items():
-        if k == "savings_vnd":
-            cache["monthly"][k] = [round(x, 0) for x in vals]
-        else:
-            cache["monthly"][k] = [round(x, 1) for x in vals]
+    cache["monthly"] = {
+        key: [round(x, _round_digits(key)) for x in month_sums]
+        for key, month_sums in zip(AGGREGATE_KEYS, sums, strict=True)
+    }
 
     # Round yearly totals to match API precision
-    ytot = {}
-    for k, vals in cache["monthly"].items():
-        s = sum(vals)
-        if k == "savings_vnd":
-            ytot[k] = round(s, 0)
-        else:
-            ytot[k] = round(s, 1)
-    cache["yearly_total"] = ytot
+    cache["yearly_total"] = {
+        k: round(sum(vals), _round_digits(k)) for k, vals in cache["monthly"].items()
+    }
     return cache
 
 
+def verify_aggregates(cache: Dict[str, Any]) -> list[str]:
+    """Cross-check the stored aggregates against ``recompute_aggregates``.
+
+    Returns:
+        Descriptions of mismatching buckets (empty when consistent)
+    """
+    expected = recompute_aggregates(
+        {"daily": cache.get("daily", {}), "monthly": {}, "yearly_total": {}}
+    )
+    monthly = cache.get("monthly", {})
+    ytot = cache.get("yearly_total", {})
+    mismatches: list[str] = []
+    for key in AGGREGATE_KEYS:
+        tolerance = 0.5 if key == "savings_vnd" else 0.05
+        actual = monthly.get(key) or _empty_month()
+        for idx, value in enumerate(expected["monthly"][key]):
+            if idx >= len(actual) or abs(float(actual[idx]) - value) > tolerance:
+                mismatches.append(f"monthly.{key}[{idx + 1}]")
+        if abs(float(ytot.get(key, 0.0)) - expected["yearly_total"][key]) > tolerance:
+            mismatches.append(f"yearly_total.{key}")
+    return mismatches
+
+
+def range_totals(device_id: str, start: dt.date, end: dt.date) -> Dict[str, float]:
+    """Sum every metric over [start, end] (inclusive), plus the number of cached days.
+
+    An indexed query with the SQLite backend; otherwise answered by the
+    prefix-sum index (see ``get_range_totals``).
+    """
+    db = _sqlite_devices.get(device_id)
+    if db is not None:
+        YEAR_CACHE.flush(device_id)
+        return db.range_totals(device_id, start, end)
+    return RANGE_INDEX.totals(device_id, start, end)
+
+
+def get_range_totals(
+    device_id: str, start: dt.date, end: dt.date, metrics: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """Totals of arbitrary date ranges (last 7 days, a billing cycle, since install).
+
+    Constant time once the years involved are indexed; works with either
+    backend since the index is built from the year caches.
+
+    Args:
+        device_id: Device ID
+        start: First day (inclusive)
+        end: Last day (inclusive)
+        metrics: Metrics to return (default: all of ``AGGREGATE_KEYS``)
+
+    Returns:
+        {metric: total, "days": number of cached days in the range}
+
+    Raises:
+        ValueError: Unknown metric
+    """
+    return RANGE_INDEX.totals(device_id, start, end, metrics)
+
+
 def purge_year(device_id: str, year: int) -> bool:
-    path = cache_path(device_id, year)
-    try:
-        if os.path.exists(path):
-            os.remove(path)
-            return True
-    except Exception:
-        pass
-    return False
+    YEAR_CACHE.discard(device_id, year)
+    removed = False
+    db = _sqlite_devices.get(device_id)
+    if db is not None:
+        removed = db.purge_year(device_id, year)
+    for path in (cache_path(device_id, year), legacy_cache_path(device_id, year)):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+                removed = True
+        except Exception:
+            pass
+    return removed
 
 
 def purge_device(device_id: str) -> bool:
-    """Purge all cache files for a device."""
+    """Purge all cache files (and SQLite rows) for a device."""
+    YEAR_CACHE.discard(device_id)
+    db = _sqlite_devices.get(device_id)
+    if db is not None:
+        try:
+            db.purge_device(device_id)
+        except Exception as err:
+            _LOGGER.error(f"Failed to purge SQLite cache: {err}")
     dev_dir = os.path.join(CACHE_BASE_DIR, device_id)
     try:
         if os.path.isdir(dev_dir):
@@ -373,15 +839,16 @@ def purge_device(device_id: str) -> bool:
                         os.remove(file_path)
                         files_deleted += 1
                 except Exception as e:
-                    import logging
-                    _LOGGER = logging.getLogger(__name__)
                     _LOGGER.warning(f"Failed to delete {f}: {e}")
             # Keep directory for future use, don't rmdir
             return files_deleted > 0
     except Exception as e:
-        import logging
-        _LOGGER = logging.getLogger(__name__)
         _LOGGER.error(f"Failed to purge device cache: {e}")
     return False
 
 
+# Shared by every device and coordinator in the process
+YEAR_CACHE = YearCacheManager(_read_year, _write_year, on_flushed=_sync_dirs, root=cache_root)
+
+# Range totals over the shared year caches (rebuilt per changed year)
+RANGE_INDEX = RangeIndex(YEAR_CACHE)
@@ -1,11 +1,17 @@
-"""Cache optimizer to normalize and minimize cache data."""
+"""Cache optimizer to normalize and minimize cache data.
+
+Years are rewritten through year cache transactions, so an optimization
+never overwrites days saved concurrently (e.g. by a running backfill).
+"""
 from __future__ import annotations
 
+import json
 import logging
 from typing import Dict, Any, Tuple
 from datetime import datetime
 
 from . import cache as cache_io
+from . import day_bitmap
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,44 +49,38 @@ def normalize_cache(cache: Dict[str, Any], keep_coverage_range: bool = True) ->
     """
     daily = cache.get("daily", {}).copy()
     meta = cache.get("meta", {}).copy()
-    empty_dates = set(meta.get("empty_dates", []))
-    
-    removed_count = 0
-    kept_count = 0
-    
-    # Find earliest and latest dates with real data
-    earliest_date = None
-    latest_date = None
+    empty_bits = meta.get("empty_bitmap", 0)
+    # Days with real data, as a day bitmap (coverage is its lowest/highest bit)
+    kept_bits = 0
+    year = None
     
     # Process each day
     dates_to_remove = []
     for date_str, day_data in daily.items():
+        slot = day_bitmap.slot_of(date_str)
+        if slot is not None:
+            year = int(date_str[:4])
         if is_empty_day(day_data):
             # Mark as empty and remove from daily
             dates_to_remove.append(date_str)
-            empty_dates.add(date_str)
-            removed_count += 1
-        else:
-            kept_count += 1
-            # Update coverage range
-            if earliest_date is None or date_str < earliest_date:
-                earliest_date = date_str
-            if latest_date is None or date_str > latest_date:
-                latest_date = date_str
+            if slot is not None:
+                empty_bits |= 1 << slot
+        elif slot is not None:
+            kept_bits |= 1 << slot
+    removed_count = len(dates_to_remove)
+    kept_count = len(daily) - removed_count
     
     # Remove empty days from daily dict
     for date_str in dates_to_remove:
         daily.pop(date_str, None)
     
     # Update meta
-    meta["empty_dates"] = sorted(list(empty_dates))
+    meta["empty_bitmap"] = empty_bits
     
-    if keep_coverage_range:
+    if keep_coverage_range and kept_bits:
         coverage = meta.setdefault("coverage", {})
-        if earliest_date:
-            coverage["earliest"] = earliest_date
-        if latest_date:
-            coverage["latest"] = latest_date
+        coverage["earliest"] = day_bitmap.first_date(year, kept_bits)
+        coverage["latest"] = day_bitmap.last_date(year, kept_bits)
     
     # Recompute monthly and yearly aggregates from remaining daily data
     normalized_cache = {
@@ -96,19 +96,8 @@ def normalize_cache(cache: Dict[str, Any], keep_coverage_range: bool = True) ->
     return normalized_cache, removed_count, kept_count
 
 
-def optimize_year_cache(device_id: str, year: int, dry_run: bool = False) -> Dict[str, Any]:
-    """Optimize cache for a specific year.
-    
-    Args:
-        device_id: Device ID
-        year: Year to optimize
-        dry_run: If True, don't save changes, just return stats
-        
-    Returns:
-        Dictionary with optimization stats
-    """
-    cache = cache_io.load_year(device_id, year)
-    
+def _optimize_in_place(year: int, cache: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a year dict in place and return the optimization stats."""
     if not cache:
         return {
             "year": year,
@@ -120,7 +109,6 @@ def optimize_year_cache(device_id: str, year: int, dry_run: bool = False) -> Dic
         }
     
     # Calculate size before
-    import json
     size_before = len(json.dumps(cache, ensure_ascii=False))
     
     # Normalize cache
@@ -129,15 +117,8 @@ def optimize_year_cache(device_id: str, year: int, dry_run: bool = False) -> Dic
     # Calculate size after
     size_after = len(json.dumps(normalized_cache, ensure_ascii=False))
     
-    # Save if not dry run
-    if not dry_run:
-        cache_io.save_year(device_id, year, normalized_cache)
-        _LOGGER.info(
-            f"Optimized cache for {device_id}/{year}: "
-            f"removed {removed_count} empty days, kept {kept_count} days, "
-            f"size: {size_before} -> {size_after} bytes ({((size_before - size_after) / size_before * 100):.1f}% reduction)"
-        )
-    
+    cache.clear()
+    cache.update(normalized_cache)
     return {
         "year": year,
         "status": "optimized",
@@ -150,7 +131,41 @@ def optimize_year_cache(device_id: str, year: int, dry_run: bool = False) -> Dic
     }
 
 
-def optimize_all_years(device_id: str, max_years: int = 10, dry_run: bool = False) -> Dict[str, Any]:
+async def async_optimize_year_cache(device_id: str, year: int, dry_run: bool = False) -> Dict[str, Any]:
+    """Optimize cache for a specific year.
+    
+    Args:
+        device_id: Device ID
+        year: Year to optimize
+        dry_run: If True, don't save changes, just return stats
+        
+    Returns:
+        Dictionary with optimization stats
+    """
+    result: Dict[str, Any] = {}
+    
+    def _optimize(cache: Dict[str, Any]) -> None:
+        result.update(_optimize_in_place(year, cache))
+    
+    if dry_run:
+        async with cache_io.YEAR_CACHE.year(device_id, year) as tx:
+            _optimize(tx.data)
+            tx.rollback()
+    else:
+        # Replayed on the current contents if the year changes meanwhile
+        await cache_io.YEAR_CACHE.async_apply(device_id, year, [_optimize])
+        if result["status"] == "optimized":
+            _LOGGER.info(
+                f"Optimized cache for {device_id}/{year}: "
+                f"removed {result['removed']} empty days, kept {result['kept']} days, "
+                f"size: {result['size_before']} -> {result['size_after']} bytes "
+                f"({result['size_reduction_percent']:.1f}% reduction)"
+            )
+    
+    return result
+
+
+async def async_optimize_all_years(device_id: str, max_years: int = 10, dry_run: bool = False) -> Dict[str, Any]:
     """Optimize cache for all years.
     
     Args:
@@ -175,7 +190,7 @@ def optimize_all_years(device_id: str, max_years: int = 10, dry_run: bool = Fals
         if year < 2000:
             break
         
-        result = optimize_year_cache(device_id, year, dry_run=dry_run)
+        result = await async_optimize_year_cache(device_id, year, dry_run=dry_run)
         results.append(result)
         
         if result["status"] == "optimized":
@@ -6,6 +6,7 @@ from typing import Dict, Any, Optional, Tuple
 import logging
 
 from . import cache as cache_io
+from .year_scan import scan_years
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,6 +26,15 @@ def find_earliest_data_from_cache(
         date_str format: YYYY-MM-DD
     """
     today = dt.date.today()
+    db = cache_io.sqlite_database(device_id)
+    if db is not None:
+        # Indexed query instead of loading every year (pending writes first)
+        cache_io.YEAR_CACHE.flush(device_id)
+        date_str = db.first_data_date(device_id, since=f"{max(2000, today.year - max_years + 1)}-01-01")
+        if date_str is None:
+            return None
+        return (date_str, int(date_str[:4]), int(date_str[5:7]))
+
     earliest_date = None
     earliest_year = None
     earliest_month = None
@@ -71,7 +81,8 @@ async def find_earliest_data_from_api(api_client, device_id: str, max_years: int
     """Find earliest month with data from getYearData API.
     
     Uses getYearData API to quickly scan years and find earliest month with data.
-    This is much faster than checking daily data.
+    This is much faster than checking daily data, and the scan is shared with
+    smart backfill through the per-device year scan cache.
     
     Args:
         api_client: LumentreeHttpApiClient instance
@@ -82,51 +93,12 @@ async def find_earliest_data_from_api(api_client, device_id: str, max_years: int
         Tuple of (year, month) or None if no data found
         month: 1-12
     """
-    today = dt.date.today()
-    earliest_year = None
-    earliest_month = None
-    
-    # Scan years from most recent to oldest
-    for year_offset in range(max_years):
-        year = today.year - year_offset
-        if year < 2000:  # Safety limit
-            break
-        
-        try:
-            # Get year data from API (one call per year - very fast)
-            year_data = await api_client.get_year_data(device_id, year)
-            
-            # Check each month for data (scan 12 months in memory - instant)
-            pv_data = year_data.get("pv", [0.0] * 12)
-            grid_data = year_data.get("grid", [0.0] * 12)
-            load_data = year_data.get("homeload", [0.0] * 12)
-            
-            # Scan months from January to December
-            for month_idx in range(12):
-                month = month_idx + 1
-                
-                # Check if has real data (any value > 0)
-                has_data = (
-                    pv_data[month_idx] > 0.0 or
-                    grid_data[month_idx] > 0.0 or
-                    load_data[month_idx] > 0.0
-                )
-                
-                if has_data:
-                    # Update earliest if this is earlier
-                    if earliest_year is None or year < earliest_year or (year == earliest_year and month < earliest_month):
-                        earliest_year = year
-                        earliest_month = month
-            
-            # If we found data in this year, we can stop early (years are scanned newest to oldest)
-            # But we need to continue to find the earliest year, so we don't stop here
-        except Exception as err:
-            _LOGGER.debug(f"Error checking year {year} from API: {err}")
-            continue
-    
-    if earliest_year and earliest_month:
-        return (earliest_year, earliest_month)
-    return None
+    # Shared concurrent scan, cached per device (one call per year at most)
+    years_with_data = await scan_years(api_client, device_id, max_years)
+    if not years_with_data:
+        return None
+    earliest_year = min(years_with_data)
+    return (earliest_year, min(years_with_data[earliest_year]))
 
 
 async def find_earliest_data_date(
@@ -0,0 +1,131 @@
+"""366-bit day bitmaps of a cached year.
+
+Bit ``n`` stands for day-of-year slot ``n`` (0 = 1 January), the slot the
+columnar year store uses, so a bitmap is a plain ``int`` and gap finding,
+coverage and "next missing day" are bit operations instead of walks over
+calendar days. Two bitmaps describe a year:
+
+- has data: days present in ``daily`` (the year store's validity bitmap)
+- confirmed empty: ``meta["empty_bitmap"]``, days the server reported empty
+
+Date strings are mapped to slots through a per-year lookup table, so no
+date parsing or ``strftime`` happens per day.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+SLOTS = 366
+
+
+@lru_cache(maxsize=16)
+def _dates(year: int) -> Tuple[str, ...]:
+    """Date string of every slot of a year."""
+    start = dt.date(year, 1, 1)
+    days = (dt.date(year + 1, 1, 1) - start).days
+    return tuple((start + dt.timedelta(days=slot)).isoformat() for slot in range(days))
+
+
+@lru_cache(maxsize=16)
+def _slots(year: int) -> Dict[str, int]:
+    return {date_str: slot for slot, date_str in enumerate(_dates(year))}
+
+
+def slot_of(date_str: str) -> Optional[int]:
+    """Slot of a ``YYYY-MM-DD`` date within its year (None if malformed)."""
+    try:
+        return _slots(int(date_str[:4])).get(date_str)
+    except (TypeError, ValueError):
+        return None
+
+
+def date_of(year: int, slot: int) -> str:
+    return _dates(year)[slot]
+
+
+def from_dates(year: int, dates: Iterable[str]) -> int:
+    """Bitmap of the dates that fall in ``year`` (others are ignored)."""
+    slots = _slots(year)
+    bits = 0
+    for date_str in dates:
+        slot = slots.get(date_str)
+        if slot is not None:
+            bits |= 1 << slot
+    return bits
+
+
+def iter_slots(bits: int, newest_first: bool = False) -> Iterator[int]:
+    """Set slots in ascending (or descending) order."""
+    if newest_first:
+        while bits:
+            slot = bits.bit_length() - 1
+            yield slot
+            bits ^= 1 << slot
+    else:
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+
+def to_dates(year: int, bits: int, newest_first: bool = False, limit: Optional[int] = None) -> List[str]:
+    """Dates of the set slots (at most ``limit``)."""
+    dates = _dates(year)
+    result: List[str] = []
+    if limit is not None and limit <= 0:
+        return result
+    for slot in iter_slots(bits, newest_first):
+        result.append(dates[slot])
+        if limit is not None and len(result) >= limit:
+            break
+    return result
+
+
+def span(year: int, start: dt.date, end: dt.date) -> int:
+    """Bitmap of the days of [start, end] (inclusive) that fall in ``year``."""
+    first = max(start, dt.date(year, 1, 1))
+    last = min(end, dt.date(year, 12, 31))
+    if first > last:
+        return 0
+    lo = (first - dt.date(year, 1, 1)).days
+    hi = (last - dt.date(year, 1, 1)).days + 1
+    return ((1 << hi) - 1) ^ ((1 << lo) - 1)
+
+
+def count(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def first_date(year: int, bits: int) -> Optional[str]:
+    return date_of(year, (bits & -bits).bit_length() - 1) if bits else None
+
+
+def last_date(year: int, bits: int) -> Optional[str]:
+    return date_of(year, bits.bit_length() - 1) if bits else None
+
+
+def missing(
+    year: int,
+    known: int,
+    start: dt.date,
+    end: dt.date,
+    newest_first: bool = False,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """Days of [start, end] in ``year`` whose bit is not set in ``known``."""
+    return to_dates(year, span(year, start, end) & ~known, newest_first, limit)
+
+
+def next_missing(year: int, known: int, after: Optional[str] = None) -> Optional[str]:
+    """First day of ``year`` after ``after`` (or from 1 January) not set in ``known``."""
+    days = len(_dates(year))
+    gaps = ((1 << days) - 1) & ~known
+    if after is not None:
+        slot = slot_of(after)
+        if slot is None:
+            return None if after >= f"{year}-12-31" else first_date(year, gaps)
+        gaps &= ~((1 << (slot + 1)) - 1)
+    return first_date(year, gaps)
@@ -0,0 +1,57 @@
+"""Persistent device info cache (HA storage) for fast startup.
+
+Device info (model, firmware versions) rarely changes, so the last successful
+``deviceManage`` response is kept in ``.storage`` per device. Setup uses the
+stored copy immediately and refreshes it from the cloud in the background
+once Home Assistant has started.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from ..const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY_FORMAT = f"{DOMAIN}.device_info.{{device_id}}"
+
+
+class DeviceInfoStore:
+    """Stored device info for one device."""
+
+    def __init__(self, hass: HomeAssistant, device_id: str) -> None:
+        self._device_id = device_id
+        self._store: Store[Dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY_FORMAT.format(device_id=device_id)
+        )
+
+    async def async_load(self) -> Optional[Dict[str, Any]]:
+        """Return the stored device info, or None if nothing usable is stored."""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.warning(f"Failed to load stored device info for {self._device_id}: {err}")
+            return None
+        if not isinstance(data, dict):
+            return None
+        info = data.get("info")
+        if not isinstance(info, dict) or not info or "_error" in info:
+            return None
+        return info
+
+    async def async_save(self, info: Dict[str, Any]) -> None:
+        """Persist a successful device info response."""
+        if not info or "_error" in info:
+            return
+        await self._store.async_save({"info": info, "updated_at": time.time()})
+
+    async def async_remove(self) -> None:
+        """Delete the stored device info (config entry removed)."""
+        await self._store.async_remove()
@@ -0,0 +1,234 @@
+"""Persisted lifetime totals per device.
+
+``TotalStatsCoordinator`` used to load up to ten year caches and sum them on
+every refresh. ``LifetimeTotals`` keeps, per device, each year's totals and
+their running sum in the store's integer units (0.1 kWh, whole VND), so
+deltas stay exact:
+
+* A year is summed once, when it is first needed, and then kept.
+* When a year changes in the shared year cache (days finalized, backfills),
+  the year cache notifies the tracker, which swaps the year's old totals
+  for its new ``yearly_total`` and applies the difference to the sum.
+* The state is written to ``{device_id}/lifetime.json`` with each year's
+  file fingerprint; after a restart only years whose file changed since
+  (or that are unsaved in memory) are summed again.
+
+A refresh therefore reads memory only, apart from a small atomic write when
+the totals changed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import atomic_file
+from . import cache as cache_io
+from .year_cache import YearCacheManager
+from .year_store import COLUMNS, SCALES, day_values, scaled
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+
+def _year_units(cache: Dict[str, Any]) -> Optional[List[int]]:
+    """Totals of a year dict in store units, or None if it has no days."""
+    daily = cache.get("daily")
+    if not daily:
+        return None
+    yearly_total = cache.get("yearly_total") or {}
+    if all(key in yearly_total for key in COLUMNS):
+        return [scaled(yearly_total[key], scale) for key, scale in zip(COLUMNS, SCALES, strict=True)]
+    # Old data without the derived totals: sum the days
+    units = [0] * len(COLUMNS)
+    for values in daily.values():
+        if isinstance(values, dict):
+            units = [
+                u + scaled(v, scale)
+                for u, v, scale in zip(units, day_values(values), SCALES, strict=True)
+            ]
+    return units
+
+
+class _DeviceTotals:
+    """Per-year totals of one device and their running sum."""
+
+    __slots__ = ("years", "fingerprints", "total", "dirty")
+
+    def __init__(self) -> None:
+        # year -> totals in store units, or None when the year has no days
+        self.years: Dict[int, Optional[List[int]]] = {}
+        self.fingerprints: Dict[int, Optional[List[int]]] = {}
+        self.total = [0] * len(COLUMNS)
+        self.dirty = False
+
+    def set_year(self, year: int, units: Optional[List[int]]) -> None:
+        old = self.years.get(year)
+        if year in self.years and old == units:
+            return
+        if old is not None:
+            self.total = [t - o for t, o in zip(self.total, old, strict=True)]
+        if units is not None:
+            self.total = [t + u for t, u in zip(self.total, units, strict=True)]
+        self.years[year] = units
+        self.fingerprints.pop(year, None)
+        self.dirty = True
+
+    def drop_year(self, year: int) -> None:
+        """Forget a year; it is summed again on the next read."""
+        if year in self.years:
+            self.set_year(year, None)
+            del self.years[year]
+
+
+class LifetimeTotals:
+    """Lifetime totals of every device, kept current by year cache notifications."""
+
+    def __init__(self, years: YearCacheManager) -> None:
+        self._year_cache = years
+        self._lock = threading.Lock()
+        self._devices: Dict[Tuple[str, str], _DeviceTotals] = {}
+        years.add_listener(self._year_changed)
+
+    def _year_changed(self, device_id: str, year: Optional[int]) -> None:
+        with self._lock:
+            state = self._devices.get((self._year_cache.root(), device_id))
+            if state is None:
+                return
+            if year is None:
+                for known in list(state.years):
+                    state.drop_year(known)
+                return
+            if year not in state.years:
+                return
+        data = self._year_cache.peek(device_id, year)
+        units = _year_units(data) if data is not None else None
+        with self._lock:
+            if data is None:
+                state.drop_year(year)
+            else:
+                state.set_year(year, units)
+
+    def _load(self, device_id: str) -> _DeviceTotals:
+        """Saved state, without years that changed since it was written."""
+        state = _DeviceTotals()
+        path = cache_io.lifetime_path(device_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") != STATE_VERSION or list(saved.get("columns", [])) != list(COLUMNS):
+                raise ValueError("incompatible lifetime totals")
+            for key, entry in saved.get("years", {}).items():
+                year = int(key)
+                fingerprint = entry.get("fingerprint")
+                if (
+                    fingerprint is None
+                    or self._year_cache.is_dirty(device_id, year)
+                    or cache_io.year_fingerprint(device_id, year) != fingerprint
+                ):
+                    continue
+                units = entry.get("totals")
+                if units is not None and len(units) != len(COLUMNS):
+                    raise ValueError(f"totals of {year} do not match the columns")
+                state.years[year] = None if units is None else [int(u) for u in units]
+                state.fingerprints[year] = fingerprint
+        except FileNotFoundError:
+            pass
+        except Exception as err:
+            _LOGGER.warning(f"Ignoring lifetime totals {path}: {err}")
+            state = _DeviceTotals()
+        for units in state.years.values():
+            if units is not None:
+                state.total = [t + u for t, u in zip(state.total, units, strict=True)]
+        return state
+
+    def _save(self, device_id: str, state: _DeviceTotals) -> None:
+        """Write the state (file I/O happens without the lock held)."""
+        with self._lock:
+            years = dict(state.years)
+            fingerprints = dict(state.fingerprints)
+            state.dirty = False
+        for year in years:
+            # A year with unsaved changes is summed again after a restart
+            if fingerprints.get(year) is None and not self._year_cache.is_dirty(device_id, year):
+                fingerprints[year] = cache_io.year_fingerprint(device_id, year)
+        payload = {
+            "version": STATE_VERSION,
+            "columns": list(COLUMNS),
+            "years": {
+                str(year): {"totals": units, "fingerprint": fingerprints.get(year)}
+                for year, units in years.items()
+            },
+        }
+        try:
+            atomic_file.write_atomic(
+                cache_io.lifetime_path(device_id), json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            )
+        except OSError as err:
+            _LOGGER.warning(f"Failed to save lifetime totals for {device_id}: {err}")
+            with self._lock:
+                state.dirty = True
+            return
+        with self._lock:
+            for year, units in years.items():
+                fingerprint = fingerprints.get(year)
+                if fingerprint is not None and state.years.get(year, ()) is units:
+                    state.fingerprints.setdefault(year, fingerprint)
+
+    def read(self, device_id: str, first_year: int, last_year: int) -> Dict[str, Any]:
+        """Totals over [first_year, last_year]. Blocking (run in the executor).
+
+        Years not summed yet are read once; after that this only reads memory.
+
+        Returns:
+            {"totals": {metric: value}, "years": [years with data]}
+        """
+        key = (self._year_cache.root(), device_id)
+        with self._lock:
+            state = self._devices.get(key)
+        if state is None:
+            state = self._load(device_id)
+            with self._lock:
+                state = self._devices.setdefault(key, state)
+
+        window = range(first_year, last_year + 1)
+        with self._lock:
+            missing = [year for year in window if year not in state.years]
+            outside = [year for year in state.years if year not in window]
+            for year in outside:
+                state.drop_year(year)
+        for year in missing:
+            with self._year_cache.acquire(device_id, year) as handle:
+                units = _year_units(handle.data)
+            with self._lock:
+                if year not in state.years:
+                    state.set_year(year, units)
+
+        with self._lock:
+            total = list(state.total)
+            years = sorted(year for year, units in state.years.items() if units is not None)
+            needs_save = state.dirty
+        if needs_save:
+            self._save(device_id, state)
+        return {
+            "totals": {key: units / scale for key, units, scale in zip(COLUMNS, total, SCALES, strict=True)},
+            "years": years,
+        }
+
+    def close(self, device_id: str) -> None:
+        """Save and drop a device's state (entry unload, after the year cache was flushed).
+
+        Years are clean by then, so every year gets its fingerprint and is
+        not summed again on the next start.
+        """
+        with self._lock:
+            state = self._devices.pop((self._year_cache.root(), device_id), None)
+        if state is not None and (state.dirty or len(state.fingerprints) < len(state.years)):
+            self._save(device_id, state)
+
+
+# Shared by every device in the process
+LIFETIME_TOTALS = LifetimeTotals(cache_io.YEAR_CACHE)
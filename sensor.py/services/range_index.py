@@ -0,0 +1,210 @@
+"""Prefix-sum index for date-range energy totals.
+
+For every indexed device-year the index keeps, per metric, the running sum
+over the year's 366 day slots (plus a running count of cached days), in the
+store's integer units (0.1 kWh, whole VND) so sums stay exact. The total of
+[start, end] inside one year is ``prefix[end + 1] - prefix[start]``; for a
+range spanning years the whole years in between come from a running sum
+over year totals. After the years involved are indexed, any query costs a
+fixed number of lookups regardless of its length.
+
+Years are built from the shared year cache (``YearCacheManager``) on first
+use. The cache notifies the index when a year changes (``update_daily``
+through ``save_year`` or a transaction); an indexed year is then patched
+from its first changed day onward, and the running sums over whole years
+are shifted by the year's change, so queries never wait for a rebuild.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import threading
+from array import array
+from itertools import accumulate, islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import day_bitmap
+from .year_cache import YearCacheManager
+from .year_store import COLUMNS, SCALES, SLOTS, day_values, scaled
+
+# Row of the day count in a year's prefix table (after the metric rows)
+_DAYS_ROW = len(COLUMNS)
+
+# (cache root, device_id, year), as in YearCacheManager
+_Key = Tuple[str, str, int]
+
+
+def _slot_rows(year: int, cache: Dict[str, Any]) -> List[List[int]]:
+    """Per-slot values of every metric and a row of 1s for the cached days."""
+    rows = [[0] * SLOTS for _ in range(len(COLUMNS) + 1)]
+    prefix = f"{year}-"
+    for date_str, values in cache.get("daily", {}).items():
+        if not isinstance(values, dict) or not str(date_str).startswith(prefix):
+            continue
+        slot = day_bitmap.slot_of(date_str)
+        if slot is None:
+            continue
+        for row, scale, value in zip(rows[:_DAYS_ROW], SCALES, day_values(values), strict=True):
+            row[slot] = scaled(value, scale)
+        rows[_DAYS_ROW][slot] = 1
+    return rows
+
+
+def _build_prefix(year: int, cache: Dict[str, Any]) -> List[array]:
+    """Running sums (length ``SLOTS + 1``) of every metric and the day count."""
+    return [array("q", accumulate(row, initial=0)) for row in _slot_rows(year, cache)]
+
+
+def _patch_prefix(prefix: List[array], rows: List[List[int]]) -> List[array]:
+    """``prefix`` updated to the slot values ``rows``; rows without changes are reused."""
+    patched = []
+    for sums, values in zip(prefix, rows, strict=True):
+        first = next((slot for slot in range(SLOTS) if sums[slot + 1] - sums[slot] != values[slot]), None)
+        if first is None:
+            patched.append(sums)
+            continue
+        row = sums[: first + 1]
+        row.extend(islice(accumulate(values[first:], initial=sums[first]), 1, None))
+        patched.append(row)
+    return patched
+
+
+class RangeIndex:
+    """Constant-time range totals over the year caches of every device."""
+
+    def __init__(self, years: YearCacheManager) -> None:
+        self._years = years
+        self._lock = threading.Lock()
+        self._prefix: Dict[_Key, List[array]] = {}
+        # Bumped on every change, so a build racing a change is not kept
+        self._generation: Dict[_Key, int] = {}
+        # (root, device) -> (first year, running sums of whole years before first + i)
+        self._cumulative: Dict[Tuple[str, str], Tuple[int, List[List[int]]]] = {}
+        # Bumped on every change of a device, so running sums built meanwhile are not kept
+        self._device_generation: Dict[Tuple[str, str], int] = {}
+        years.add_listener(self._year_changed)
+
+    def _year_changed(self, device_id: str, year: Optional[int]) -> None:
+        if year is None or not self._patch(device_id, year):
+            self.invalidate(device_id, year)
+
+    def _patch(self, device_id: str, year: int) -> bool:
+        """Update an indexed year to its current contents; False if it must be rebuilt."""
+        root = self._years.root()
+        key, device_key = (root, device_id, year), (root, device_id)
+        with self._lock:
+            prefix = self._prefix.get(key)
+            generation = self._generation.get(key, 0)
+            device_generation = self._device_generation.get(device_key, 0)
+        data = self._years.peek(device_id, year) if prefix is not None else None
+        if prefix is None or data is None:
+            return False
+        patched = _patch_prefix(prefix, _slot_rows(year, data))
+        with self._lock:
+            if (
+                self._generation.get(key, 0) != generation
+                or self._device_generation.get(device_key, 0) != device_generation
+            ):
+                # Changed again meanwhile
+                return False
+            self._prefix[key] = patched
+            self._generation[key] = generation + 1
+            self._device_generation[device_key] = device_generation + 1
+            cached = self._cumulative.get(device_key)
+            if cached is not None and cached[0] <= year:
+                # sums[i] covers the years first .. first + i - 1
+                first, sums = cached
+                delta = [new[-1] - old[-1] for new, old in zip(patched, prefix, strict=True)]
+                shift = year - first + 1
+                self._cumulative[device_key] = (
+                    first,
+                    sums[:shift] + [[s + d for s, d in zip(row, delta, strict=True)] for row in sums[shift:]],
+                )
+        return True
+
+    def invalidate(self, device_id: str, year: Optional[int] = None) -> None:
+        """Drop a year (or all years) of a device; rebuilt on the next query."""
+        root = self._years.root()
+        with self._lock:
+            keys = [
+                key for key in self._prefix
+                if key[0] == root and key[1] == device_id and (year is None or key[2] == year)
+            ]
+            if year is not None:
+                keys.append((root, device_id, year))
+            for key in keys:
+                self._prefix.pop(key, None)
+                self._generation[key] = self._generation.get(key, 0) + 1
+            self._cumulative.pop((root, device_id), None)
+            self._device_generation[(root, device_id)] = self._device_generation.get((root, device_id), 0) + 1
+
+    def _year(self, device_id: str, year: int) -> List[array]:
+        key = (self._years.root(), device_id, year)
+        with self._lock:
+            prefix = self._prefix.get(key)
+            generation = self._generation.get(key, 0)
+        if prefix is not None:
+            return prefix
+        with self._years.acquire(device_id, year) as handle:
+            prefix = _build_prefix(year, handle.data)
+        with self._lock:
+            if self._generation.get(key, 0) == generation:
+                self._prefix[key] = prefix
+        return prefix
+
+    def _years_between(self, device_id: str, first: int, last: int) -> List[int]:
+        """Sum of whole years [first, last] (inclusive)."""
+        key = (self._years.root(), device_id)
+        with self._lock:
+            cached = self._cumulative.get(key)
+            generation = self._device_generation.get(key, 0)
+        if cached is None or cached[0] > first or cached[0] + len(cached[1]) - 1 < last + 1:
+            start = first if cached is None else min(first, cached[0])
+            end = last if cached is None else max(last, cached[0] + len(cached[1]) - 2)
+            running = [0] * (len(COLUMNS) + 1)
+            sums = [list(running)]
+            for year in range(start, end + 1):
+                running = [r + row[-1] for r, row in zip(running, self._year(device_id, year), strict=True)]
+                sums.append(running)
+            cached = (start, sums)
+            with self._lock:
+                if self._device_generation.get(key, 0) == generation:
+                    self._cumulative[key] = cached
+        start, sums = cached
+        return [b - a for a, b in zip(sums[first - start], sums[last + 1 - start], strict=True)]
+
+    def totals(
+        self, device_id: str, start: dt.date, end: dt.date, metrics: Optional[Iterable[str]] = None
+    ) -> Dict[str, float]:
+        """Sum of the metrics over [start, end] (inclusive), plus the number of cached days.
+
+        Raises:
+            ValueError: Unknown metric
+        """
+        rows = list(range(len(COLUMNS))) if metrics is None else [_metric_row(m) for m in metrics]
+        raw = [0] * (len(COLUMNS) + 1)
+        if start <= end:
+            first_slot = (start - dt.date(start.year, 1, 1)).days
+            last_slot = (end - dt.date(end.year, 1, 1)).days
+            if start.year == end.year:
+                prefix = self._year(device_id, start.year)
+                raw = [row[last_slot + 1] - row[first_slot] for row in prefix]
+            else:
+                head = self._year(device_id, start.year)
+                tail = self._year(device_id, end.year)
+                raw = [h[-1] - h[first_slot] + t[last_slot + 1] for h, t in zip(head, tail, strict=True)]
+                if end.year - start.year > 1:
+                    middle = self._years_between(device_id, start.year + 1, end.year - 1)
+                    raw = [r + m for r, m in zip(raw, middle, strict=True)]
+        result: Dict[str, float] = {
+            COLUMNS[k]: round(raw[k] / SCALES[k], 0 if COLUMNS[k] == "savings_vnd" else 1) for k in rows
+        }
+        result["days"] = raw[_DAYS_ROW]
+        return result
+
+
+def _metric_row(metric: str) -> int:
+    try:
+        return COLUMNS.index(metric)
+    except ValueError:
+        raise ValueError(f"unknown metric {metric!r} (expected one of {', '.join(COLUMNS)})") from None
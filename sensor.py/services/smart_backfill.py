@@ -4,14 +4,25 @@ from __future__ import annotations
 import asyncio
 import datetime as dt
 import logging
-from typing import Dict, Any, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple, Optional
 import time
 
 from . import cache as cache_io
+from ..const import BACKFILL_CONCURRENCY, DEFAULT_TARIFF_VND_PER_KWH
 from ..core.api_client import LumentreeHttpApiClient
+from ..core.exceptions import CircuitOpenException
+from ..core.limiter import RequestPriority, create_task_with_priority
+from .year_scan import scan_years
+
+if TYPE_CHECKING:
+    from .backfill_jobs import BackfillProgress
 
 _LOGGER = logging.getLogger(__name__)
 
+# One getMonthData request per month; months of all years share this window
+SMART_BACKFILL_CONCURRENCY = BACKFILL_CONCURRENCY * 2
+SMART_BACKFILL_CIRCUIT_RETRIES = 3
+
 
 async def detect_data_gaps_from_api(
     api_client: LumentreeHttpApiClient,
@@ -19,6 +30,8 @@ async def detect_data_gaps_from_api(
     max_years: int = 10
 ) -> Dict[int, List[int]]:
     """Detect which months have data using getYearData API (fast scan).
+
+    Years are scanned concurrently and cached per device (see year_scan).
     
     Args:
         api_client: API client
@@ -28,40 +41,9 @@ async def detect_data_gaps_from_api(
     Returns:
         Dictionary mapping year to list of months (1-12) that have data
     """
-    today = dt.date.today()
-    years_with_data: Dict[int, List[int]] = {}
-    
-    for year_offset in range(max_years):
-        year = today.year - year_offset
-        if year < 2000:
-            break
-        
-        try:
-            year_data = await api_client.get_year_data(device_id, year)
-            
-            # Check which months have data
-            months_with_data = []
-            pv_data = year_data.get("pv", [0.0] * 12)
-            grid_data = year_data.get("grid", [0.0] * 12)
-            load_data = year_data.get("homeload", [0.0] * 12)
-            
-            for month_idx in range(12):
-                month = month_idx + 1
-                has_data = (
-                    pv_data[month_idx] > 0.0 or
-                    grid_data[month_idx] > 0.0 or
-                    load_data[month_idx] > 0.0
-                )
-                if has_data:
-                    months_with_data.append(month)
-            
-            if months_with_data:
-                years_with_data[year] = months_with_data
-                _LOGGER.debug(f"Year {year} has data in months: {months_with_data}")
-        except Exception as err:
-            _LOGGER.debug(f"Error checking year {year} from API: {err}")
-            continue
-    
+    years_with_data = await scan_years(api_client, device_id, max_years)
+    for year, months in years_with_data.items():
+        _LOGGER.debug(f"Year {year} has data in months: {months}")
     return years_with_data
 
 
@@ -86,95 +68,121 @@ async def backfill_month_from_api(
     """
     try:
         month_data = await api_client.get_month_data(device_id, year, month)
+        return apply_month_data(cache, year, month, month_data)
+    except Exception as err:
+        _LOGGER.error(f"Error backfilling month {year}-{month:02d}: {err}")
+        return 0, 0
+
+
+def apply_month_data(
+    cache: Dict[str, Any],
+    year: int,
+    month: int,
+    month_data: Dict[str, List[float]]
+) -> Tuple[int, int]:
+    """Write a getMonthData response into a year cache.
+
+    Days that already have data are kept.
+
+    Args:
+        cache: Cache dictionary to update
+        year: Year
+        month: Month (1-12)
+        month_data: Daily arrays (kWh) from get_month_data
+
+    Returns:
+        Tuple of (days_added, days_updated)
+    """
+    # Get daily arrays from API
+    pv_daily = month_data.get("pv", [])
+    grid_daily = month_data.get("grid", [])
+    load_daily = month_data.get("homeload", [])
+    essential_daily = month_data.get("essentialLoad", [])
+    bat_daily = month_data.get("bat", [])
+    batf_daily = month_data.get("batF", [])
+    
+    days_added = 0
+    days_updated = 0
+    
+    # Get number of days in month
+    import calendar
+    days_in_month = calendar.monthrange(year, month)[1]
+    
+    # Process each day
+    daily = cache.setdefault("daily", {})
+    today_str = dt.date.today().isoformat()
+    for day in range(1, min(len(pv_daily), days_in_month) + 1):
+        date_str = f"{year}-{month:02d}-{day:02d}"
         
-        # Get daily arrays from API
-        pv_daily = month_data.get("pv", [])
-        grid_daily = month_data.get("grid", [])
-        load_daily = month_data.get("homeload", [])
-        essential_daily = month_data.get("essentialLoad", [])
-        bat_daily = month_data.get("bat", [])
-        batf_daily = month_data.get("batF", [])
-        
-        days_added = 0
-        days_updated = 0
-        
-        # Get number of days in month
-        import calendar
-        days_in_month = calendar.monthrange(year, month)[1]
-        
-        # Process each day
-        daily = cache.setdefault("daily", {})
-        for day in range(1, min(len(pv_daily), days_in_month) + 1):
-            date_str = f"{year}-{month:02d}-{day:02d}"
+        # Check if day already exists and has data
+        existing = daily.get(date_str)
+        if existing:
+            # Check if existing has real data
+            has_existing_data = any(
+                float(existing.get(key, 0.0)) > 0.0
+                for key in ["pv", "grid", "load", "essential"]
+            )
             
-            # Check if day already exists and has data
-            existing = daily.get(date_str)
-            if existing:
-                # Check if existing has real data
-                has_existing_data = any(
-                    float(existing.get(key, 0.0)) > 0.0
-                    for key in ["pv", "grid", "load", "essential"]
-                )
-                
-                # Check if API has data for this day
-                has_api_data = (
-                    day <= len(pv_daily) and pv_daily[day - 1] > 0.0 or
-                    day <= len(grid_daily) and grid_daily[day - 1] > 0.0 or
-                    day <= len(load_daily) and load_daily[day - 1] > 0.0
-                )
-                
-                # Only update if API has data and existing doesn't
-                if has_api_data and not has_existing_data:
-                    days_updated += 1
-                else:
-                    continue  # Skip if already has data
-            else:
-                days_added += 1
-            
-            # Extract values for this day
-            pv_val = pv_daily[day - 1] if day <= len(pv_daily) else 0.0
-            grid_val = grid_daily[day - 1] if day <= len(grid_daily) else 0.0
-            load_val = load_daily[day - 1] if day <= len(load_daily) else 0.0
-            essential_val = essential_daily[day - 1] if day <= len(essential_daily) else 0.0
-            charge_val = bat_daily[day - 1] if day <= len(bat_daily) else 0.0
-            discharge_val = batf_daily[day - 1] if day <= len(batf_daily) else 0.0
+            # Check if API has data for this day
+            has_api_data = (
+                day <= len(pv_daily) and pv_daily[day - 1] > 0.0 or
+                day <= len(grid_daily) and grid_daily[day - 1] > 0.0 or
+                day <= len(load_daily) and load_daily[day - 1] > 0.0
+            )
             
-            # Calculate derived values
-            total_load_val = round(load_val + essential_val, 1)
-            saved_kwh = max(0.0, total_load_val - grid_val)
-            from ..const import DEFAULT_TARIFF_VND_PER_KWH
-            savings_vnd = round(saved_kwh * DEFAULT_TARIFF_VND_PER_KWH, 0)
-            
-            # Update cache
-            daily[date_str] = {
-                "pv": round(pv_val, 1),
-                "grid": round(grid_val, 1),
-                "load": round(load_val, 1),
-                "essential": round(essential_val, 1),
-                "total_load": total_load_val,
-                "charge": round(charge_val, 1),
-                "discharge": round(discharge_val, 1),
-                "saved_kwh": round(saved_kwh, 1),
-                "savings_vnd": savings_vnd,
-            }
+            # Only update if API has data and existing doesn't
+            if has_api_data and not has_existing_data:
+                days_updated += 1
+            else:
+                continue  # Skip if already has data
+        else:
+            days_added += 1
         
-        return days_added, days_updated
-    except Exception as err:
-        _LOGGER.error(f"Error backfilling month {year}-{month:02d}: {err}")
-        return 0, 0
+        # Extract values for this day
+        pv_val = pv_daily[day - 1] if day <= len(pv_daily) else 0.0
+        grid_val = grid_daily[day - 1] if day <= len(grid_daily) else 0.0
+        load_val = load_daily[day - 1] if day <= len(load_daily) else 0.0
+        essential_val = essential_daily[day - 1] if day <= len(essential_daily) else 0.0
+        charge_val = bat_daily[day - 1] if day <= len(bat_daily) else 0.0
+        discharge_val = batf_daily[day - 1] if day <= len(batf_daily) else 0.0
+        
+        # Calculate derived values
+        total_load_val = round(load_val + essential_val, 1)
+        saved_kwh = max(0.0, total_load_val - grid_val)
+        savings_vnd = round(saved_kwh * DEFAULT_TARIFF_VND_PER_KWH, 0)
+        
+        # Update cache
+        daily[date_str] = {
+            "pv": round(pv_val, 1),
+            "grid": round(grid_val, 1),
+            "load": round(load_val, 1),
+            "essential": round(essential_val, 1),
+            "total_load": total_load_val,
+            "charge": round(charge_val, 1),
+            "discharge": round(discharge_val, 1),
+            "saved_kwh": round(saved_kwh, 1),
+            "savings_vnd": savings_vnd,
+        }
+        # Today's values are still partial
+        if date_str >= today_str:
+            cache_io.mark_dirty(cache, date_str)
+    
+    return days_added, days_updated
 
 
 async def smart_backfill(
     hass,
     aggregator,
     max_years: int = 10,
-    optimize_cache: bool = True
+    optimize_cache: bool = True,
+    progress: Optional[BackfillProgress] = None,
 ) -> Dict[str, Any]:
     """Smart backfill using getYearData/getMonthData APIs for optimal performance.
     
     Strategy:
     1. Use getYearData to quickly identify which years/months have data
-    2. Use getMonthData to backfill months that have data (much faster than daily)
+    2. Use getMonthData to backfill months that have data (much faster than daily),
+       several months in flight at once
     3. Only backfill missing days, skip if already has data
     4. Auto-optimize cache after backfill
     
@@ -183,6 +191,8 @@ async def smart_backfill(
         aggregator: StatsAggregator instance
         max_years: Maximum years to backfill
         optimize_cache: If True, optimize cache after backfill
+        progress: Job progress handle (checkpoints, pause); saved years are
+            skipped when a job resumes
         
     Returns:
         Dictionary with backfill statistics
@@ -212,51 +222,111 @@ async def smart_backfill(
     # Step 2: Backfill months that have data using getMonthData
     _LOGGER.info("Step 2: Backfilling months with data using getMonthData API...")
     
-    for year, months in sorted(years_with_data.items(), reverse=True):
-        _LOGGER.info(f"Processing year {year} ({len(months)} months with data)")
-        
-        # Load cache for this year
-        cache = await hass.async_add_executor_job(cache_io.load_year, device_id, year)
-        cache_dirty = False
-        
-        for month in sorted(months):
-            try:
-                days_added, days_updated = await backfill_month_from_api(
-                    api_client, device_id, year, month, cache
-                )
-                
-                if days_added > 0 or days_updated > 0:
-                    cache_dirty = True
-                    stats["days_added"] += days_added
-                    stats["days_updated"] += days_updated
-                    stats["months_processed"] += 1
-                    _LOGGER.debug(
-                        f"Month {year}-{month:02d}: added {days_added}, updated {days_updated}"
-                    )
-                
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.1)
-            except Exception as err:
-                _LOGGER.error(f"Error backfilling {year}-{month:02d}: {err}")
-                stats["errors"] += 1
-        
-        # Save cache if modified
-        if cache_dirty:
-            # Recompute aggregates
-            cache = cache_io.recompute_aggregates(cache)
-            await hass.async_add_executor_job(cache_io.save_year, device_id, year, cache)
+    # Months are fetched concurrently (newest first) and applied to their year's
+    # cache as they arrive, each in its own short transaction so coordinators
+    # writing the same year meanwhile are not overwritten; the write-behind
+    # cache coalesces them into one disk write
+    done_years: List[int] = progress.state.setdefault("done_years", []) if progress is not None else []
+    if done_years:
+        _LOGGER.info(f"Resuming smart backfill, years already saved: {done_years}")
+        years_with_data = {y: m for y, m in years_with_data.items() if y not in done_years}
+    jobs: List[Tuple[int, int]] = [
+        (year, month)
+        for year, months in sorted(years_with_data.items(), reverse=True)
+        for month in sorted(months)
+    ]
+    remaining: Dict[int, int] = {year: len(months) for year, months in years_with_data.items()}
+    started: set[int] = set()
+    dirty: set[int] = set()
+    circuit_retries: Dict[Tuple[int, int], int] = {}
+    pending: Dict[asyncio.Task, Tuple[int, int]] = {}
+
+    async def _apply_month(year: int, month: int, month_data: Dict[str, Any]) -> Tuple[int, int]:
+        async with cache_io.YEAR_CACHE.year(device_id, year) as tx:
+            days_added, days_updated = apply_month_data(tx.data, year, month, month_data)
+            if days_added > 0 or days_updated > 0:
+                # apply_month_data writes days directly; rebuild the aggregates
+                cache_io.recompute_aggregates(tx.data)
+            else:
+                tx.rollback()
+        return days_added, days_updated
+
+    async def _finish_year(year: int) -> None:
+        if year in dirty:
             stats["years_processed"] += 1
-            _LOGGER.info(f"Saved cache for year {year}")
-    
+            _LOGGER.info(f"Updated cache for year {year}")
+        if progress is not None:
+            done_years.append(year)
+            progress.update(str(year), years=1)
+            # The cursor may only move past years that are on disk
+            await cache_io.YEAR_CACHE.async_flush(device_id)
+            await progress.checkpoint()
+
+    try:
+        while jobs or pending:
+            while jobs and len(pending) < SMART_BACKFILL_CONCURRENCY:
+                year, month = jobs.pop(0)
+                if year not in started:
+                    started.add(year)
+                    _LOGGER.info(f"Processing year {year} ({remaining[year]} months with data)")
+                task = create_task_with_priority(
+                    api_client.get_month_data(device_id, year, month), RequestPriority.HISTORY
+                )
+                pending[task] = (year, month)
+
+            finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                year, month = pending.pop(task)
+                exc = task.exception()
+                if isinstance(exc, CircuitOpenException):
+                    attempts = circuit_retries.get((year, month), 0) + 1
+                    circuit_retries[(year, month)] = attempts
+                    if attempts <= SMART_BACKFILL_CIRCUIT_RETRIES:
+                        # Retried after the outage instead of counted as a month without data
+                        jobs.insert(0, (year, month))
+                        continue
+                if exc is not None:
+                    _LOGGER.error(f"Error backfilling {year}-{month:02d}: {exc}")
+                    stats["errors"] += 1
+                    if progress is not None:
+                        progress.record_error(f"{year}-{month:02d}: {exc}")
+                else:
+                    days_added, days_updated = await _apply_month(year, month, task.result())
+                    if days_added > 0 or days_updated > 0:
+                        dirty.add(year)
+                        stats["days_added"] += days_added
+                        stats["days_updated"] += days_updated
+                        stats["months_processed"] += 1
+                        if progress is not None:
+                            progress.update(days_added=days_added, days_updated=days_updated)
+                        _LOGGER.debug(
+                            f"Month {year}-{month:02d}: added {days_added}, updated {days_updated}"
+                        )
+                remaining[year] -= 1
+                if progress is not None:
+                    progress.update(f"{year}-{month:02d}", months=1)
+                if remaining[year] == 0:
+                    await _finish_year(year)
+
+            if progress is not None and progress.checkpoint_due:
+                # Unsaved years are re-fetched after a restart; this only records progress / pauses
+                await progress.checkpoint()
+            if jobs and jobs[0] in circuit_retries:
+                # Pause during an API outage instead of failing every month
+                await api_client.wait_for_circuit()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
     # Step 3: Optimize cache if requested
     if optimize_cache:
         _LOGGER.info("Step 3: Optimizing cache...")
         try:
             from . import cache_optimizer
             for year in stats["years_with_data"]:
-                result = await hass.async_add_executor_job(
-                    cache_optimizer.optimize_year_cache, device_id, year, False
-                )
+                result = await cache_optimizer.async_optimize_year_cache(device_id, year)
                 if result["status"] == "optimized":
                     _LOGGER.info(
                         f"Optimized year {year}: removed {result['removed']} empty days, "
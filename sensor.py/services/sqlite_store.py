@@ -0,0 +1,247 @@
+"""Optional SQLite backend for the statistics cache.
+
+All devices share one database file (``.storage/lumentree_stats/stats.db``)
+and one connection, opened in WAL mode. Days live in a ``daily`` table keyed
+by (device_id, date); ``monthly`` holds materialized per-month rollups that
+are refreshed whenever a year is saved, so range sums only touch whole-month
+rows plus the partial months at both ends. ``year_meta`` keeps the year's
+``meta`` (coverage, empty and dirty dates) as JSON.
+
+The connection is used from executor threads only (``services.cache`` runs
+there) and serialized with a lock.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from .year_store import COLUMNS, day_values
+
+_LOGGER = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_METRIC_COLUMNS = ", ".join(f'"{key}"' for key in COLUMNS)
+_METRIC_DEFS = ", ".join(f'"{key}" REAL NOT NULL DEFAULT 0' for key in COLUMNS)
+_METRIC_SUMS = ", ".join(f'SUM("{key}")' for key in COLUMNS)
+_PLACEHOLDERS = ", ".join("?" for _ in COLUMNS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS daily (
+    device_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    {_METRIC_DEFS},
+    PRIMARY KEY (device_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS monthly (
+    device_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    {_METRIC_DEFS},
+    PRIMARY KEY (device_id, month)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS year_meta (
+    device_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    meta TEXT NOT NULL,
+    PRIMARY KEY (device_id, year)
+) WITHOUT ROWID;
+"""
+
+# Statements are reused from the connection's prepared statement cache
+_SQL_SELECT_YEAR = f"SELECT date, {_METRIC_COLUMNS} FROM daily WHERE device_id = ? AND date BETWEEN ? AND ? ORDER BY date"
+_SQL_SELECT_META = "SELECT meta FROM year_meta WHERE device_id = ? AND year = ?"
+_SQL_DELETE_DAYS = "DELETE FROM daily WHERE device_id = ? AND date BETWEEN ? AND ?"
+_SQL_INSERT_DAY = f"INSERT OR REPLACE INTO daily (device_id, date, {_METRIC_COLUMNS}) VALUES (?, ?, {_PLACEHOLDERS})"
+_SQL_DELETE_MONTHS = "DELETE FROM monthly WHERE device_id = ? AND month BETWEEN ? AND ?"
+_SQL_ROLLUP = (
+    f"INSERT INTO monthly (device_id, month, days, {_METRIC_COLUMNS}) "
+    f"SELECT device_id, substr(date, 1, 7), COUNT(*), {_METRIC_SUMS} FROM daily "
+    "WHERE device_id = ? AND date BETWEEN ? AND ? GROUP BY substr(date, 1, 7)"
+)
+_SQL_UPSERT_META = "INSERT OR REPLACE INTO year_meta (device_id, year, meta) VALUES (?, ?, ?)"
+_SQL_SUM_DAYS = f"SELECT COUNT(*), {_METRIC_SUMS} FROM daily WHERE device_id = ? AND date BETWEEN ? AND ?"
+_SQL_SUM_MONTHS = f"SELECT SUM(days), {_METRIC_SUMS} FROM monthly WHERE device_id = ? AND month BETWEEN ? AND ?"
+_SQL_FIRST_DATE = (
+    "SELECT date FROM daily WHERE device_id = ? AND date >= ? AND "
+    '("pv" > 0 OR "grid" > 0 OR "load" > 0 OR "essential" > 0 OR "charge" > 0 OR "discharge" > 0) '
+    "ORDER BY date LIMIT 1"
+)
+_SQL_YEARS = "SELECT year FROM year_meta WHERE device_id = ? ORDER BY year"
+_SQL_PURGE_YEAR = "DELETE FROM year_meta WHERE device_id = ? AND year = ?"
+
+# Keys rebuilt from the daily table
+_DERIVED_KEYS = ("daily", "monthly", "yearly_total")
+
+
+class StatsDatabase:
+    """Shared SQLite statistics database (one per file, used by every device)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def has_year(self, device_id: str, year: int) -> bool:
+        with self._lock:
+            return self._conn.execute(_SQL_SELECT_META, (device_id, year)).fetchone() is not None
+
+    def years(self, device_id: str) -> List[int]:
+        """Years stored for a device."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(_SQL_YEARS, (device_id,))]
+
+    def load_year(self, device_id: str, year: int) -> Optional[Dict[str, Any]]:
+        """Daily rows and meta of one year, or None if the year was never saved.
+
+        Aggregates are left to the caller (``recompute_aggregates``).
+        """
+        with self._lock:
+            meta_row = self._conn.execute(_SQL_SELECT_META, (device_id, year)).fetchone()
+            if meta_row is None:
+                return None
+            rows = self._conn.execute(
+                _SQL_SELECT_YEAR, (device_id, f"{year}-01-01", f"{year}-12-31")
+            ).fetchall()
+        cache = json.loads(meta_row[0])
+        cache["daily"] = {row[0]: dict(zip(COLUMNS, row[1:], strict=True)) for row in rows}
+        return cache
+
+    def save_year(self, device_id: str, year: int, cache: Dict[str, Any]) -> None:
+        """Replace one year's days and meta, then refresh its monthly rollups."""
+        first, last = f"{year}-01-01", f"{year}-12-31"
+        rows = [
+            (device_id, date_str, *day_values(values))
+            for date_str, values in cache.get("daily", {}).items()
+            if first <= date_str <= last and isinstance(values, dict)
+        ]
+        meta = {key: value for key, value in cache.items() if key not in _DERIVED_KEYS}
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(_SQL_DELETE_DAYS, (device_id, first, last))
+                conn.executemany(_SQL_INSERT_DAY, rows)
+                conn.execute(_SQL_DELETE_MONTHS, (device_id, f"{year}-01", f"{year}-12"))
+                conn.execute(_SQL_ROLLUP, (device_id, first, last))
+                conn.execute(_SQL_UPSERT_META, (device_id, year, json.dumps(meta, ensure_ascii=False)))
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def purge_year(self, device_id: str, year: int) -> bool:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.execute(_SQL_PURGE_YEAR, (device_id, year))
+                conn.execute(_SQL_DELETE_DAYS, (device_id, f"{year}-01-01", f"{year}-12-31"))
+                conn.execute(_SQL_DELETE_MONTHS, (device_id, f"{year}-01", f"{year}-12"))
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return cur.rowcount > 0
+
+    def purge_device(self, device_id: str) -> bool:
+        years = self.years(device_id)
+        for year in years:
+            self.purge_year(device_id, year)
+        return bool(years)
+
+    def range_totals(self, device_id: str, start: dt.date, end: dt.date) -> Dict[str, float]:
+        """Sum of every metric over [start, end] (inclusive).
+
+        Whole months come from the rollup table, the partial months at both
+        ends from an index range scan of ``daily``.
+        """
+        totals = [0.0] * len(COLUMNS)
+        days = 0
+        with self._lock:
+            for kind, lo, hi in _split_range(start, end):
+                sql = _SQL_SUM_MONTHS if kind == "months" else _SQL_SUM_DAYS
+                row = self._conn.execute(sql, (device_id, lo, hi)).fetchone()
+                if not row or not row[0]:
+                    continue
+                days += row[0]
+                totals = [t + (v or 0.0) for t, v in zip(totals, row[1:], strict=True)]
+        result = {
+            key: round(value, 0 if key == "savings_vnd" else 1) for key, value in zip(COLUMNS, totals, strict=True)
+        }
+        result["days"] = days
+        return result
+
+    def first_data_date(self, device_id: str, since: str = "") -> Optional[str]:
+        """Earliest day (on or after ``since``) with any non-zero energy value."""
+        with self._lock:
+            row = self._conn.execute(_SQL_FIRST_DATE, (device_id, since)).fetchone()
+        return row[0] if row else None
+
+
+def _split_range(start: dt.date, end: dt.date) -> List[tuple]:
+    """Split [start, end] into partial-month day ranges and one whole-month range."""
+    if start > end:
+        return []
+    first_full = start if start.day == 1 else _next_month(start)
+    after_last_full = _next_month(end) if _next_month(end) - dt.timedelta(days=1) == end else end.replace(day=1)
+    if first_full >= after_last_full:
+        return [("days", start.isoformat(), end.isoformat())]
+    parts = []
+    if start < first_full:
+        parts.append(("days", start.isoformat(), (first_full - dt.timedelta(days=1)).isoformat()))
+    last_full = after_last_full - dt.timedelta(days=1)
+    parts.append(("months", first_full.strftime("%Y-%m"), last_full.strftime("%Y-%m")))
+    if after_last_full <= end:
+        parts.append(("days", after_last_full.isoformat(), end.isoformat()))
+    return parts
+
+
+def _next_month(day: dt.date) -> dt.date:
+    return dt.date(day.year + 1, 1, 1) if day.month == 12 else dt.date(day.year, day.month + 1, 1)
+
+
+# path -> open database, and the devices using it; entries are set up and
+# torn down from executor threads, so both maps change under the lock
+_databases: Dict[str, StatsDatabase] = {}
+_users: Dict[str, set] = {}
+_databases_lock = threading.Lock()
+
+
+def acquire_database(path: str, device_id: str) -> StatsDatabase:
+    """Open (or share) the database at ``path`` for a device."""
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = _databases[path] = StatsDatabase(path)
+        _users.setdefault(path, set()).add(device_id)
+        return db
+
+
+def release_database(path: str, device_id: str) -> None:
+    """Stop using the database; it is closed when no device uses it."""
+    with _databases_lock:
+        users = _users.get(path)
+        if users is None:
+            return
+        users.discard(device_id)
+        if users:
+            return
+        _users.pop(path, None)
+        db = _databases.pop(path, None)
+    if db is not None:
+        db.close()
@@ -0,0 +1,513 @@
+"""Process-wide in-memory cache of the per-year statistics.
+
+Every coordinator, the aggregator and the backfill paths read the same year
+caches. ``YearCacheManager`` keeps them in memory (least recently used years
+are evicted beyond ``YEAR_CACHE_MAX_YEARS``), so disk reads only happen on a
+miss. ``services.cache.load_year``/``save_year`` go through it:
+
+* ``load_year`` returns a private copy of the cached year.
+* ``save_year`` replaces the cached year and marks it dirty, but only when
+  the stored content (days and meta) actually changed.
+* Dirty years are written by a write-behind flush in the executor, shortly
+  after the first change (changes in between are coalesced into one write).
+
+Readers that do not modify the data can use a reference-counted handle
+instead of a copy; a year with open handles is never evicted::
+
+    with YEAR_CACHE.acquire(device_id, year) as handle:
+        totals = handle.data["yearly_total"]
+
+Read-modify-write from the event loop goes through a transaction, which
+holds the year's asyncio lock and commits only if nobody else changed the
+year in between (optimistic version check)::
+
+    async with YEAR_CACHE.year(device_id, year) as tx:
+        cache_io.mark_dirty(tx.data, date_str)
+
+Long-running work (backfills) fetches first and applies its changes with
+``async_apply``, which replays them on a fresh copy after a conflict.
+
+Without an attached Home Assistant instance (scripts, tests) saves are
+written through immediately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+from homeassistant.core import callback
+
+from ..const import YEAR_CACHE_FLUSH_DELAY, YEAR_CACHE_MAX_YEARS, YEAR_TX_RETRIES
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Keys rebuilt from the daily map; they do not make a year dirty
+_DERIVED_KEYS = ("monthly", "yearly_total")
+
+# (cache root, device_id, year)
+_Key = Tuple[str, str, int]
+
+
+def copy_year(cache: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a year cache dict deep enough that the copy can be modified freely."""
+    copied = {
+        key: copy.deepcopy(value) for key, value in cache.items()
+        if key not in ("daily", "monthly", "yearly_total")
+    }
+    copied["daily"] = {date_str: dict(values) for date_str, values in cache.get("daily", {}).items()}
+    if "monthly" in cache:
+        copied["monthly"] = {key: list(values) for key, values in cache["monthly"].items()}
+    if "yearly_total" in cache:
+        copied["yearly_total"] = dict(cache["yearly_total"])
+    return copied
+
+
+def _same_content(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """True if two year caches would be stored identically."""
+    if a.get("daily", {}) != b.get("daily", {}):
+        return False
+    keys = (set(a) | set(b)) - set(_DERIVED_KEYS) - {"daily"}
+    return all(a.get(key) == b.get(key) for key in keys)
+
+
+class YearConflictError(RuntimeError):
+    """Raised when a year changed between a transaction's load and commit."""
+
+
+class _Entry:
+    __slots__ = ("data", "refs", "dirty", "version")
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self.data = data
+        self.refs = 0
+        self.dirty = False
+        # Bumped on every content change (optimistic transaction checks)
+        self.version = 0
+
+
+class YearHandle:
+    """Reference to a cached year; release it (or use ``with``) when done.
+
+    ``data`` is the shared cache dict. Call ``mark_dirty`` after modifying it
+    so the change is written back.
+    """
+
+    __slots__ = ("_manager", "_key", "_entry")
+
+    def __init__(self, manager: "YearCacheManager", key: _Key, entry: _Entry) -> None:
+        self._manager = manager
+        self._key = key
+        self._entry: Optional[_Entry] = entry
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._entry is None:
+            raise RuntimeError("year handle already released")
+        return self._entry.data
+
+    def mark_dirty(self) -> None:
+        if self._entry is None:
+            raise RuntimeError("year handle already released")
+        self._manager._mark_dirty(self._entry, changed=True)
+        self._manager._changed(self._key)
+
+    def release(self) -> None:
+        if self._entry is not None:
+            self._manager._release(self._entry)
+            self._entry = None
+
+    def __enter__(self) -> "YearHandle":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+class YearTransaction:
+    """``async with`` block owning one year until it exits.
+
+    Holds the year's asyncio lock, so transactions on the same year run one
+    after another. ``data`` is a private copy; it is committed on a clean
+    exit unless ``rollback`` was called. The commit raises
+    ``YearConflictError`` if the year was saved outside a transaction in the
+    meantime (the copy is then discarded).
+    """
+
+    __slots__ = ("_manager", "device_id", "year", "data", "version", "_handle", "_lock", "_rolled_back")
+
+    def __init__(self, manager: "YearCacheManager", device_id: str, year: int) -> None:
+        self._manager = manager
+        self.device_id = device_id
+        self.year = year
+        self.data: Dict[str, Any] = {}
+        self.version = 0
+        self._handle: Optional[YearHandle] = None
+        self._lock = manager._async_lock(device_id, year)
+        self._rolled_back = False
+
+    def rollback(self) -> None:
+        """Leave the year unchanged."""
+        self._rolled_back = True
+
+    async def __aenter__(self) -> "YearTransaction":
+        await self._lock.acquire()
+        try:
+            # The handle keeps the year in memory, so its version stays comparable
+            self._handle = await self._manager._run(self._manager.acquire, self.device_id, self.year)
+            self.data, self.version = await self._manager._run(self._manager._snapshot, self._handle)
+        except BaseException:
+            self._close()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        try:
+            if exc_type is None and not self._rolled_back:
+                await self._manager._run(
+                    self._manager.store, self.device_id, self.year, self.data, self.version
+                )
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+        if self._handle is not None:
+            self._handle.release()
+            self._handle = None
+        self._lock.release()
+
+
+class YearCacheManager:
+    """LRU cache of year dicts with dirty tracking and a write-behind flush.
+
+    Args:
+        loader: Reads a year from its backend on a miss; returns the year and
+            whether it must be rewritten (e.g. read from an old format)
+        writer: Writes a year to its backend
+        max_years: Years kept in memory across all devices
+        flush_delay: Seconds between the first change and the write-back
+        on_flushed: Called after each batch of writes (e.g. one directory
+            fsync for all the files written)
+        root: Returns the resolved directory the years are stored under;
+            it is part of every key, so caches of different roots (tests)
+            stay apart (default: the working directory)
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, int], Tuple[Dict[str, Any], bool]],
+        writer: Callable[[str, int, Dict[str, Any]], None],
+        max_years: int = YEAR_CACHE_MAX_YEARS,
+        flush_delay: float = YEAR_CACHE_FLUSH_DELAY,
+        on_flushed: Optional[Callable[[], None]] = None,
+        root: Optional[Callable[[], str]] = None,
+    ) -> None:
+        self._loader = loader
+        self._root = root or os.getcwd
+        self._writer = writer
+        self._on_flushed = on_flushed
+        self.max_years = max_years
+        self.flush_delay = flush_delay
+        self._entries: "OrderedDict[_Key, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        # Serializes writes so a year is never written by two threads at once
+        self._write_lock = threading.Lock()
+        self._hass: Optional["HomeAssistant"] = None
+        self._users: Set[str] = set()
+        self._flush_timer: Optional[Any] = None
+        # Held by the open transactions only, so locks of idle years go away
+        self._async_locks: "weakref.WeakValueDictionary[_Key, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._listeners: List[Callable[[str, Optional[int]], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def root(self) -> str:
+        """Resolved directory of the cached years (first part of every key)."""
+        return self._root()
+
+    def _key(self, device_id: str, year: int) -> _Key:
+        return (self._root(), device_id, int(year))
+
+    # --- Reading and writing -------------------------------------------------
+
+    def _entry(self, key: _Key) -> _Entry:
+        """Cached entry for a key, loading it on a miss (lock held)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        data, stale = self._loader(key[1], key[2])
+        entry = _Entry(data)
+        self._entries[key] = entry
+        if stale:
+            entry.dirty = True
+            if self._hass is not None:
+                self._hass.loop.call_soon_threadsafe(self._async_schedule_flush)
+        self._evict()
+        return entry
+
+    def load(self, device_id: str, year: int) -> Dict[str, Any]:
+        """A private copy of a year."""
+        with self._lock:
+            return copy_year(self._entry(self._key(device_id, year)).data)
+
+    def store(
+        self, device_id: str, year: int, data: Dict[str, Any], expected_version: Optional[int] = None
+    ) -> bool:
+        """Replace a year; returns False when nothing is left to write.
+
+        Args:
+            device_id: Device ID
+            year: Year
+            data: New contents (copied)
+            expected_version: Version the data was loaded at; raises
+                ``YearConflictError`` if the year changed since
+        """
+        key = self._key(device_id, year)
+        with self._lock:
+            entry = self._entries.get(key)
+            if expected_version is not None and (entry.version if entry else 0) != expected_version:
+                raise YearConflictError(f"{device_id}/{year} changed during the transaction")
+            if entry is not None and _same_content(entry.data, data):
+                if not entry.dirty:
+                    return False
+                self._mark_dirty(entry, changed=False)
+            else:
+                if entry is None:
+                    entry = self._entries[key] = _Entry(copy_year(data))
+                else:
+                    entry.data = copy_year(data)
+                    self._entries.move_to_end(key)
+                self._mark_dirty(entry, changed=True)
+            self._evict()
+        self._changed(key)
+        return True
+
+    def acquire(self, device_id: str, year: int) -> YearHandle:
+        """Reference-counted handle on the shared year dict (no copy)."""
+        key = self._key(device_id, year)
+        with self._lock:
+            entry = self._entry(key)
+            entry.refs += 1
+            return YearHandle(self, key, entry)
+
+    def _snapshot(self, handle: YearHandle) -> Tuple[Dict[str, Any], int]:
+        """Private copy and version of a held year."""
+        with self._lock:
+            return copy_year(handle.data), handle._entry.version
+
+    def year(self, device_id: str, year: int) -> YearTransaction:
+        """Transaction on one year (``async with``, event loop only)."""
+        return YearTransaction(self, device_id, year)
+
+    async def async_apply(
+        self, device_id: str, year: int, ops: List[Callable[[Dict[str, Any]], Any]]
+    ) -> None:
+        """Apply buffered changes to a year in one transaction, then clear ``ops``.
+
+        Each op modifies the year dict in place. After a conflict the ops are
+        replayed on the current contents (up to ``YEAR_TX_RETRIES`` times).
+        """
+        if not ops:
+            return
+        for attempt in range(YEAR_TX_RETRIES + 1):
+            try:
+                async with self.year(device_id, year) as tx:
+                    for op in ops:
+                        op(tx.data)
+                break
+            except YearConflictError:
+                if attempt == YEAR_TX_RETRIES:
+                    raise
+                _LOGGER.debug(f"Year {device_id}/{year} changed concurrently, replaying {len(ops)} changes")
+        ops.clear()
+
+    def _async_lock(self, device_id: str, year: int) -> asyncio.Lock:
+        key = self._key(device_id, year)
+        lock = self._async_locks.get(key)
+        if lock is None:
+            lock = self._async_locks[key] = asyncio.Lock()
+        return lock
+
+    async def _run(self, target: Callable[..., Any], *args: Any) -> Any:
+        if self._hass is None:
+            return target(*args)
+        return await self._hass.async_add_executor_job(target, *args)
+
+    def peek(self, device_id: str, year: int) -> Optional[Dict[str, Any]]:
+        """The shared year dict if it is in memory (read-only), else None."""
+        with self._lock:
+            entry = self._entries.get(self._key(device_id, year))
+            return None if entry is None else entry.data
+
+    def is_dirty(self, device_id: str, year: int) -> bool:
+        """True while a year has changes not yet written to its backend."""
+        with self._lock:
+            entry = self._entries.get(self._key(device_id, year))
+            return entry is not None and entry.dirty
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.refs = max(0, entry.refs - 1)
+            self._evict()
+
+    def _mark_dirty(self, entry: _Entry, changed: bool) -> None:
+        with self._lock:
+            entry.dirty = True
+            if changed:
+                entry.version += 1
+
+    def add_listener(self, listener: Callable[[str, Optional[int]], None]) -> None:
+        """Call ``listener(device_id, year)`` whenever a year's content changes.
+
+        ``year`` is None when all years of the device are dropped (``discard``).
+        Called without the cache lock, from whichever thread made the change.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, device_id: str, year: Optional[int]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(device_id, year)
+            except Exception as err:
+                _LOGGER.warning(f"Year cache listener failed: {err}")
+
+    def _changed(self, key: _Key) -> None:
+        """Write a changed year now, or schedule the write-behind (lock not held)."""
+        self._notify(key[1], key[2])
+        if self._hass is None:
+            # No event loop to flush from: write through
+            self._flush_keys([key])
+        else:
+            self._hass.loop.call_soon_threadsafe(self._async_schedule_flush)
+
+    def _evict(self) -> None:
+        """Drop least recently used years beyond the limit (lock held).
+
+        Years with open handles or unwritten changes stay until released or
+        flushed, so the limit can be exceeded briefly.
+        """
+        excess = len(self._entries) - self.max_years
+        if excess <= 0:
+            return
+        for key in list(self._entries):
+            if excess <= 0:
+                break
+            entry = self._entries[key]
+            if entry.refs or entry.dirty:
+                continue
+            del self._entries[key]
+            excess -= 1
+
+    # --- Write-behind ----------------------------------------------------------
+
+    def _flush_keys(self, keys: List[_Key]) -> int:
+        written = 0
+        failed = False
+        with self._write_lock:
+            for key in keys:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is None or not entry.dirty:
+                        continue
+                    snapshot = copy_year(entry.data)
+                    entry.dirty = False
+                try:
+                    self._writer(key[1], key[2], snapshot)
+                    written += 1
+                except Exception as err:
+                    _LOGGER.warning(f"Failed to write year cache {key[1]}/{key[2]}: {err}")
+                    failed = True
+                    with self._lock:
+                        entry.dirty = True
+            if written and self._on_flushed is not None:
+                try:
+                    self._on_flushed()
+                except Exception as err:
+                    _LOGGER.warning(f"Year cache post-write step failed: {err}")
+        if failed and self._hass is not None:
+            # Retried with the next flush
+            self._hass.loop.call_soon_threadsafe(self._async_schedule_flush)
+        with self._lock:
+            self.writes += written
+            self._evict()
+        return written
+
+    def flush(self, device_id: Optional[str] = None) -> int:
+        """Write dirty years now (of one device, or all). Blocking; returns the number written."""
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if entry.dirty and (device_id is None or key[1] == device_id)
+            ]
+        return self._flush_keys(keys) if keys else 0
+
+    def discard(self, device_id: str, year: Optional[int] = None) -> None:
+        """Forget cached years without writing them (after a purge or backend switch)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == device_id and (year is None or k[2] == year)]:
+                del self._entries[key]
+        self._notify(device_id, year)
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        # The first change starts the timer; later ones ride along with it
+        if self._flush_timer is not None or self._hass is None:
+            return
+        self._flush_timer = self._hass.loop.call_later(self.flush_delay, self._async_flush_due)
+
+    @callback
+    def _async_flush_due(self) -> None:
+        self._flush_timer = None
+        if self._hass is not None:
+            self._hass.async_create_background_task(self.async_flush(), "lumentree_year_cache_flush")
+
+    async def async_flush(self, device_id: Optional[str] = None) -> int:
+        """Write dirty years in the executor."""
+        if self._hass is None:
+            return self.flush(device_id)
+        return await self._hass.async_add_executor_job(self.flush, device_id)
+
+    # --- Lifecycle -------------------------------------------------------------
+
+    @callback
+    def async_attach(self, hass: "HomeAssistant", device_id: str) -> None:
+        """Start write-behind for a device (called from entry setup)."""
+        self._hass = hass
+        self._users.add(device_id)
+
+    async def async_detach(self, device_id: str) -> None:
+        """Flush and forget a device's years; stop write-behind after the last device."""
+        await self.async_flush(device_id)
+        self.discard(device_id)
+        self._users.discard(device_id)
+        if not self._users:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            # Anything still dirty is written before write-through takes over
+            await self.async_flush()
+            self._hass = None
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for diagnostics."""
+        with self._lock:
+            return {
+                "years": len(self._entries),
+                "dirty": sum(1 for entry in self._entries.values() if entry.dirty),
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+            }
@@ -0,0 +1,117 @@
+"""Shared getYearData scan: which months of which years have data.
+
+Smart backfill, earliest-date detection and the nightly job all need the
+same answer. Years are fetched concurrently (bounded by the global request
+limiter) and the result is cached per device: past years never change, the
+current year is re-scanned after ``YEAR_SCAN_TTL``. Concurrent callers share
+in-flight requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..core.api_client import LumentreeHttpApiClient
+
+_LOGGER = logging.getLogger(__name__)
+
+YEAR_SCAN_TTL = 6 * 3600  # seconds, current year only
+MIN_SCAN_YEAR = 2000
+
+# device_id -> year -> (months with data, scan time)
+_scan_cache: Dict[str, Dict[int, Tuple[List[int], float]]] = {}
+_inflight: Dict[Tuple[str, int], "asyncio.Task[List[int]]"] = {}
+
+
+def _months_with_data(year_data: Dict[str, List[float]]) -> List[int]:
+    pv_data = year_data.get("pv", [0.0] * 12)
+    grid_data = year_data.get("grid", [0.0] * 12)
+    load_data = year_data.get("homeload", [0.0] * 12)
+    months: List[int] = []
+    for month_idx in range(12):
+        has_data = (
+            (month_idx < len(pv_data) and pv_data[month_idx] > 0.0)
+            or (month_idx < len(grid_data) and grid_data[month_idx] > 0.0)
+            or (month_idx < len(load_data) and load_data[month_idx] > 0.0)
+        )
+        if has_data:
+            months.append(month_idx + 1)
+    return months
+
+
+def _cached_months(device_id: str, year: int, now: float) -> Optional[List[int]]:
+    entry = _scan_cache.get(device_id, {}).get(year)
+    if entry is None:
+        return None
+    months, scanned_at = entry
+    if year >= dt.date.today().year and now - scanned_at >= YEAR_SCAN_TTL:
+        return None
+    return months
+
+
+async def _scan_year(api_client: LumentreeHttpApiClient, device_id: str, year: int) -> List[int]:
+    year_data = await api_client.get_year_data(device_id, year)
+    months = _months_with_data(year_data)
+    _scan_cache.setdefault(device_id, {})[year] = (months, time.monotonic())
+    return months
+
+
+async def scan_years(
+    api_client: LumentreeHttpApiClient,
+    device_id: str,
+    max_years: int = 10,
+) -> Dict[int, List[int]]:
+    """Return months (1-12) with data per year, newest year first.
+
+    Years without data are omitted. Years whose request failed are omitted
+    too and not cached, so the next scan retries them.
+
+    Args:
+        api_client: API client
+        device_id: Device ID
+        max_years: Number of years to check, counting back from this year
+    """
+    today = dt.date.today()
+    years = [today.year - offset for offset in range(max_years) if today.year - offset >= MIN_SCAN_YEAR]
+    now = time.monotonic()
+
+    found: Dict[int, List[int]] = {}
+    pending: Dict[int, "asyncio.Task[List[int]]"] = {}
+    for year in years:
+        months = _cached_months(device_id, year, now)
+        if months is not None:
+            found[year] = months
+            continue
+        key = (device_id, year)
+        task = _inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(_scan_year(api_client, device_id, year))
+            _inflight[key] = task
+            task.add_done_callback(lambda _t, key=key: _inflight.pop(key, None))
+        pending[year] = task
+
+    if pending:
+        _LOGGER.debug(f"Scanning {len(pending)} years for {device_id} ({len(found)} cached)")
+        # Shielded: a cancelled caller must not cancel scans shared with others
+        results = await asyncio.gather(
+            *(asyncio.shield(task) for task in pending.values()), return_exceptions=True
+        )
+        for year, result in zip(pending, results, strict=True):
+            if isinstance(result, BaseException):
+                _LOGGER.debug(f"Error checking year {year} from API: {result}")
+                continue
+            found[year] = result
+
+    return {year: found[year] for year in years if found.get(year)}
+
+
+def clear_year_scan(device_id: Optional[str] = None) -> None:
+    """Forget cached scan results (for one device or all)."""
+    if device_id is None:
+        _scan_cache.clear()
+    else:
+        _scan_cache.pop(device_id, None)
@@ -0,0 +1,330 @@
+"""Columnar binary format for the per-year statistics cache.
+
+A year file holds one fixed 366-slot column per metric (day of year → value)
+instead of a JSON dict per day, so it is ~6-10x smaller than the old
+pretty-printed JSON and a day, month or year total is a slice of the file.
+
+Layout (little-endian)::
+
+    header   magic "LTYC", version, year, column count, slot count,
+             first/last valid slot (-1 when empty), trailer length
+    scales   uint16 per column (value = stored int / scale)
+    columns  int32[slots] per column, in ``COLUMNS`` order
+    validity bitmap, one bit per slot (day present in ``daily``)
+    empty bitmap, one bit per slot (``meta["empty_bitmap"]``, version 2+)
+    trailer  UTF-8 JSON: ``meta`` plus any other top-level cache keys
+
+Bitmap byte ``n >> 3`` bit ``n & 7`` is slot ``n``, i.e. the little-endian
+bytes of the ``day_bitmap`` integer. Version 1 files (no empty bitmap, empty
+days listed in the trailer) are still read.
+
+kWh values are stored in 0.1 kWh (the API precision) and money in whole VND,
+matching the rounding ``update_daily`` already applies. Monthly arrays and
+yearly totals are not stored; they are summed from the integer columns, which
+gives exactly the values ``recompute_aggregates`` produces.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import mmap
+import struct
+from array import array
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..const import DEFAULT_TARIFF_VND_PER_KWH
+from .day_bitmap import iter_slots
+
+np: ModuleType | None
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the runtime environment
+    np = None
+
+MAGIC = b"LTYC"
+FORMAT_VERSION = 2
+# Versions this module reads
+READABLE_VERSIONS = (1, 2)
+SLOTS = 366
+
+COLUMNS = ("pv", "grid", "load", "essential", "total_load", "charge", "discharge", "saved_kwh", "savings_vnd")
+SCALES = tuple(1 if key == "savings_vnd" else 10 for key in COLUMNS)
+
+_HEADER = struct.Struct("<4sHHHHhhI")
+_SCALES = struct.Struct(f"<{len(COLUMNS)}H")
+_COLUMN_BYTES = SLOTS * 4
+_BITMAP_BYTES = (SLOTS + 7) // 8
+_COLUMNS_OFFSET = _HEADER.size + _SCALES.size
+_BITMAP_OFFSET = _COLUMNS_OFFSET + len(COLUMNS) * _COLUMN_BYTES
+_EMPTY_BITMAP_OFFSET = _BITMAP_OFFSET + _BITMAP_BYTES
+_TRAILER_OFFSET = _EMPTY_BITMAP_OFFSET + _BITMAP_BYTES
+_TRAILER_OFFSET_V1 = _EMPTY_BITMAP_OFFSET
+
+# Top-level keys rebuilt from the columns
+_DERIVED_KEYS = ("daily", "monthly", "yearly_total")
+
+
+class YearStoreError(ValueError):
+    """Raised for files that are not valid year stores."""
+
+
+class UnsupportedYearStoreError(YearStoreError):
+    """Raised for year stores of a format this version cannot read (e.g. newer)."""
+
+
+def day_slot(year: int, date_str: str) -> int:
+    """Day-of-year index (0-365) of ``date_str`` within ``year``."""
+    return (dt.date.fromisoformat(date_str) - dt.date(year, 1, 1)).days
+
+
+def month_slots(year: int, month: int) -> Tuple[int, int]:
+    """Slot range [start, end) covering one month."""
+    start = (dt.date(year, month, 1) - dt.date(year, 1, 1)).days
+    end = (dt.date(year + 1, 1, 1) if month == 12 else dt.date(year, month + 1, 1)) - dt.date(year, 1, 1)
+    return start, end.days
+
+
+def scaled(value: Any, scale: int) -> int:
+    """``value`` as a stored integer (``value * scale``, rounded); 0 if not a number."""
+    try:
+        return int(round(float(value) * scale))
+    except (TypeError, ValueError):
+        return 0
+
+
+def day_values(values: Dict[str, Any]) -> Tuple[float, ...]:
+    """A day's contribution to the monthly/yearly sums, in ``COLUMNS`` order.
+
+    Derived keys are calculated when missing (old cache data without them),
+    rounded like ``update_daily`` stores them so sums stay exact.
+    """
+    get = values.get
+    load = float(get("load", 0.0))
+    essential = float(get("essential", 0.0))
+    grid = float(get("grid", 0.0))
+    stored_total = get("total_load")
+    total_load = float(stored_total) if stored_total is not None else round(load + essential, 1)
+    stored_saved = get("saved_kwh")
+    saved_kwh = float(stored_saved) if stored_saved is not None else round(max(0.0, total_load - grid), 1)
+    stored_savings = get("savings_vnd")
+    savings_vnd = (
+        float(stored_savings) if stored_savings is not None
+        else round(saved_kwh * DEFAULT_TARIFF_VND_PER_KWH, 0)
+    )
+    return (
+        float(get("pv", 0.0)), grid, load, essential, total_load,
+        float(get("charge", 0.0)), float(get("discharge", 0.0)), saved_kwh, savings_vnd,
+    )
+
+
+def encode_year(year: int, cache: Dict[str, Any]) -> bytes:
+    """Serialize a year cache dict.
+
+    Days outside ``year`` are dropped. Derived day values missing in old
+    data (total_load, saved_kwh, savings_vnd) are filled in.
+    """
+    columns = [array("i", bytes(_COLUMN_BYTES)) for _ in COLUMNS]
+    bitmap = bytearray(_BITMAP_BYTES)
+    first = last = -1
+    for date_str, values in cache.get("daily", {}).items():
+        try:
+            slot = day_slot(year, date_str)
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= slot < SLOTS or not isinstance(values, dict):
+            continue
+        for column, scale, value in zip(columns, SCALES, day_values(values), strict=True):
+            column[slot] = scaled(value, scale)
+        bitmap[slot >> 3] |= 1 << (slot & 7)
+        first = slot if first < 0 else min(first, slot)
+        last = max(last, slot)
+
+    trailer = {key: value for key, value in cache.items() if key not in _DERIVED_KEYS}
+    empty_bits = 0
+    if isinstance(trailer.get("meta"), dict):
+        trailer["meta"] = dict(trailer["meta"])
+        empty_bits = int(trailer["meta"].pop("empty_bitmap", 0) or 0) & ((1 << SLOTS) - 1)
+    trailer_bytes = json.dumps(trailer, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    parts = [
+        _HEADER.pack(MAGIC, FORMAT_VERSION, year, len(COLUMNS), SLOTS, first, last, len(trailer_bytes)),
+        _SCALES.pack(*SCALES),
+    ]
+    parts.extend(column.tobytes() for column in columns)
+    parts.append(bytes(bitmap))
+    parts.append(empty_bits.to_bytes(_BITMAP_BYTES, "little"))
+    parts.append(trailer_bytes)
+    return b"".join(parts)
+
+
+class YearColumns:
+    """Read-only view over an encoded year (bytes or an ``mmap``).
+
+    Only the requested slices are decoded.
+    """
+
+    __slots__ = ("_buf", "year", "version", "first_slot", "last_slot", "_trailer_offset", "_trailer_len")
+
+    def __init__(self, buf: Any) -> None:
+        if len(buf) < _TRAILER_OFFSET_V1:
+            raise YearStoreError("year store truncated")
+        magic, version, year, n_columns, slots, first, last, trailer_len = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise YearStoreError("not a year store")
+        if version not in READABLE_VERSIONS or n_columns != len(COLUMNS) or slots != SLOTS:
+            raise UnsupportedYearStoreError(f"unsupported year store v{version} ({n_columns}x{slots})")
+        if _SCALES.unpack_from(buf, _HEADER.size) != SCALES:
+            raise UnsupportedYearStoreError("unexpected column scales")
+        trailer_offset = _TRAILER_OFFSET_V1 if version == 1 else _TRAILER_OFFSET
+        if len(buf) < trailer_offset + trailer_len:
+            raise YearStoreError("year store truncated")
+        self._buf = buf
+        self.year = year
+        self.version = version
+        self.first_slot = first
+        self.last_slot = last
+        self._trailer_offset = trailer_offset
+        self._trailer_len = trailer_len
+
+    def _column(self, index: int, start: int = 0, end: int = SLOTS) -> Any:
+        offset = _COLUMNS_OFFSET + index * _COLUMN_BYTES + start * 4
+        if np is not None:
+            return np.frombuffer(self._buf, dtype="<i4", count=end - start, offset=offset)
+        column = array("i")
+        column.frombytes(self._buf[offset:offset + (end - start) * 4])
+        return column
+
+    def is_valid(self, slot: int) -> bool:
+        return bool(self._buf[_BITMAP_OFFSET + (slot >> 3)] & (1 << (slot & 7)))
+
+    def valid_bitmap(self) -> int:
+        """Days present, as a ``day_bitmap`` integer."""
+        return int.from_bytes(self._buf[_BITMAP_OFFSET:_BITMAP_OFFSET + _BITMAP_BYTES], "little")
+
+    def empty_bitmap(self) -> int:
+        """Confirmed-empty days, as a ``day_bitmap`` integer (0 for version 1)."""
+        if self.version == 1:
+            return 0
+        return int.from_bytes(self._buf[_EMPTY_BITMAP_OFFSET:_EMPTY_BITMAP_OFFSET + _BITMAP_BYTES], "little")
+
+    def valid_slots(self) -> List[int]:
+        return list(iter_slots(self.valid_bitmap()))
+
+    def trailer(self) -> Dict[str, Any]:
+        start = self._trailer_offset
+        raw = bytes(self._buf[start:start + self._trailer_len])
+        data = json.loads(raw.decode("utf-8")) if raw else {}
+        if not isinstance(data, dict):
+            raise YearStoreError("invalid trailer")
+        return data
+
+    def day(self, date_str: str) -> Optional[Dict[str, float]]:
+        """Stored values of one day, or None if the day is not in the cache."""
+        slot = day_slot(self.year, date_str)
+        if not 0 <= slot < SLOTS or not self.is_valid(slot):
+            return None
+        return {
+            key: int(self._column(k, slot, slot + 1)[0]) / scale
+            for k, (key, scale) in enumerate(zip(COLUMNS, SCALES, strict=True))
+        }
+
+    def _range_totals(self, start: int, end: int) -> Dict[str, float]:
+        # Slots without data are zero, so plain sums need no validity mask
+        totals: Dict[str, float] = {}
+        for k, (key, scale) in enumerate(zip(COLUMNS, SCALES, strict=True)):
+            column = self._column(k, start, end)
+            total = int(column.sum(dtype=np.int64)) if np is not None else sum(column)
+            totals[key] = total / scale
+        return totals
+
+    def month_totals(self, month: int) -> Dict[str, float]:
+        """Totals of one month (same values as ``summarize_month``)."""
+        return self._range_totals(*month_slots(self.year, month))
+
+    def year_totals(self) -> Dict[str, float]:
+        """Totals of the whole year (same values as ``yearly_total``)."""
+        return self._range_totals(0, SLOTS)
+
+    def to_cache(self) -> Dict[str, Any]:
+        """Decode into the dict layout used by ``services.cache``."""
+        start = dt.date(self.year, 1, 1)
+        valid = self.valid_slots()
+        columns = [self._column(k) for k in range(len(COLUMNS))]
+        if np is not None:
+            columns = [column.tolist() for column in columns]
+        daily: Dict[str, Dict[str, float]] = {}
+        for slot in valid:
+            daily[(start + dt.timedelta(days=slot)).isoformat()] = {
+                key: columns[k][slot] / scale for k, (key, scale) in enumerate(zip(COLUMNS, SCALES, strict=True))
+            }
+
+        monthly: Dict[str, List[float]] = {key: [0.0] * 12 for key in COLUMNS}
+        yearly_total: Dict[str, float] = {}
+        for k, (key, scale) in enumerate(zip(COLUMNS, SCALES, strict=True)):
+            column = columns[k]
+            year_sum = 0
+            for month in range(1, 13):
+                m_start, m_end = month_slots(self.year, month)
+                month_sum = sum(column[m_start:m_end])
+                monthly[key][month - 1] = month_sum / scale
+                year_sum += month_sum
+            yearly_total[key] = year_sum / scale
+
+        cache = self.trailer()
+        if self.version > 1:
+            meta = cache.get("meta")
+            if not isinstance(meta, dict):
+                meta = cache["meta"] = {}
+            meta["empty_bitmap"] = self.empty_bitmap()
+        cache["daily"] = daily
+        cache["monthly"] = monthly
+        cache["yearly_total"] = yearly_total
+        return cache
+
+
+def decode_year(buf: Any) -> Dict[str, Any]:
+    """Decode an encoded year into a cache dict."""
+    return YearColumns(buf).to_cache()
+
+
+def read_year_file(path: str) -> Dict[str, Any]:
+    """Load a year store file into a cache dict."""
+    with open(path, "rb") as f:
+        return decode_year(f.read())
+
+
+class MappedYear:
+    """Context manager mapping a year store file for slice reads::
+
+        with MappedYear(path) as year:
+            totals = year.month_totals(5)
+    """
+
+    __slots__ = ("_path", "_file", "_map")
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+
+    def __enter__(self) -> YearColumns:
+        self._file = open(self._path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return YearColumns(self._map)
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # NumPy views still reference the map; it is released with them
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,2 +1,4 @@
 """Tests for Lumentree integration."""
 
+# Device the cache and backfill tests store their years under
+DEVICE_ID = "P000000001"
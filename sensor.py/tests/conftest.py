@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
-from typing import Any
+import calendar
+import random
+from pathlib import Path
+from typing import Any, Callable
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -16,6 +19,9 @@ from custom_components.lumentree.const import (
     CONF_DEVICE_SN,
     CONF_HTTP_TOKEN,
 )
+from custom_components.lumentree.services import cache as cache_io
+
+METRICS = ("pv", "grid", "load", "essential", "charge", "discharge")
 
 
 @pytest.fixture
@@ -97,3 +103,38 @@ def mock_api_client():
     client.set_token = MagicMock()
     return client
 
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch) -> Path:
+    """Run the test in ``tmp_path`` so the year cache is written there."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def seeded_year() -> Callable[..., dict]:
+    """Builder for a year cache of random days.
+
+    ``seeded_year(year, seed, days=range(1, 29), fill=1.0)`` adds ``days`` of
+    every month (skipping dates the month lacks), each with probability ``fill``.
+    """
+
+    def build(year: int, seed: int, days: range = range(1, 29), fill: float = 1.0) -> dict:
+        rng = random.Random(seed)
+        cache = cache_io._empty_cache()
+        for month in range(1, 13):
+            month_days = calendar.monthrange(year, month)[1]
+            for day in days:
+                if day > month_days or rng.random() >= fill:
+                    continue
+                values = {key: round(rng.uniform(0.0, 40.0), 1) for key in METRICS}
+                cache, _m, _ = cache_io.update_daily(cache, f"{year}-{month:02d}-{day:02d}", values)
+        return cache
+
+    return build
+
+
+@pytest.fixture
+def year_cache(seeded_year) -> dict:
+    """2024 with days 1-28 of every month and 2024-12-31 confirmed empty."""
+    return cache_io.mark_empty(seeded_year(2024, seed=3), "2024-12-31")
@@ -0,0 +1,374 @@
+"""Local stand-in for the lesvr cloud API (tests and benchmarks).
+
+Implements every endpoint the integration uses with deterministic synthetic
+data spanning several years, plus configurable latency, error rate and rate
+limiting, so ``LumentreeHttpApiClient``, ``StatsAggregator`` and
+``smart_backfill`` can run without the real cloud::
+
+    async with MockLesvrServer(MockLesvrConfig(latency=0.05)) as server:
+        client = LumentreeHttpApiClient(session, "P123456789", base_url=server.url)
+
+Running this module directly (in the test environment) serves it on port
+8765 for manual testing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import calendar
+import datetime as dt
+import math
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, FrozenSet, List, Optional
+
+from aiohttp import web
+
+from custom_components.lumentree.const import (
+    URL_DEVICE_MANAGE,
+    URL_GET_BAT_DAY_DATA,
+    URL_GET_MONTH_DATA,
+    URL_GET_OTHER_DAY_DATA,
+    URL_GET_PV_DAY_DATA,
+    URL_GET_SERVER_TIME,
+    URL_GET_YEAR_DATA,
+    URL_SHARE_DEVICES,
+)
+
+SLOTS_PER_DAY = 288
+KWH_PER_W_SLOT = (5.0 / 60.0) / 1000.0
+
+MOCK_TOKEN = "mock-token"
+
+
+@dataclass
+class MockLesvrConfig:
+    """Behaviour of the mock server.
+
+    Attributes:
+        first_day: Install date; earlier days (and future days) have no data
+        empty_days: Days without data after the install date (device offline)
+        latency: Base response delay in seconds
+        jitter: Extra random delay in seconds (uniform 0..jitter)
+        error_rate: Fraction of requests answered with HTTP 500
+        rate_limit: Maximum requests per second (None = unlimited); excess
+            requests get HTTP 429 with ``returnValue`` 0
+        seed: Seed for synthetic data and injected failures
+    """
+
+    first_day: dt.date = field(default_factory=lambda: dt.date.today() - dt.timedelta(days=3 * 365))
+    empty_days: FrozenSet[str] = frozenset()
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: Optional[float] = None
+    seed: int = 1
+
+
+class SyntheticDevice:
+    """Deterministic 5-minute power profiles per day."""
+
+    def __init__(self, config: MockLesvrConfig) -> None:
+        self._config = config
+        self._days: Dict[str, Dict[str, List[int]]] = {}
+
+    def has_data(self, day: dt.date) -> bool:
+        return (
+            self._config.first_day <= day <= dt.date.today()
+            and day.isoformat() not in self._config.empty_days
+        )
+
+    def series(self, day: dt.date) -> Dict[str, List[int]]:
+        """Return W series (pv, load, essential, grid, bat) for one day.
+
+        ``bat`` uses the server's sign convention: positive = discharge.
+        """
+        key = day.isoformat()
+        cached = self._days.get(key)
+        if cached is not None:
+            return cached
+        if not self.has_data(day):
+            slots = SLOTS_PER_DAY if day <= dt.date.today() else 0
+            zeros = [0] * slots
+            out = {"pv": zeros, "load": zeros, "essential": zeros, "grid": zeros, "bat": zeros}
+        else:
+            out = self._generate(day)
+        self._days[key] = out
+        return out
+
+    def _generate(self, day: dt.date) -> Dict[str, List[int]]:
+        rng = random.Random(self._config.seed * 1_000_003 + day.toordinal())
+        # Seasonal peak and a per-day cloudiness factor
+        season = 0.8 + 0.2 * math.cos((day.timetuple().tm_yday - 172) / 365.0 * 2 * math.pi)
+        peak = rng.uniform(2500.0, 5000.0) * season * rng.uniform(0.3, 1.0)
+        slots = SLOTS_PER_DAY
+        if day == dt.date.today():
+            now = dt.datetime.now()
+            slots = (now.hour * 60 + now.minute) // 5 + 1
+
+        pv: List[int] = []
+        load: List[int] = []
+        essential: List[int] = []
+        grid: List[int] = []
+        bat: List[int] = []
+        for slot in range(slots):
+            hour = slot / 12.0
+            sun = math.sin((hour - 6.0) / 12.0 * math.pi) if 6.0 <= hour <= 18.0 else 0.0
+            p = max(0.0, peak * sun * rng.uniform(0.85, 1.0))
+            evening = 600.0 if 18.0 <= hour <= 22.0 else 0.0
+            ld = 250.0 + evening + rng.uniform(0.0, 200.0)
+            e = 120.0 + rng.uniform(0.0, 60.0)
+            surplus = p - ld - e
+            if surplus > 0:
+                b = -min(surplus, 2000.0)  # charging
+                g = 0.0
+            else:
+                b = min(-surplus, 1500.0) if hour >= 17.0 or hour < 5.0 else 0.0  # discharging
+                g = -surplus - b
+            pv.append(int(p))
+            load.append(int(ld))
+            essential.append(int(e))
+            grid.append(int(g))
+            bat.append(int(b))
+        return {"pv": pv, "load": load, "essential": essential, "grid": grid, "bat": bat}
+
+    @staticmethod
+    def _tenths(values: List[int]) -> int:
+        """Day total in 0.1 kWh (the API's unit for ``tableValue``)."""
+        return int(round(sum(values) * KWH_PER_W_SLOT * 10))
+
+    def day_totals(self, day: dt.date) -> Dict[str, int]:
+        """Day totals in 0.1 kWh keyed by month/year API names."""
+        s = self.series(day)
+        return {
+            "pv": self._tenths(s["pv"]),
+            "grid": self._tenths(s["grid"]),
+            "homeload": self._tenths(s["load"]),
+            "essentialLoad": self._tenths(s["essential"]),
+            "bat": self._tenths([-v for v in s["bat"] if v < 0]),
+            "batF": self._tenths([v for v in s["bat"] if v > 0]),
+        }
+
+
+class MockLesvrServer:
+    """aiohttp server implementing the lesvr endpoints used by the integration."""
+
+    def __init__(self, config: Optional[MockLesvrConfig] = None) -> None:
+        self.config = config or MockLesvrConfig()
+        self.device = SyntheticDevice(self.config)
+        self.requests: Counter[str] = Counter()
+        self.errors = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(self.config.seed)
+        self._recent: Deque[float] = deque()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def __aenter__(self) -> "MockLesvrServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start listening and return the base URL."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get(URL_GET_SERVER_TIME, self._server_time)
+        app.router.add_post(URL_SHARE_DEVICES, self._share_devices)
+        app.router.add_post(URL_DEVICE_MANAGE, self._device_manage)
+        app.router.add_get(URL_GET_PV_DAY_DATA, self._pv_day)
+        app.router.add_get(URL_GET_BAT_DAY_DATA, self._bat_day)
+        app.router.add_get(URL_GET_OTHER_DAY_DATA, self._other_day)
+        app.router.add_get(URL_GET_MONTH_DATA, self._month)
+        app.router.add_get(URL_GET_YEAR_DATA, self._year)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.url = f"http://{bound_host}:{bound_port}"
+        return self.url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    # ---------------------------
+    # Failure injection
+    # ---------------------------
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        self.requests[request.path] += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            delay = self.config.latency + self._rng.uniform(0.0, self.config.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self._over_rate_limit():
+                self.rate_limited += 1
+                return web.json_response({"returnValue": 0, "msg": "Too many requests"}, status=429)
+            if self.config.error_rate and self._rng.random() < self.config.error_rate:
+                self.errors += 1
+                return web.Response(status=500, text="Internal Server Error")
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    def _over_rate_limit(self) -> bool:
+        if self.config.rate_limit is None:
+            return False
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] >= 1.0:
+            self._recent.popleft()
+        if len(self._recent) >= self.config.rate_limit:
+            return True
+        self._recent.append(now)
+        return False
+
+    # ---------------------------
+    # Handlers
+    # ---------------------------
+
+    @staticmethod
+    def _ok(data: Dict[str, Any]) -> web.Response:
+        return web.json_response({"returnValue": 1, "msg": "success", "data": data})
+
+    @staticmethod
+    def _authorized(request: web.Request) -> bool:
+        return request.headers.get("Authorization") == MOCK_TOKEN
+
+    @staticmethod
+    def _auth_failed() -> web.Response:
+        return web.json_response({"returnValue": 203, "msg": "token invalid"})
+
+    @staticmethod
+    def _query_date(request: web.Request) -> Optional[dt.date]:
+        try:
+            return dt.date.fromisoformat(request.query["queryDate"])
+        except (KeyError, ValueError):
+            return None
+
+    async def _server_time(self, request: web.Request) -> web.Response:
+        return self._ok({"serverTime": int(time.time())})
+
+    async def _share_devices(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if not form.get("deviceIds") or not form.get("serverTime"):
+            return web.json_response({"returnValue": 0, "msg": "missing parameters"})
+        return self._ok({"token": MOCK_TOKEN})
+
+    async def _device_manage(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return self._auth_failed()
+        device_id = request.query.get("snName", "")
+        return self._ok(
+            {
+                "devices": [
+                    {
+                        "deviceId": device_id,
+                        "deviceType": "SUNT-6.0kW-H",
+                        "controllerVersion": "1.0.0",
+                        "liquidCrystalVersion": "1.0.0",
+                    }
+                ]
+            }
+        )
+
+    def _day_or_error(self, request: web.Request) -> Optional[web.Response]:
+        if not self._authorized(request):
+            return self._auth_failed()
+        if self._query_date(request) is None:
+            return web.json_response({"returnValue": 0, "msg": "invalid queryDate"})
+        return None
+
+    async def _pv_day(self, request: web.Request) -> web.Response:
+        if (error := self._day_or_error(request)) is not None:
+            return error
+        day = self._query_date(request)
+        s = self.device.series(day)
+        totals = self.device.day_totals(day)
+        return self._ok({"pv": {"tableValue": totals["pv"], "tableValueInfo": s["pv"]}})
+
+    async def _bat_day(self, request: web.Request) -> web.Response:
+        if (error := self._day_or_error(request)) is not None:
+            return error
+        day = self._query_date(request)
+        s = self.device.series(day)
+        totals = self.device.day_totals(day)
+        return self._ok(
+            {
+                "bats": [{"tableValue": totals["bat"]}, {"tableValue": totals["batF"]}],
+                "tableValueInfo": s["bat"],
+            }
+        )
+
+    async def _other_day(self, request: web.Request) -> web.Response:
+        if (error := self._day_or_error(request)) is not None:
+            return error
+        day = self._query_date(request)
+        s = self.device.series(day)
+        totals = self.device.day_totals(day)
+        return self._ok(
+            {
+                "grid": {"tableValue": totals["grid"], "tableValueInfo": s["grid"]},
+                "homeload": {"tableValue": totals["homeload"], "tableValueInfo": s["load"]},
+                "essentialLoad": {"tableValue": totals["essentialLoad"], "tableValueInfo": s["essential"]},
+            }
+        )
+
+    async def _month(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return self._auth_failed()
+        try:
+            year = int(request.query["year"])
+            month = int(request.query["month"])
+        except (KeyError, ValueError):
+            return web.json_response({"returnValue": 0, "msg": "invalid year/month"})
+        days = calendar.monthrange(year, month)[1]
+        columns: Dict[str, List[int]] = {}
+        for d in range(1, days + 1):
+            for key, value in self.device.day_totals(dt.date(year, month, d)).items():
+                columns.setdefault(key, []).append(value)
+        return self._ok({key: {"tableValueInfo": values} for key, values in columns.items()})
+
+    async def _year(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return self._auth_failed()
+        try:
+            year = int(request.query["year"])
+        except (KeyError, ValueError):
+            return web.json_response({"returnValue": 0, "msg": "invalid year"})
+        columns: Dict[str, List[int]] = {}
+        for month in range(1, 13):
+            sums: Counter[str] = Counter()
+            for d in range(1, calendar.monthrange(year, month)[1] + 1):
+                sums.update(self.device.day_totals(dt.date(year, month, d)))
+            for key in ("pv", "grid", "homeload", "essentialLoad", "bat", "batF"):
+                columns.setdefault(key, []).append(sums[key])
+        return self._ok({key: {"tableValueInfo": values} for key, values in columns.items()})
+
+
+async def _serve_forever(port: int = 8765) -> None:
+    server = MockLesvrServer(MockLesvrConfig(latency=0.05, jitter=0.05))
+    url = await server.start(port=port)
+    print(f"Mock lesvr API listening on {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve_forever())
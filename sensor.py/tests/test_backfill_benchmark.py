@@ -0,0 +1,162 @@
+"""Backfill throughput benchmarks against the local mock lesvr API.
+
+Each backfill mode runs end to end (HTTP client, aggregator, cache files)
+against ``MockLesvrServer`` and reports days/sec. The defaults are small so
+the suite stays fast; scale them up to tune concurrency, e.g.::
+
+    LUMENTREE_BENCH_DAYS=365 LUMENTREE_BENCH_LATENCY=0.15 pytest -s tests/test_backfill_benchmark.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import os
+import time
+from typing import Any, Callable
+
+import aiohttp
+import pytest
+
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services import year_scan
+from custom_components.lumentree.services.aggregator import StatsAggregator
+
+from . import DEVICE_ID
+from .mock_lesvr import MockLesvrConfig, MockLesvrServer
+
+BENCH_DAYS = int(os.environ.get("LUMENTREE_BENCH_DAYS", "30"))
+BENCH_LATENCY = float(os.environ.get("LUMENTREE_BENCH_LATENCY", "0.02"))
+
+
+class _ExecutorHass:
+    """Just enough of HomeAssistant for the aggregator."""
+
+    async def async_add_executor_job(self, target: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+
+async def _run_benchmark(name: str, config: MockLesvrConfig, run: Callable[[StatsAggregator], Any]) -> dict:
+    """Run one backfill mode and return its throughput figures."""
+    async with MockLesvrServer(config) as server, aiohttp.ClientSession() as session:
+        client = LumentreeHttpApiClient(session, DEVICE_ID, base_url=server.url)
+        await client.authenticate_device(DEVICE_ID)
+        aggregator = StatsAggregator(_ExecutorHass(), client, DEVICE_ID)
+        requests_before = server.total_requests
+
+        start = time.perf_counter()
+        days = await run(aggregator)
+        elapsed = time.perf_counter() - start
+
+        result = {
+            "days": days,
+            "elapsed": elapsed,
+            "days_per_sec": days / elapsed if elapsed else 0.0,
+            "requests": server.total_requests - requests_before,
+            "peak_in_flight": server.peak_in_flight,
+        }
+    print(
+        f"\n{name}: {days} days in {elapsed:.2f}s ({result['days_per_sec']:.1f} days/s, "
+        f"{result['requests']} requests, peak {result['peak_in_flight']} in flight)"
+    )
+    return result
+
+
+def _cached_days() -> int:
+    today = dt.date.today()
+    return sum(
+        len(cache_io.load_year(DEVICE_ID, year).get("daily", {}))
+        for year in range(today.year - 10, today.year + 1)
+    )
+
+
+@pytest.fixture(autouse=True)
+def _cache_in_tmp(cache_dir):
+    """Write the year cache files to a temporary directory."""
+    year_scan.clear_year_scan(DEVICE_ID)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_backfill_days():
+    """Benchmark a date-range backfill and check cached totals match the server."""
+    today = dt.date.today()
+    since = today - dt.timedelta(days=BENCH_DAYS)
+    config = MockLesvrConfig(first_day=since, latency=BENCH_LATENCY)
+
+    async def run(aggregator: StatsAggregator) -> int:
+        await aggregator.backfill_days(since, today - dt.timedelta(days=1))
+        return _cached_days()
+
+    result = await _run_benchmark("backfill_days", config, run)
+
+    assert result["days"] == BENCH_DAYS
+    day = today - dt.timedelta(days=1)
+    cached = cache_io.load_year(DEVICE_ID, day.year)["daily"][day.isoformat()]
+    expected = MockLesvrServer(config).device.day_totals(day)
+    assert cached["pv"] == pytest.approx(expected["pv"] / 10.0)
+    assert cached["load"] == pytest.approx(expected["homeload"] / 10.0)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_backfill_all():
+    """Benchmark full-history backfill stopping on the empty streak."""
+    today = dt.date.today()
+    config = MockLesvrConfig(first_day=today - dt.timedelta(days=BENCH_DAYS - 1), latency=BENCH_LATENCY)
+
+    async def run(aggregator: StatsAggregator) -> int:
+        await aggregator.backfill_all(max_years=None, empty_streak=7)
+        return _cached_days()
+
+    result = await _run_benchmark("backfill_all", config, run)
+
+    # History plus the empty streak that ends the scan
+    assert result["days"] == BENCH_DAYS + 7
+
+
+@pytest.mark.asyncio
+async def test_benchmark_backfill_gaps():
+    """Benchmark gap filling in the current year."""
+    today = dt.date.today()
+    config = MockLesvrConfig(first_day=dt.date(today.year, 1, 1), latency=BENCH_LATENCY)
+
+    async def run(aggregator: StatsAggregator) -> int:
+        return await aggregator.backfill_gaps(max_years=1, max_days_per_run=BENCH_DAYS)
+
+    result = await _run_benchmark("backfill_gaps", config, run)
+
+    assert result["days"] == min(BENCH_DAYS, today.timetuple().tm_yday)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_backfill_empty_dates():
+    """Benchmark re-checking days previously marked empty."""
+    today = dt.date.today()
+    config = MockLesvrConfig(first_day=today - dt.timedelta(days=3 * 365), latency=BENCH_LATENCY)
+    for offset in range(1, BENCH_DAYS + 1):
+        day = today - dt.timedelta(days=offset)
+        cache = cache_io.load_year(DEVICE_ID, day.year)
+        cache_io.save_year(DEVICE_ID, day.year, cache_io.mark_empty(cache, day.isoformat()))
+
+    async def run(aggregator: StatsAggregator) -> int:
+        stats = await aggregator.backfill_empty_dates(max_years=2, max_days_per_run=BENCH_DAYS)
+        return stats["recovered"] + stats["confirmed_empty"]
+
+    result = await _run_benchmark("backfill_empty_dates", config, run)
+
+    assert result["days"] == BENCH_DAYS
+
+
+@pytest.mark.asyncio
+async def test_benchmark_smart_backfill():
+    """Benchmark month-based smart backfill."""
+    today = dt.date.today()
+    config = MockLesvrConfig(first_day=today - dt.timedelta(days=BENCH_DAYS - 1), latency=BENCH_LATENCY)
+
+    async def run(aggregator: StatsAggregator) -> int:
+        stats = await aggregator.smart_backfill(max_years=BENCH_DAYS // 365 + 2, optimize_cache=False)
+        return stats["days_added"] + stats["days_updated"]
+
+    result = await _run_benchmark("smart_backfill", config, run)
+
+    assert result["days"] >= BENCH_DAYS
@@ -0,0 +1,187 @@
+"""Tests for resumable, checkpointed backfill jobs."""
+
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services.aggregator import StatsAggregator
+from custom_components.lumentree.services.backfill_jobs import (
+    EVENT_BACKFILL_PROGRESS,
+    BackfillJobManager,
+)
+
+from . import DEVICE_ID
+
+
+class _MemoryStore:
+    """In-memory stand-in for homeassistant.helpers.storage.Store."""
+
+    saved: Optional[Dict[str, Any]] = None
+
+    def __init__(self, hass, version, key) -> None:
+        pass
+
+    async def async_load(self) -> Optional[Dict[str, Any]]:
+        return _MemoryStore.saved
+
+    async def async_save(self, data: Dict[str, Any]) -> None:
+        _MemoryStore.saved = data
+
+
+def _hass() -> MagicMock:
+    hass = MagicMock()
+    hass.async_create_background_task = MagicMock(side_effect=lambda coro, name: asyncio.create_task(coro))
+    return hass
+
+
+class _LoopHass:
+    """Just enough of HomeAssistant for the year cache write-behind."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+
+    async def async_add_executor_job(self, target: Callable[..., Any], *args: Any) -> Any:
+        return await self.loop.run_in_executor(None, target, *args)
+
+    def async_create_background_task(self, coro: Any, name: str) -> asyncio.Task:
+        return self.loop.create_task(coro, name=name)
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture(autouse=True)
+def _memory_store():
+    _MemoryStore.saved = None
+    with patch("custom_components.lumentree.services.backfill_jobs.Store", _MemoryStore):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_interrupted_job_resumes_from_checkpoint():
+    """Test a job left running in storage restarts with its params and cursor."""
+    _MemoryStore.saved = {
+        "mode": "backfill_empty_dates",
+        "params": {"max_years": 2, "max_days_per_run": 50},
+        "status": "running",
+        "cursor": "2024-03-10",
+        "counters": {"recovered": 4},
+        "errors": [],
+        "state": {},
+    }
+    seen: List[Any] = []
+
+    async def backfill_empty_dates(max_years, max_days_per_run, progress):
+        seen.append((max_years, max_days_per_run, progress.cursor, progress.count("recovered")))
+        return {"recovered": 4}
+
+    manager = BackfillJobManager(_hass(), MagicMock(backfill_empty_dates=backfill_empty_dates), DEVICE_ID)
+    await manager.async_load()
+
+    assert manager.async_resume_interrupted()
+    await manager._task
+
+    assert seen == [(2, 50, "2024-03-10", 4)]
+    assert _MemoryStore.saved["status"] == "completed"
+    assert _MemoryStore.saved["resumed"] == 1
+    assert not manager.async_resume_interrupted()
+
+
+@pytest.mark.asyncio
+async def test_pause_resume_and_cancel():
+    """Test pause blocks at the next checkpoint, resume continues and cancel stops the job."""
+    hass = _hass()
+    aggregator = MagicMock()
+    day = asyncio.Event()
+
+    async def backfill_gaps(max_years, max_days_per_run, progress):
+        for n in range(1, 1000):
+            await day.wait()
+            day.clear()
+            progress.update(f"2024-01-{n:02d}", filled=1)
+            if progress.checkpoint_due:
+                await progress.checkpoint()
+        return 0
+
+    aggregator.backfill_gaps = backfill_gaps
+    manager = BackfillJobManager(hass, aggregator, DEVICE_ID)
+    assert await manager.async_start("backfill_gaps", max_years=1, max_days_per_run=30)
+    assert not await manager.async_start("backfill_all")
+
+    day.set()
+    await _settle()
+    assert manager.job["counters"]["filled"] == 1
+
+    assert await manager.async_pause()
+    day.set()
+    await _settle()
+    assert _MemoryStore.saved["status"] == "paused"
+    assert _MemoryStore.saved["cursor"] == "2024-01-02"
+    day.set()
+    await _settle()
+    assert manager.job["counters"]["filled"] == 2
+
+    assert await manager.async_resume()
+    await _settle()
+    assert manager.job["counters"]["filled"] == 3
+
+    assert await manager.async_cancel()
+    assert _MemoryStore.saved["status"] == "cancelled"
+    assert not manager.is_active
+    events = [c.args for c in hass.bus.async_fire.call_args_list]
+    assert all(name == EVENT_BACKFILL_PROGRESS for name, _ in events)
+    assert events[-1][1]["device_id"] == DEVICE_ID
+
+
+@pytest.mark.asyncio
+async def test_history_jobs_queue_across_devices():
+    """Test only one device runs a historical job while gap filling can run beside it."""
+    release = asyncio.Event()
+    running: List[str] = []
+
+    async def job(progress, **params):
+        running.append(params["name"])
+        await release.wait()
+        return 0
+
+    aggregator = MagicMock(backfill_all=job, backfill_gaps=job)
+    managers = [BackfillJobManager(_hass(), aggregator, f"P00000000{n}") for n in range(3)]
+    await managers[0].async_start("backfill_all", name="history-1")
+    await managers[1].async_start("backfill_all", name="history-2")
+    await managers[2].async_start("backfill_gaps", name="gaps")
+    await _settle()
+
+    assert running == ["history-1", "gaps"]
+    release.set()
+    await _settle()
+    assert running == ["history-1", "gaps", "history-2"]
+    await _settle()
+    assert not any(manager.is_active for manager in managers)
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_writes_the_year_before_saving_the_cursor(cache_dir):
+    """Test the job cursor is only saved once the days behind it are on disk."""
+    cache_io.YEAR_CACHE.async_attach(_LoopHass(), DEVICE_ID)
+    on_disk: List[bool] = []
+
+    async def checkpoint() -> None:
+        on_disk.append(not cache_io.YEAR_CACHE.is_dirty(DEVICE_ID, 2024))
+
+    try:
+        aggregator = StatsAggregator(MagicMock(), MagicMock(), DEVICE_ID)
+        ops = [partial(cache_io.update_daily, date_str="2024-05-01", values={"pv": 1.0})]
+        await aggregator._checkpoint(MagicMock(checkpoint=checkpoint), 2024, ops)
+    finally:
+        await cache_io.YEAR_CACHE.async_detach(DEVICE_ID)
+
+    assert on_disk == [True]
+    assert "2024-05-01" in cache_io.load_year(DEVICE_ID, 2024)["daily"]
@@ -0,0 +1,74 @@
+"""Tests for incremental monthly/yearly aggregates in the year cache."""
+
+from __future__ import annotations
+
+import random
+
+from custom_components.lumentree.services import cache as cache_io
+
+
+def _random_values(rng: random.Random) -> dict:
+    return {
+        key: round(rng.uniform(0.0, 40.0), 1)
+        for key in ("pv", "grid", "load", "essential", "charge", "discharge")
+    }
+
+
+def test_incremental_aggregates_match_recompute():
+    """Test adding and overwriting days keeps aggregates equal to a full recompute."""
+    rng = random.Random(7)
+    cache = cache_io._empty_cache()
+    dates = [f"2024-{month:02d}-{day:02d}" for month in range(1, 13) for day in range(1, 29)]
+    for date_str in rng.sample(dates, 200) + rng.sample(dates, 100):
+        cache, _m, _ = cache_io.update_daily(cache, date_str, _random_values(rng))
+
+    assert cache_io.verify_aggregates(cache) == []
+    expected = cache_io.recompute_aggregates({"daily": dict(cache["daily"])})
+    assert cache["monthly"] == expected["monthly"]
+    assert cache["yearly_total"] == expected["yearly_total"]
+
+
+def test_verify_mode_repairs_drifted_aggregates(monkeypatch):
+    """Test verification mode detects stale aggregates and rebuilds them."""
+    cache, _m, _ = cache_io.update_daily(cache_io._empty_cache(), "2024-03-01", {"pv": 5.0})
+    cache["monthly"]["pv"][2] = 99.0
+    assert cache_io.verify_aggregates(cache) == ["monthly.pv[3]"]
+
+    monkeypatch.setattr(cache_io, "VERIFY_AGGREGATES", True)
+    cache, _m, _ = cache_io.update_daily(cache, "2024-03-02", {"pv": 1.5})
+
+    assert cache["monthly"]["pv"][2] == 6.5
+    assert cache["yearly_total"]["pv"] == 6.5
+
+
+def test_legacy_cache_without_aggregates_is_rebuilt():
+    """Test a cache missing derived aggregate keys falls back to a full rebuild."""
+    cache = {"daily": {"2023-05-01": {"pv": 2.0, "load": 1.0, "essential": 0.5, "grid": 0.2}}, "monthly": {"pv": [0.0] * 12}}
+    cache, m_idx, _ = cache_io.update_daily(cache, "2023-05-02", {"pv": 3.0})
+
+    assert m_idx == 4
+    assert cache["monthly"]["pv"][4] == 5.0
+    assert cache["monthly"]["total_load"][4] == 1.5
+    assert cache_io.verify_aggregates(cache) == []
+
+
+def test_columnar_recompute_matches_python_fallback(monkeypatch):
+    """Test the NumPy and pure Python recompute paths give identical results."""
+    rng = random.Random(11)
+    daily = {}
+    for n in range(366):
+        date_str = f"2024-{n % 12 + 1:02d}-{n % 28 + 1:02d}"
+        values = _random_values(rng)
+        if n % 5 == 0:
+            # Legacy day without derived keys
+            daily[date_str] = values
+        else:
+            daily[date_str] = cache_io.update_daily(cache_io._empty_cache(), date_str, values)[0]["daily"][date_str]
+
+    vectorized = cache_io.recompute_aggregates({"daily": dict(daily)})
+    monkeypatch.setattr(cache_io, "np", None)
+    fallback = cache_io.recompute_aggregates({"daily": dict(daily)})
+
+    assert vectorized["monthly"] == fallback["monthly"]
+    assert vectorized["yearly_total"] == fallback["yearly_total"]
+    assert all(type(x) is float for x in vectorized["monthly"]["pv"])
@@ -0,0 +1,100 @@
+"""Tests for the API circuit breaker."""
+
+from __future__ import annotations
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from custom_components.lumentree.core import circuit_breaker
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.core.circuit_breaker import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+from custom_components.lumentree.core.exceptions import ApiException, CircuitOpenException
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_threshold():
+    """Test the circuit opens after consecutive failures and fails fast."""
+    clock = _Clock()
+    breaker = CircuitBreaker("host", failure_threshold=3, cooldown=30.0, clock=clock)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    breaker.before_request()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(CircuitOpenException) as exc_info:
+        breaker.before_request()
+    assert isinstance(exc_info.value, ApiException)
+    assert exc_info.value.retry_after == pytest.approx(30.0)
+
+
+def test_success_resets_failures():
+    """Test a response from the server resets the failure count."""
+    breaker = CircuitBreaker("host", failure_threshold=2, clock=_Clock())
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_half_open_single_probe():
+    """Test only one probe is allowed after the cooldown."""
+    clock = _Clock()
+    breaker = CircuitBreaker("host", failure_threshold=1, cooldown=10.0, clock=clock)
+    breaker.record_failure()
+    clock.now = 10.0
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.before_request()
+    with pytest.raises(CircuitOpenException):
+        breaker.before_request()
+
+    # Failed probe re-opens the circuit for another cooldown
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    clock.now = 20.0
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.retry_after == 0.0
+
+
+@pytest.mark.asyncio
+async def test_server_errors_with_a_json_body_open_the_circuit(monkeypatch):
+    """Test a 5xx counts as a failure even when its body is a valid API error."""
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+    async def busy(request: web.Request) -> web.Response:
+        return web.json_response({"returnValue": 0, "msg": "Busy"}, status=503)
+
+    app = web.Application()
+    app.router.add_get("/busy", busy)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    host, port = runner.addresses[0][:2]
+    try:
+        async with aiohttp.ClientSession() as session:
+            client = LumentreeHttpApiClient(session, base_url=f"http://{host}:{port}")
+            for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+                with pytest.raises(ApiException):
+                    await client._request("GET", "/busy", requires_auth=False, max_retries=1)
+            assert client.circuit_breaker.state == STATE_OPEN
+            with pytest.raises(CircuitOpenException):
+                await client._request("GET", "/busy", requires_auth=False, max_retries=1)
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,98 @@
+"""Tests for the per-year day bitmaps."""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+
+import pytest
+
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services import day_bitmap, year_store
+
+from . import DEVICE_ID
+
+
+def test_gaps_and_next_missing_match_calendar_walk():
+    """Test bitmap gap finding matches walking the calendar day by day."""
+    present = ["2024-01-01", "2024-01-02", "2024-02-29", "2024-03-01", "2024-12-31"]
+    bits = day_bitmap.from_dates(2024, present + ["2023-05-01", "bogus"])
+    assert day_bitmap.to_dates(2024, bits) == present
+
+    start, end = dt.date(2024, 1, 1), dt.date(2024, 3, 5)
+    walked = []
+    day = start
+    while day <= end:
+        if day.isoformat() not in present:
+            walked.append(day.isoformat())
+        day += dt.timedelta(days=1)
+    assert day_bitmap.missing(2024, bits, start, end) == walked
+    assert day_bitmap.missing(2024, bits, start, end, newest_first=True, limit=2) == walked[::-1][:2]
+    assert day_bitmap.missing(2024, bits, dt.date(2023, 12, 1), dt.date(2024, 1, 3)) == ["2024-01-03"]
+
+    assert day_bitmap.next_missing(2024, bits) == "2024-01-03"
+    assert day_bitmap.next_missing(2024, bits, after="2024-02-28") == "2024-03-02"
+    assert day_bitmap.next_missing(2024, (1 << 366) - 1) is None
+    assert day_bitmap.first_date(2024, bits) == "2024-01-01"
+    assert day_bitmap.last_date(2024, bits) == "2024-12-31"
+    assert day_bitmap.count(day_bitmap.span(2023, dt.date(2023, 1, 1), dt.date(2024, 6, 1))) == 365
+
+
+def test_empty_days_round_trip_through_store(cache_dir):
+    """Test marking, clearing and persisting confirmed-empty days."""
+    cache = cache_io._empty_cache()
+    for date_str in ("2024-03-01", "2024-03-02", "2024-07-04"):
+        cache_io.mark_empty(cache, date_str)
+    cache_io.update_daily(cache, "2024-03-02", {"pv": 1.0})
+
+    assert cache_io.empty_dates(cache, 2024) == ["2024-03-01", "2024-07-04"]
+    assert cache_io.is_confirmed_empty(cache, "2024-03-01")
+    assert not cache_io.is_confirmed_empty(cache, "2024-03-02")
+    assert cache_io.known_bitmap(cache, 2024) == day_bitmap.from_dates(
+        2024, ["2024-03-01", "2024-03-02", "2024-07-04"]
+    )
+
+    cache_io.save_year(DEVICE_ID, 2024, cache)
+    cache_io.YEAR_CACHE.flush(DEVICE_ID)
+    cache_io.YEAR_CACHE.discard(DEVICE_ID)
+    with year_store.MappedYear(cache_io.cache_path(DEVICE_ID, 2024)) as columns:
+        assert columns.empty_bitmap() == cache_io.empty_bitmap(cache)
+        assert columns.valid_bitmap() == cache_io.data_bitmap(cache, 2024)
+    assert cache_io.load_year(DEVICE_ID, 2024)["meta"] == cache["meta"]
+
+    path = cache_io.export_year_json(DEVICE_ID, 2024)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["meta"]["empty_dates"] == ["2024-03-01", "2024-07-04"]
+
+
+def test_mark_empty_rejects_days_of_another_year():
+    """Test a date of another year never sets a bit in the cache's bitmap."""
+    cache = cache_io._empty_cache()
+    cache_io.mark_empty(cache, "2024-12-31", 2024)
+    for date_str in ("2025-01-01", "bogus"):
+        with pytest.raises(ValueError):
+            cache_io.mark_empty(cache, date_str, 2024)
+    assert cache_io.empty_dates(cache, 2024) == ["2024-12-31"]
+
+
+def test_version_1_store_with_empty_date_list_is_read(cache_dir):
+    """Test a version 1 year store listing empty dates in its trailer still loads."""
+    cache = cache_io._empty_cache()
+    cache_io.update_daily(cache, "2024-01-05", {"pv": 2.5})
+    encoded = year_store.encode_year(2024, cache)
+    trailer = json.dumps({"meta": {"version": 1, "empty_dates": ["2024-01-06", "2024-02-01"]}}).encode("utf-8")
+    header = list(year_store._HEADER.unpack_from(encoded, 0))
+    header[1] = 1
+    header[-1] = len(trailer)
+    v1 = (
+        year_store._HEADER.pack(*header)
+        + encoded[year_store._HEADER.size:year_store._EMPTY_BITMAP_OFFSET]
+        + trailer
+    )
+    with open(cache_io.cache_path(DEVICE_ID, 2024), "wb") as f:
+        f.write(v1)
+
+    loaded = cache_io.load_year(DEVICE_ID, 2024)
+    assert loaded["daily"]["2024-01-05"]["pv"] == pytest.approx(2.5)
+    assert "empty_dates" not in loaded["meta"]
+    assert cache_io.empty_dates(loaded, 2024) == ["2024-01-06", "2024-02-01"]
@@ -0,0 +1,49 @@
+"""Tests for background finalization of finished days."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.lumentree.const import FINALIZE_SPREAD
+from custom_components.lumentree.coordinators.daily_coordinator import DailyStatsCoordinator
+from custom_components.lumentree.core.limiter import RequestPriority, current_priority
+
+
+def _coordinator(device_sn: str = "TEST123456") -> DailyStatsCoordinator:
+    hass = MagicMock()
+    hass.async_add_executor_job = AsyncMock(return_value={"daily": {}, "meta": {}})
+    return DailyStatsCoordinator(hass, MagicMock(), MagicMock(_device_id=device_sn), device_sn)
+
+
+def test_finalize_offset_spreads_devices():
+    """Test devices get stable, different offsets within the spread window."""
+    offsets = {_coordinator(f"P{n:09d}")._finalize_offset for n in range(20)}
+
+    assert all(0 <= offset < FINALIZE_SPREAD for offset in offsets)
+    assert len(offsets) > 10
+    assert _coordinator("P000000001")._finalize_offset == _coordinator("P000000001")._finalize_offset
+
+
+@pytest.mark.asyncio
+async def test_finalize_refetches_until_data_is_stable():
+    """Test finalization re-fetches with FINALIZE priority until two fetches agree."""
+    coord = _coordinator()
+    coord._finalize_offset = 0
+    partial = {"pv": 10.0, "grid": 1.0, "load": 5.0, "essential": 1.0, "charge": 2.0, "discharge": 1.0}
+    final = dict(partial, pv=12.5)
+    priorities: list[RequestPriority] = []
+
+    async def fetch_day(date_str):
+        priorities.append(current_priority())
+        return [partial, final, final][len(priorities) - 1]
+
+    coord.aggregator.fetch_day = fetch_day
+    with patch(
+        "custom_components.lumentree.coordinators.daily_coordinator.FINALIZE_RETRY_DELAYS", (0, 0, 0)
+    ), patch.object(DailyStatsCoordinator, "_save_finalized_values", new_callable=AsyncMock) as mock_save:
+        await coord._async_finalize_day("2024-06-01")
+
+    assert priorities == [RequestPriority.FINALIZE] * 3
+    assert [c.args[1] for c in mock_save.await_args_list] == [partial, final]
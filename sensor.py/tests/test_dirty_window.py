@@ -0,0 +1,77 @@
+"""Tests for the per-device dirty window refreshed by the nightly delta."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+from typing import Any, Callable
+
+import aiohttp
+import pytest
+
+from custom_components.lumentree.const import URL_GET_MONTH_DATA, URL_GET_YEAR_DATA
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services.aggregator import StatsAggregator
+
+from . import DEVICE_ID
+from .mock_lesvr import MockLesvrConfig, MockLesvrServer
+
+
+class _ExecutorHass:
+    """Just enough of HomeAssistant for the aggregator."""
+
+    async def async_add_executor_job(self, target: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+
+def _edit_cache(day: dt.date, edit: Callable[[dict, str], None]) -> None:
+    cache = cache_io.load_year(DEVICE_ID, day.year)
+    edit(cache, day.isoformat())
+    cache_io.save_year(DEVICE_ID, day.year, cache)
+
+
+def test_update_daily_keeps_unfinished_days_dirty():
+    """Test a day written before it is over stays dirty until rewritten later."""
+    today = dt.date.today().isoformat()
+    cache, _m, _ = cache_io.update_daily(cache_io._empty_cache(), today, {"pv": 1.0})
+    assert cache_io.dirty_dates(cache) == [today]
+
+    yesterday = (dt.date.today() - dt.timedelta(days=1)).isoformat()
+    cache_io.mark_dirty(cache, yesterday)
+    cache, _m, _ = cache_io.update_daily(cache, yesterday, {"pv": 2.0})
+    assert cache_io.dirty_dates(cache) == [today]
+
+
+@pytest.mark.asyncio
+async def test_refresh_dirty_fetches_only_changed_days(cache_dir):
+    """Test the nightly delta costs month checks plus one fetch per dirty day."""
+    today = dt.date.today()
+    config = MockLesvrConfig(first_day=today - dt.timedelta(days=60))
+    async with MockLesvrServer(config) as server, aiohttp.ClientSession() as session:
+        client = LumentreeHttpApiClient(session, DEVICE_ID, base_url=server.url)
+        await client.authenticate_device(DEVICE_ID)
+        aggregator = StatsAggregator(_ExecutorHass(), client, DEVICE_ID)
+        await aggregator.backfill_days(today - dt.timedelta(days=40), today)
+
+        wrong, missing, stale = (today - dt.timedelta(days=n) for n in (3, 2, 20))
+        _edit_cache(wrong, lambda c, d: c["daily"][d].update(pv=c["daily"][d]["pv"] + 5.0))
+        _edit_cache(missing, lambda c, d: c["daily"].pop(d))
+        _edit_cache(stale, cache_io.mark_dirty)
+
+        requests_before = server.total_requests
+        stats = await aggregator.refresh_dirty()
+        requests = server.total_requests - requests_before
+
+    assert stats["dirty"] == 4  # today, wrong, missing, stale
+    assert stats["refreshed"] == 4
+    assert server.requests[URL_GET_YEAR_DATA] == 0
+    assert server.requests[URL_GET_MONTH_DATA] == stats["months_checked"]
+    assert requests == stats["months_checked"] + 3 * stats["dirty"]
+
+    expected = server.device.day_totals(wrong)
+    assert cache_io.load_year(DEVICE_ID, wrong.year)["daily"][wrong.isoformat()]["pv"] == pytest.approx(
+        expected["pv"] / 10.0
+    )
+    dirty = {d for year in {today.year, stale.year} for d in cache_io.dirty_dates(cache_io.load_year(DEVICE_ID, year))}
+    assert dirty == {today.isoformat()}
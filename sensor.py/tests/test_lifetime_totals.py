@@ -0,0 +1,73 @@
+"""Tests for the persisted lifetime totals."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services.lifetime_totals import LifetimeTotals
+
+from . import DEVICE_ID
+
+
+@pytest.fixture
+def saved_years(cache_dir, seeded_year) -> dict:
+    """Three saved years of random days; returns their caches."""
+    caches = {}
+    for year in (2022, 2023, 2024):
+        caches[year] = seeded_year(year, seed=7 + year, days=range(1, 29, 3))
+        cache_io.save_year(DEVICE_ID, year, caches[year])
+    return caches
+
+
+def _expected(caches: dict, key: str) -> float:
+    return sum(cache["yearly_total"][key] for cache in caches.values())
+
+
+def test_totals_follow_year_changes_without_rereading(saved_years, monkeypatch):
+    """Test years are summed once and later day updates are applied as deltas."""
+    tracker = LifetimeTotals(cache_io.YEAR_CACHE)
+    result = tracker.read(DEVICE_ID, 2015, 2024)
+    assert result["years"] == [2022, 2023, 2024]
+    for key in cache_io.AGGREGATE_KEYS:
+        assert result["totals"][key] == pytest.approx(_expected(saved_years, key))
+
+    def _no_reads(*_args):
+        raise AssertionError("year read again")
+
+    monkeypatch.setattr(cache_io.YEAR_CACHE, "acquire", _no_reads)
+    cache = cache_io.load_year(DEVICE_ID, 2024)
+    cache_io.update_daily(cache, "2024-06-02", {"pv": 123.4})
+    cache_io.save_year(DEVICE_ID, 2024, cache)
+    saved_years[2024] = cache
+
+    result = tracker.read(DEVICE_ID, 2015, 2024)
+    assert result["totals"]["pv"] == pytest.approx(_expected(saved_years, "pv"))
+
+
+def test_saved_state_skips_unchanged_years_after_restart(saved_years, monkeypatch):
+    """Test a restarted tracker only re-sums years whose file changed."""
+    tracker = LifetimeTotals(cache_io.YEAR_CACHE)
+    tracker.read(DEVICE_ID, 2015, 2024)
+    tracker.close(DEVICE_ID)
+
+    cache = cache_io.load_year(DEVICE_ID, 2023)
+    cache_io.update_daily(cache, "2023-01-02", {"grid": 50.0})
+    cache_io.save_year(DEVICE_ID, 2023, cache)
+    saved_years[2023] = cache
+    cache_io.YEAR_CACHE.discard(DEVICE_ID)
+
+    acquire = cache_io.YEAR_CACHE.acquire
+    read_years = []
+
+    def _recording_acquire(device_id, year):
+        read_years.append(year)
+        return acquire(device_id, year)
+
+    monkeypatch.setattr(cache_io.YEAR_CACHE, "acquire", _recording_acquire)
+    restarted = LifetimeTotals(cache_io.YEAR_CACHE)
+    result = restarted.read(DEVICE_ID, 2015, 2024)
+
+    assert 2022 not in read_years and 2024 not in read_years
+    assert 2023 in read_years
+    assert result["totals"]["grid"] == pytest.approx(_expected(saved_years, "grid"))
@@ -0,0 +1,148 @@
+"""Tests for the priority limiter and pipelined multi-day fetch."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.core.exceptions import ApiException
+from custom_components.lumentree.core.limiter import PriorityLimiter, RequestPriority
+from custom_components.lumentree.services.aggregator import StatsAggregator
+
+
+@pytest.mark.asyncio
+async def test_limiter_admits_waiters_by_priority():
+    """Test a freed slot goes to the highest-priority waiter first."""
+    limiter = PriorityLimiter(1)
+    order: list[str] = []
+
+    async def worker(name: str, priority: RequestPriority) -> None:
+        async with limiter.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await limiter.acquire(RequestPriority.LIVE)
+    tasks = [
+        asyncio.create_task(worker("history", RequestPriority.HISTORY)),
+        asyncio.create_task(worker("recent", RequestPriority.RECENT)),
+        asyncio.create_task(worker("live", RequestPriority.LIVE)),
+    ]
+    await asyncio.sleep(0)
+    assert limiter.waiting == 3
+    limiter.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["live", "recent", "history"]
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_budgets_reserve_slots_for_urgent_work():
+    """Test background priorities stay within their budgets so live requests never wait."""
+    limiter = PriorityLimiter(4, {RequestPriority.RECENT: 3, RequestPriority.HISTORY: 2})
+    for _ in range(2):
+        await limiter.acquire(RequestPriority.HISTORY)
+
+    history = asyncio.create_task(limiter.acquire(RequestPriority.HISTORY))
+    await asyncio.sleep(0)
+    assert not history.done()
+    assert limiter.active == 2
+
+    await limiter.acquire(RequestPriority.RECENT)
+    recent = asyncio.create_task(limiter.acquire(RequestPriority.RECENT))
+    await asyncio.sleep(0)
+    assert not recent.done()
+    # The last slot is reserved for live work even with background waiters queued
+    await asyncio.wait_for(limiter.acquire(RequestPriority.LIVE), 0.1)
+    assert limiter.held(RequestPriority.LIVE) == 1
+
+    limiter.release(RequestPriority.HISTORY)
+    await asyncio.sleep(0)
+    # The freed history slot goes to the waiting recent request first
+    assert recent.done() and not history.done()
+    history.cancel()
+
+
+@pytest.mark.asyncio
+async def test_reserved_slots_stay_free_for_more_urgent_priorities():
+    """Test a less urgent request cannot take a slot a more urgent budget reserves."""
+    limiter = PriorityLimiter(4, {RequestPriority.FINALIZE: 3, RequestPriority.HISTORY: 2})
+    for _ in range(3):
+        await limiter.acquire(RequestPriority.FINALIZE)
+
+    # History has room in its own budget, but finalization's group is full
+    history = asyncio.ensure_future(limiter.acquire(RequestPriority.HISTORY))
+    await asyncio.sleep(0)
+    assert not history.done()
+    await asyncio.wait_for(limiter.acquire(RequestPriority.LIVE), 0.1)
+
+    limiter.release(RequestPriority.LIVE)
+    limiter.release(RequestPriority.FINALIZE)
+    await asyncio.sleep(0)
+    assert history.done() and limiter.held(RequestPriority.HISTORY) == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_days_pipelines_and_reports_errors():
+    """Test fetch_days bounds concurrency, keeps order and yields per-day errors."""
+    client = LumentreeHttpApiClient(None, "TEST123456")
+    state = {"in_flight": 0, "peak": 0}
+    delays = {"2024-01-01": 0.03, "2024-01-02": 0.0, "2024-01-03": 0.01, "2024-01-04": 0.0}
+
+    async def fetch_day_totals(device_id, date_str):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            await asyncio.sleep(delays[date_str])
+            if date_str == "2024-01-03":
+                raise ApiException("boom")
+            return {"pv": 1.0}
+        finally:
+            state["in_flight"] -= 1
+
+    with patch.object(LumentreeHttpApiClient, "fetch_day_totals", side_effect=fetch_day_totals):
+        results = [r async for r in client.fetch_days(list(delays), concurrency=2, ordered=True)]
+
+    assert [r.date for r in results] == list(delays)
+    assert [r.ok for r in results] == [True, True, False, True]
+    assert isinstance(results[2].error, ApiException)
+    assert state["peak"] == 2
+
+
+class _ExecutorHass:
+    """Just enough of HomeAssistant for the aggregator."""
+
+    async def async_add_executor_job(self, target: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+
+@pytest.mark.asyncio
+async def test_stopping_a_backfill_cancels_days_in_flight(cache_dir):
+    """Test leaving a fetch loop early closes the fetch and cancels the requests still running."""
+    client = LumentreeHttpApiClient(None, "TEST123456")
+    state = {"calls": 0, "in_flight": 0, "cancelled": 0}
+
+    async def fetch_day_totals(device_id, date_str):
+        state["calls"] += 1
+        state["in_flight"] += 1
+        try:
+            # The first three (empty) days end the streak; later days are still running
+            await asyncio.sleep(0 if state["calls"] <= 3 else 10)
+            return {"pv": 0.0}
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        finally:
+            state["in_flight"] -= 1
+
+    with patch.object(LumentreeHttpApiClient, "fetch_day_totals", side_effect=fetch_day_totals):
+        aggregator = StatsAggregator(_ExecutorHass(), client, "TEST123456")
+        await aggregator.backfill_all(max_years=None, empty_streak=3)
+
+        # The empty streak ends the loop; nothing keeps running behind it
+        assert state["in_flight"] == 0
+        assert state["cancelled"] > 0
@@ -0,0 +1,122 @@
+"""Tests for the prefix-sum range index."""
+
+from __future__ import annotations
+
+import datetime as dt
+
+import pytest
+
+from custom_components.lumentree.services import cache as cache_io
+
+from . import DEVICE_ID
+
+
+@pytest.fixture
+def three_years(cache_dir, seeded_year) -> dict:
+    """Random days in 2022-2024 (some missing), saved through the year cache."""
+    daily = {}
+    for year in (2022, 2023, 2024):
+        cache = seeded_year(year, seed=11 + year, days=range(1, 32), fill=0.9)
+        cache_io.save_year(DEVICE_ID, year, cache)
+        daily.update(cache["daily"])
+    return daily
+
+
+def _brute_force(daily: dict, start: dt.date, end: dt.date) -> dict:
+    days = [values for date_str, values in daily.items() if start.isoformat() <= date_str <= end.isoformat()]
+    totals = {key: sum(day[key] for day in days) for key in cache_io.AGGREGATE_KEYS}
+    totals["days"] = len(days)
+    return totals
+
+
+def test_range_totals_match_summing_days(three_years):
+    """Test arbitrary ranges (within and across years) match a brute-force sum."""
+    ranges = [
+        (dt.date(2024, 3, 1), dt.date(2024, 3, 7)),
+        (dt.date(2023, 12, 15), dt.date(2024, 1, 14)),
+        (dt.date(2022, 2, 28), dt.date(2024, 11, 30)),
+        (dt.date(2022, 1, 1), dt.date(2022, 12, 31)),
+        (dt.date(2024, 5, 5), dt.date(2024, 5, 5)),
+        (dt.date(2024, 5, 6), dt.date(2024, 5, 5)),
+    ]
+    for start, end in ranges:
+        expected = _brute_force(three_years, start, end)
+        result = cache_io.get_range_totals(DEVICE_ID, start, end)
+        assert result["days"] == expected["days"]
+        for key in cache_io.AGGREGATE_KEYS:
+            assert result[key] == pytest.approx(expected[key], abs=0.51 if key == "savings_vnd" else 1e-6)
+
+    assert set(cache_io.get_range_totals(DEVICE_ID, *ranges[0], metrics=["pv"])) == {"pv", "days"}
+    with pytest.raises(ValueError):
+        cache_io.get_range_totals(DEVICE_ID, *ranges[0], metrics=["voltage"])
+
+
+def test_index_follows_updates(three_years):
+    """Test a saved day change is reflected in ranges covering it."""
+    start, end = dt.date(2022, 6, 1), dt.date(2024, 6, 30)
+    before = cache_io.get_range_totals(DEVICE_ID, start, end, metrics=["pv"])
+
+    cache = cache_io.load_year(DEVICE_ID, 2023)
+    old_pv = cache["daily"].get("2023-07-01", {}).get("pv", 0.0)
+    cache_io.update_daily(cache, "2023-07-01", {"pv": old_pv + 100.0})
+    cache_io.save_year(DEVICE_ID, 2023, cache)
+
+    after = cache_io.get_range_totals(DEVICE_ID, start, end, metrics=["pv"])
+    assert after["pv"] == pytest.approx(before["pv"] + 100.0)
+    assert after["days"] == before["days"] + (0 if "2023-07-01" in three_years else 1)
+
+
+def test_running_sums_built_during_a_change_are_not_kept(three_years, monkeypatch):
+    """Test whole-year sums computed while a year changes are rebuilt on the next query."""
+    start, end = dt.date(2022, 6, 1), dt.date(2024, 6, 30)
+    before = cache_io.get_range_totals(DEVICE_ID, start, end, metrics=["pv"])
+    cache_io.RANGE_INDEX.invalidate(DEVICE_ID)
+
+    build_year = cache_io.RANGE_INDEX._year
+    changed = []
+
+    def year_changing_meanwhile(device_id: str, year: int):
+        prefix = build_year(device_id, year)
+        if year == 2023 and not changed:
+            # Saved right after the old 2023 sums were read
+            changed.append(year)
+            cache = cache_io.load_year(DEVICE_ID, 2023)
+            old_pv = cache["daily"].get("2023-07-01", {}).get("pv", 0.0)
+            cache_io.update_daily(cache, "2023-07-01", {"pv": old_pv + 100.0})
+            cache_io.save_year(DEVICE_ID, 2023, cache)
+        return prefix
+
+    monkeypatch.setattr(cache_io.RANGE_INDEX, "_year", year_changing_meanwhile)
+    cache_io.get_range_totals(DEVICE_ID, start, end, metrics=["pv"])
+    monkeypatch.delattr(cache_io.RANGE_INDEX, "_year")
+
+    after = cache_io.get_range_totals(DEVICE_ID, start, end, metrics=["pv"])
+    assert changed and after["pv"] == pytest.approx(before["pv"] + 100.0)
+
+
+def test_updates_patch_indexed_years_in_place(three_years, monkeypatch):
+    """Test saved changes are applied to indexed years without reading them again."""
+    ranges = [
+        (dt.date(2022, 1, 1), dt.date(2024, 12, 31)),
+        (dt.date(2023, 2, 1), dt.date(2023, 2, 28)),
+        (dt.date(2022, 12, 1), dt.date(2024, 1, 31)),
+    ]
+    for start, end in ranges:
+        cache_io.get_range_totals(DEVICE_ID, start, end)
+
+    for date_str, pv in (("2022-03-04", 500.0), ("2023-02-10", 7.5), ("2023-02-11", 0.0), ("2024-12-31", 12.0)):
+        cache = cache_io.load_year(DEVICE_ID, int(date_str[:4]))
+        cache_io.update_daily(cache, date_str, {"pv": pv})
+        cache_io.save_year(DEVICE_ID, int(date_str[:4]), cache)
+        three_years[date_str] = cache["daily"][date_str]
+
+    def _no_reads(*_args):
+        raise AssertionError("year read again")
+
+    monkeypatch.setattr(cache_io.YEAR_CACHE, "acquire", _no_reads)
+    for start, end in ranges:
+        expected = _brute_force(three_years, start, end)
+        result = cache_io.get_range_totals(DEVICE_ID, start, end)
+        assert result["days"] == expected["days"]
+        for key in cache_io.AGGREGATE_KEYS:
+            assert result[key] == pytest.approx(expected[key], abs=0.51 if key == "savings_vnd" else 1e-6)
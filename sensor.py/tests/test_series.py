@@ -0,0 +1,114 @@
+"""Tests for the compact 5-minute series type."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.lumentree.core.series import BatterySeries, MetricSeries, PowerSeries
+
+
+def test_from_values_skips_invalid():
+    """Test parsing tableValueInfo with invalid entries."""
+    series = PowerSeries.from_values([100, "200", None, "x", 300.5])
+    assert series.tolist() == [100.0, 200.0, 300.5]
+
+
+def test_from_values_not_a_list():
+    """Test parsing a missing series."""
+    assert not PowerSeries.from_values(None)
+    assert PowerSeries.from_values(None).tolist() == []
+
+
+def test_to_kwh_and_hourly():
+    """Test W → kWh conversion and hourly reduction."""
+    series = PowerSeries.from_values([1200.0] * 288)
+    hourly = series.to_kwh().hourly().tolist()
+    assert len(hourly) == 24
+    assert hourly[0] == pytest.approx(1.2)
+    assert series.to_kwh().total() == pytest.approx(28.8)
+
+
+def test_hourly_partial_day():
+    """Test hourly reduction of an incomplete day pads with zeros."""
+    series = PowerSeries.from_values([600.0] * 18)
+    hourly = series.to_kwh().hourly().tolist()
+    assert len(hourly) == 24
+    assert hourly[0] == pytest.approx(0.6)
+    assert hourly[1] == pytest.approx(0.3)
+    assert hourly[2:] == [0.0] * 22
+
+
+def test_hourly_empty():
+    """Test hourly reduction of an empty series stays empty."""
+    assert PowerSeries().hourly().tolist() == []
+
+
+def test_split_sign():
+    """Test splitting a signed battery series."""
+    series = PowerSeries.from_values([100.0, -50.0, 0.0])
+    positive, negative = series.split_sign()
+    assert positive.tolist() == [100.0, 0.0, 0.0]
+    assert negative.tolist() == [0.0, 50.0, 0.0]
+    assert series.negated().tolist() == [-100.0, 50.0, -0.0]
+
+
+def test_add_pads_shorter_series():
+    """Test element-wise addition of series with different lengths."""
+    a = PowerSeries.from_values([1.0, 2.0, 3.0])
+    b = PowerSeries.from_values([10.0])
+    assert (a + b).tolist() == [11.0, 2.0, 3.0]
+    assert (b + a).tolist() == [11.0, 2.0, 3.0]
+
+
+def test_metric_series_views_are_memoized():
+    """Test derived kWh/hourly views are computed once and reused."""
+    series = MetricSeries.from_values([1200.0] * 288)
+    assert series.kwh_5min is series.kwh_5min
+    assert series.hour_kwh is series.hour_kwh
+    assert series.hour_kwh[0] == pytest.approx(1.2)
+    assert series.total_kwh == pytest.approx(28.8)
+
+
+def test_metric_series_sum_of():
+    """Test the lazily built sum of two metrics."""
+    total = MetricSeries.sum_of(
+        MetricSeries.from_values([100.0, 200.0]),
+        MetricSeries.from_values([50.0]),
+    )
+    assert total
+    assert total.w.tolist() == [150.0, 200.0]
+
+
+def test_battery_series_charge_discharge():
+    """Test charge/discharge views of a signed battery series."""
+    battery = BatterySeries(PowerSeries.from_values([1200.0] * 12 + [-600.0] * 12))
+    assert battery.charge.hour_kwh[0] == pytest.approx(1.2)
+    assert battery.charge.hour_kwh[1] == 0.0
+    assert battery.discharge.hour_kwh[1] == pytest.approx(0.6)
+    assert battery.discharge.total_kwh == pytest.approx(0.6)
+
+
+def test_adopt_patches_new_tail():
+    """Test incremental merge of a new intraday slot."""
+    previous = MetricSeries.from_values([600.0] * 13)
+    # Fill the cached views that adopt carries over
+    assert previous.hour_kwh[0] == pytest.approx(0.6)
+    assert previous.total_kwh == pytest.approx(0.65)
+    current = MetricSeries.from_values([600.0] * 13 + [1200.0])
+    assert current.adopt(previous)
+    full = MetricSeries.from_values([600.0] * 13 + [1200.0])
+    assert current.kwh_5min.tolist() == full.kwh_5min.tolist()
+    assert current.hour_kwh.tolist() == full.hour_kwh.tolist()
+    # Summed from the adopted slots, so exactly what a fresh fetch gives
+    assert current.total_kwh == full.total_kwh
+
+
+def test_adopt_rejects_inconsistent_revisions():
+    """Test a shorter or heavily revised series forces a full rebuild."""
+    previous = MetricSeries.from_values([100.0] * 50)
+    assert len(previous.hour_kwh) == 24
+    assert not MetricSeries.from_values([100.0] * 49).adopt(previous)
+    assert not MetricSeries.from_values([200.0] * 50).adopt(previous)
+    revised = MetricSeries.from_values([100.0] * 10 + [150.0] + [100.0] * 39)
+    assert revised.adopt(previous)
+    assert revised.hour_kwh[0] == pytest.approx(MetricSeries.from_values(revised.w.tolist()).hour_kwh[0])
@@ -11,15 +11,20 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
-from custom_components.lumentree import async_setup_entry, async_unload_entry
+from custom_components.lumentree import async_remove_entry, async_setup_entry, async_unload_entry
 from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
 from custom_components.lumentree.core.mqtt_client import LumentreeMqttClient
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services.backfill_jobs import BackfillJobManager
+from custom_components.lumentree.services.device_info_store import DeviceInfoStore
 
 
 @pytest.mark.asyncio
 async def test_setup_entry_success(mock_hass: HomeAssistant, mock_config_entry: ConfigEntry):
     """Test successful setup of integration."""
-    with patch("custom_components.lumentree.async_get_clientsession") as mock_session, \
+    with patch("custom_components.lumentree.async_get_http_session") as mock_session, \
+         patch.object(DeviceInfoStore, "async_load", new_callable=AsyncMock, return_value=None), \
+         patch.object(DeviceInfoStore, "async_save", new_callable=AsyncMock) as mock_save, \
          patch.object(LumentreeHttpApiClient, "get_device_info", new_callable=AsyncMock) as mock_get_info, \
          patch.object(LumentreeMqttClient, "connect", new_callable=AsyncMock) as mock_connect, \
          patch("custom_components.lumentree.hass.config_entries.async_forward_entry_setups") as mock_forward:
@@ -37,12 +42,48 @@ async def test_setup_entry_success(mock_hass: HomeAssistant, mock_config_entry:
         assert mock_config_entry.entry_id in mock_hass.data[DOMAIN]
         mock_connect.assert_called_once()
         mock_get_info.assert_called_once()
+        mock_save.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_setup_entry_uses_stored_device_info(mock_hass: HomeAssistant, mock_config_entry: ConfigEntry):
+    """Test setup does not wait for the cloud when device info is stored."""
+    stored_info = {
+        "deviceId": "TEST123456",
+        "deviceType": "SUNT-4.0KW-H",
+        "controllerVersion": "1.0.0",
+    }
+    mock_hass.bus = MagicMock()
+    mock_hass.services = MagicMock()
+    mock_hass.async_create_task = MagicMock(side_effect=lambda coro, *args, **kwargs: coro.close())
+    mock_hass.config_entries = MagicMock()
+    mock_hass.config_entries.async_forward_entry_setups = AsyncMock(return_value=True)
+    with patch("custom_components.lumentree.async_get_http_session"), \
+         patch("custom_components.lumentree.async_at_started") as mock_at_started, \
+         patch("custom_components.lumentree.async_track_time_interval"), \
+         patch.object(cache_io.YEAR_CACHE, "async_attach"), \
+         patch.object(BackfillJobManager, "async_load", new_callable=AsyncMock), \
+         patch.object(DeviceInfoStore, "async_load", new_callable=AsyncMock, return_value=stored_info), \
+         patch.object(DeviceInfoStore, "async_save", new_callable=AsyncMock) as mock_save, \
+         patch.object(LumentreeHttpApiClient, "get_device_info", new_callable=AsyncMock) as mock_get_info, \
+         patch.object(LumentreeMqttClient, "connect", new_callable=AsyncMock):
+        
+        result = await async_setup_entry(mock_hass, mock_config_entry)
+        
+        assert result is True
+        mock_hass.config_entries.async_forward_entry_setups.assert_awaited_once()
+        mock_save.assert_not_called()
+        entry_data = mock_hass.data[DOMAIN][mock_config_entry.entry_id]
+        assert entry_data["device_api_info"] == stored_info
+        mock_get_info.assert_not_called()
+        mock_at_started.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_setup_entry_api_error(mock_hass: HomeAssistant, mock_config_entry: ConfigEntry):
     """Test setup failure when API returns error."""
-    with patch("custom_components.lumentree.async_get_clientsession"), \
+    with patch("custom_components.lumentree.async_get_http_session"), \
+         patch.object(DeviceInfoStore, "async_load", new_callable=AsyncMock, return_value=None), \
          patch.object(LumentreeHttpApiClient, "get_device_info", new_callable=AsyncMock) as mock_get_info:
         
         mock_get_info.return_value = {"_error": "Device not found"}
@@ -80,3 +121,11 @@ async def test_unload_entry_no_data(mock_hass: HomeAssistant, mock_config_entry:
         
         assert result is True
 
+
+@pytest.mark.asyncio
+async def test_remove_entry_deletes_stored_device_info(mock_hass: HomeAssistant, mock_config_entry: ConfigEntry):
+    """Test removing the entry deletes its stored device info."""
+    with patch.object(DeviceInfoStore, "async_remove", new_callable=AsyncMock) as mock_remove:
+        await async_remove_entry(mock_hass, mock_config_entry)
+        
+        mock_remove.assert_awaited_once()
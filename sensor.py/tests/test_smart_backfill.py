@@ -0,0 +1,64 @@
+"""Tests for concurrent month backfill in smart_backfill."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.core.exceptions import CircuitOpenException
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services import smart_backfill as smart_backfill_module
+from custom_components.lumentree.services.year_cache import YearCacheManager
+
+
+@pytest.mark.asyncio
+async def test_months_fetched_concurrently_and_saved_once_per_year():
+    """Test months overlap, a circuit-open month is retried and each year is saved once."""
+    this_year = dt.date.today().year
+    years = {this_year: [1, 2, 3], this_year - 1: [10, 11, 12]}
+    state = {"in_flight": 0, "peak": 0, "circuit_failed": False}
+    saved: list[int] = []
+
+    async def get_month_data(device_id, year, month):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.01)
+            if (year, month) == (this_year, 2) and not state["circuit_failed"]:
+                state["circuit_failed"] = True
+                raise CircuitOpenException("down", retry_after=0.0)
+            return {"pv": [float(month)] * 28, "grid": [0.0] * 28, "homeload": [1.0] * 28}
+        finally:
+            state["in_flight"] -= 1
+
+    hass = MagicMock()
+    hass.loop = asyncio.get_running_loop()
+
+    async def executor(target, *args):
+        return target(*args)
+
+    hass.async_add_executor_job = executor
+    aggregator = MagicMock(_device_id="TEST123456", _api=LumentreeHttpApiClient(None, "TEST123456"))
+    # Months are committed one by one; the write-behind cache writes each year once
+    year_cache = YearCacheManager(
+        lambda device_id, year: (cache_io._empty_cache(), False),
+        lambda device_id, year, data: saved.append(year),
+        flush_delay=3600,
+    )
+    year_cache.async_attach(hass, "TEST123456")
+
+    with patch.object(smart_backfill_module, "detect_data_gaps_from_api", AsyncMock(return_value=years)), \
+         patch.object(LumentreeHttpApiClient, "get_month_data", side_effect=get_month_data), \
+         patch.object(cache_io, "YEAR_CACHE", year_cache):
+        stats = await smart_backfill_module.smart_backfill(hass, aggregator, max_years=2, optimize_cache=False)
+        await year_cache.async_detach("TEST123456")
+
+    assert state["peak"] > 1
+    assert stats["months_processed"] == 6
+    assert stats["days_added"] == 6 * 28
+    assert stats["errors"] == 0
+    assert sorted(saved) == [this_year - 1, this_year]
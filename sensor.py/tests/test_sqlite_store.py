@@ -0,0 +1,93 @@
+"""Tests for the optional SQLite statistics backend."""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services import sqlite_store
+
+from . import DEVICE_ID
+
+
+@pytest.fixture
+def sqlite_backend(cache_dir):
+    db = cache_io.enable_sqlite(DEVICE_ID, str(cache_dir / "stats.db"))
+    yield db
+    cache_io.disable_sqlite(DEVICE_ID)
+
+
+def test_round_trip_and_range_totals_match_files(sqlite_backend, year_cache):
+    """Test the SQLite backend stores years and sums ranges like the file backend."""
+    cache_io.save_year(DEVICE_ID, 2024, year_cache)
+    loaded = cache_io.load_year(DEVICE_ID, 2024)
+    assert loaded["daily"] == year_cache["daily"]
+    assert loaded["yearly_total"] == year_cache["yearly_total"]
+    assert loaded["meta"] == year_cache["meta"]
+    assert not os.path.exists(cache_io.cache_path(DEVICE_ID, 2024))
+
+    ranges = [
+        (dt.date(2024, 1, 1), dt.date(2024, 12, 31)),
+        (dt.date(2024, 2, 10), dt.date(2024, 6, 3)),
+        (dt.date(2024, 3, 5), dt.date(2024, 3, 20)),
+        (dt.date(2024, 4, 1), dt.date(2024, 5, 15)),
+    ]
+    from_db = [cache_io.range_totals(DEVICE_ID, start, end) for start, end in ranges]
+    cache_io.disable_sqlite(DEVICE_ID, export_to_files=True)
+    from_files = [cache_io.range_totals(DEVICE_ID, start, end) for start, end in ranges]
+
+    assert from_db == pytest.approx(from_files)
+    assert from_db[0]["days"] == 12 * 28
+    assert from_db[0]["pv"] == pytest.approx(year_cache["yearly_total"]["pv"])
+
+
+def test_year_file_is_imported_on_first_load(cache_dir, year_cache):
+    """Test enabling SQLite imports existing year files and finds the first data day."""
+    cache_io.save_year(DEVICE_ID, 2024, year_cache)
+    db = cache_io.enable_sqlite(DEVICE_ID, str(cache_dir / "stats.db"))
+    try:
+        assert not db.has_year(DEVICE_ID, 2024)
+        assert cache_io.load_year(DEVICE_ID, 2024)["daily"] == year_cache["daily"]
+        assert db.years(DEVICE_ID) == [2024]
+        assert db.first_data_date(DEVICE_ID, since="2024-02-15") == "2024-02-15"
+
+        assert cache_io.purge_device(DEVICE_ID)
+        assert db.years(DEVICE_ID) == []
+    finally:
+        cache_io.disable_sqlite(DEVICE_ID)
+
+
+def test_switching_back_and_forth_keeps_days_written_on_files(cache_dir):
+    """Test enable -> disable (export) -> enable reads days saved while on files."""
+    path = str(cache_dir / "stats.db")
+
+    def save_day(date_str: str) -> None:
+        cache = cache_io.load_year(DEVICE_ID, 2024)
+        cache_io.update_daily(cache, date_str, {"pv": 1.0})
+        cache_io.save_year(DEVICE_ID, 2024, cache)
+
+    cache_io.enable_sqlite(DEVICE_ID, path)
+    save_day("2024-01-01")
+    cache_io.disable_sqlite(DEVICE_ID, export_to_files=True)
+    save_day("2024-01-02")
+    db = cache_io.enable_sqlite(DEVICE_ID, path)
+    try:
+        assert sorted(cache_io.load_year(DEVICE_ID, 2024)["daily"]) == ["2024-01-01", "2024-01-02"]
+        assert db.years(DEVICE_ID) == [2024]
+    finally:
+        cache_io.disable_sqlite(DEVICE_ID)
+
+
+def test_database_is_shared_and_closed_across_threads(tmp_path):
+    """Test concurrent setups share one database and the last release closes it."""
+    path = str(tmp_path / "stats.db")
+    devices = [f"P{n:09d}" for n in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        opened = list(pool.map(lambda device_id: sqlite_store.acquire_database(path, device_id), devices))
+        assert len({id(db) for db in opened}) == 1
+        list(pool.map(lambda device_id: sqlite_store.release_database(path, device_id), devices))
+    assert path not in sqlite_store._databases and path not in sqlite_store._users
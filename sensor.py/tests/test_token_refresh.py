@@ -0,0 +1,68 @@
+"""Tests for automatic single-flight token refresh."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.core.exceptions import AuthException
+
+
+def _fake_server(client: LumentreeHttpApiClient, state: dict):
+    """Build fake _request_once/authenticate_device bound to a token state."""
+
+    async def request_once(method, endpoint, params=None, data=None, extra_headers=None,
+                           requires_auth=True, max_retries=3):
+        await asyncio.sleep(0)
+        if requires_auth and client._token != state["valid"]:
+            raise AuthException("Auth failed (code=203)")
+        return {"returnValue": 1, "token": client._token}
+
+    async def authenticate_device(device_id):
+        state["auth_calls"] += 1
+        await asyncio.sleep(0.01)
+        if not state["auth_ok"]:
+            raise AuthException("Failed to get token")
+        client.set_token(state["valid"])
+        return state["valid"]
+
+    return request_once, authenticate_device
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_reauth():
+    """Test only one task re-authenticates and all callers replay."""
+    client = LumentreeHttpApiClient(None, "TEST123456")
+    client.set_token("expired")
+    state = {"valid": "fresh", "auth_calls": 0, "auth_ok": True}
+    tokens: list[str] = []
+    client.add_token_listener(tokens.append)
+    request_once, authenticate_device = _fake_server(client, state)
+
+    with patch.object(LumentreeHttpApiClient, "_request_once", side_effect=request_once), \
+         patch.object(LumentreeHttpApiClient, "authenticate_device", side_effect=authenticate_device):
+        results = await asyncio.gather(*(client._request("GET", "/x") for _ in range(5)))
+
+    assert all(r["token"] == "fresh" for r in results)
+    assert state["auth_calls"] == 1
+    assert tokens == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_failed_reauth_backs_off():
+    """Test repeated failures do not re-authenticate on every request."""
+    client = LumentreeHttpApiClient(None, "TEST123456")
+    client.set_token("expired")
+    state = {"valid": "fresh", "auth_calls": 0, "auth_ok": False}
+    request_once, authenticate_device = _fake_server(client, state)
+
+    with patch.object(LumentreeHttpApiClient, "_request_once", side_effect=request_once), \
+         patch.object(LumentreeHttpApiClient, "authenticate_device", side_effect=authenticate_device):
+        for _ in range(3):
+            with pytest.raises(AuthException):
+                await client._request("GET", "/x")
+
+    assert state["auth_calls"] == 1
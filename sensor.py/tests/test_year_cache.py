@@ -0,0 +1,196 @@
+"""Tests for the shared in-memory year cache."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Callable
+
+import pytest
+
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services import cache_optimizer
+from custom_components.lumentree.services.year_cache import YearCacheManager, YearConflictError, copy_year
+
+from . import DEVICE_ID
+
+
+class _LoopHass:
+    """Just enough of HomeAssistant for the write-behind flush."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+
+    async def async_add_executor_job(self, target: Callable[..., Any], *args: Any) -> Any:
+        return await self.loop.run_in_executor(None, target, *args)
+
+    def async_create_background_task(self, coro: Any, name: str) -> asyncio.Task:
+        return self.loop.create_task(coro, name=name)
+
+
+def _manager(**kwargs: Any) -> tuple[YearCacheManager, dict, list]:
+    disk: dict = {}
+    writes: list = []
+
+    def writer(device_id: str, year: int, data: dict) -> None:
+        writes.append((device_id, year))
+        disk[(device_id, year)] = data
+
+    def loader(device_id: str, year: int) -> tuple[dict, bool]:
+        return copy_year(disk.get((device_id, year), cache_io._empty_cache())), False
+
+    return YearCacheManager(loader, writer, **kwargs), disk, writes
+
+
+def test_unchanged_saves_are_not_written(cache_dir):
+    """Test reloads are served from memory and saving unchanged data writes nothing."""
+    manager, _disk, writes = _manager()
+    cache, _m, _ = cache_io.update_daily(manager.load(DEVICE_ID, 2024), "2024-05-01", {"pv": 3.0})
+    assert manager.store(DEVICE_ID, 2024, cache)
+
+    reloaded = manager.load(DEVICE_ID, 2024)
+    cache_io.recompute_aggregates(reloaded)
+    assert not manager.store(DEVICE_ID, 2024, reloaded)
+    reloaded["daily"]["2024-05-01"]["pv"] = 99.0  # private copy
+    assert manager.load(DEVICE_ID, 2024)["daily"]["2024-05-01"]["pv"] == 3.0
+
+    assert writes == [(DEVICE_ID, 2024)]
+    assert manager.stats()["misses"] == 1
+
+
+def test_years_are_keyed_on_the_resolved_cache_root(tmp_path, monkeypatch):
+    """Test the same cache directory reached through a symlink shares cached years."""
+    config = tmp_path / "config"
+    config.mkdir()
+    link = tmp_path / "link"
+    link.symlink_to(config)
+
+    monkeypatch.chdir(link)
+    cache = cache_io._empty_cache()
+    cache_io.update_daily(cache, "2024-05-01", {"pv": 1.0})
+    cache_io.save_year(DEVICE_ID, 2024, cache)
+
+    monkeypatch.chdir(config)
+    assert cache_io.YEAR_CACHE.root() == os.path.realpath(config / cache_io.CACHE_BASE_DIR)
+    hits = cache_io.YEAR_CACHE.hits
+    assert "2024-05-01" in cache_io.load_year(DEVICE_ID, 2024)["daily"]
+    assert cache_io.YEAR_CACHE.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_changes(cache_dir):
+    """Test several changes within the flush delay end up in one write in the executor."""
+    manager, disk, writes = _manager(flush_delay=0.05)
+    manager.async_attach(_LoopHass(), DEVICE_ID)
+    for day in range(1, 6):
+        cache, _m, _ = cache_io.update_daily(manager.load(DEVICE_ID, 2024), f"2024-05-0{day}", {"pv": 1.0})
+        manager.store(DEVICE_ID, 2024, cache)
+    assert writes == []
+
+    await asyncio.sleep(0.2)
+    assert writes == [(DEVICE_ID, 2024)]
+    assert len(disk[(DEVICE_ID, 2024)]["daily"]) == 5
+
+    cache, _m, _ = cache_io.update_daily(manager.load(DEVICE_ID, 2024), "2024-05-06", {"pv": 1.0})
+    manager.store(DEVICE_ID, 2024, cache)
+    await manager.async_detach(DEVICE_ID)
+    assert len(writes) == 2
+    assert manager.stats()["years"] == 0
+
+
+def test_eviction_keeps_held_and_dirty_years(cache_dir):
+    """Test LRU eviction skips years with open handles or unwritten changes."""
+    manager, _disk, writes = _manager(max_years=2)
+    manager._hass = object()  # suppress write-through; nothing flushes until asked
+    manager._changed = lambda key: None
+
+    with manager.acquire(DEVICE_ID, 2020) as held:
+        manager.store(DEVICE_ID, 2021, cache_io.update_daily(cache_io._empty_cache(), "2021-01-01", {"pv": 1.0})[0])
+        for year in (2022, 2023):
+            manager.load(DEVICE_ID, year)
+        assert manager.peek(DEVICE_ID, 2020) is held.data
+        assert manager.peek(DEVICE_ID, 2021) is not None
+        assert manager.peek(DEVICE_ID, 2022) is None
+
+    assert manager.flush() == 1
+    assert writes == [(DEVICE_ID, 2021)]
+    assert manager.stats()["years"] == 2
+
+
+@pytest.mark.asyncio
+async def test_transactions_on_a_year_run_one_after_another(cache_dir):
+    """Test concurrent transactions on one year keep both changes."""
+    manager, _disk, _writes = _manager()
+
+    async def add_day(date_str: str) -> None:
+        async with manager.year(DEVICE_ID, 2024) as tx:
+            await asyncio.sleep(0.01)  # e.g. waiting for the executor
+            cache_io.update_daily(tx.data, date_str, {"pv": 1.0})
+
+    await asyncio.gather(add_day("2024-05-01"), add_day("2024-05-02"))
+
+    assert sorted(manager.load(DEVICE_ID, 2024)["daily"]) == ["2024-05-01", "2024-05-02"]
+    assert manager.load(DEVICE_ID, 2024)["yearly_total"]["pv"] == 2.0
+    # Locks of years without open transactions are not kept
+    assert len(manager._async_locks) == 0
+
+
+@pytest.mark.asyncio
+async def test_conflicting_save_is_detected_and_replayed(cache_dir):
+    """Test a save outside the transaction fails the commit and buffered ops are replayed."""
+    manager, _disk, _writes = _manager()
+
+    def save_outside(date_str: str) -> None:
+        cache = manager.load(DEVICE_ID, 2024)
+        cache_io.update_daily(cache, date_str, {"grid": 2.0})
+        manager.store(DEVICE_ID, 2024, cache)
+
+    with pytest.raises(YearConflictError):
+        async with manager.year(DEVICE_ID, 2024) as tx:
+            cache_io.update_daily(tx.data, "2024-05-01", {"pv": 1.0})
+            save_outside("2024-05-02")
+    assert "2024-05-01" not in manager.load(DEVICE_ID, 2024)["daily"]
+
+    conflicts = ["2024-05-03"]
+
+    def add_day(cache: dict) -> None:
+        cache_io.update_daily(cache, "2024-05-01", {"pv": 1.0})
+        if conflicts:
+            save_outside(conflicts.pop())
+
+    ops = [add_day]
+    await manager.async_apply(DEVICE_ID, 2024, ops)
+
+    assert ops == []
+    assert sorted(manager.load(DEVICE_ID, 2024)["daily"]) == ["2024-05-01", "2024-05-02", "2024-05-03"]
+
+
+@pytest.mark.asyncio
+async def test_optimizer_keeps_days_saved_while_it_runs(cache_dir, monkeypatch):
+    """Test the optimizer commits through a transaction instead of overwriting a concurrent save."""
+    cache = cache_io._empty_cache()
+    cache_io.update_daily(cache, "2024-05-01", {"pv": 1.0})
+    cache_io.update_daily(cache, "2024-05-02", {"pv": 0.0})
+    cache_io.save_year(DEVICE_ID, 2024, cache)
+
+    result = await cache_optimizer.async_optimize_year_cache(DEVICE_ID, 2024, dry_run=True)
+    assert result["removed"] == 1
+    assert "2024-05-02" in cache_io.load_year(DEVICE_ID, 2024)["daily"]
+
+    normalize = cache_optimizer.normalize_cache
+    saved = []
+
+    def normalize_during_save(cache: dict, **kwargs: Any) -> Any:
+        if not saved:
+            saved.append(True)
+            concurrent = cache_io.load_year(DEVICE_ID, 2024)
+            cache_io.update_daily(concurrent, "2024-05-03", {"pv": 3.0})
+            cache_io.save_year(DEVICE_ID, 2024, concurrent)
+        return normalize(cache, **kwargs)
+
+    monkeypatch.setattr(cache_optimizer, "normalize_cache", normalize_during_save)
+    await cache_optimizer.async_optimize_year_cache(DEVICE_ID, 2024)
+
+    data = cache_io.load_year(DEVICE_ID, 2024)
+    assert sorted(data["daily"]) == ["2024-05-01", "2024-05-03"]
+    assert cache_io.is_confirmed_empty(data, "2024-05-02")
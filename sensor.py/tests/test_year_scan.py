@@ -0,0 +1,69 @@
+"""Tests for the shared concurrent year scan."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.core.exceptions import ApiException
+from custom_components.lumentree.services import year_scan
+from custom_components.lumentree.services.data_detection import find_earliest_data_from_api
+from custom_components.lumentree.services.smart_backfill import detect_data_gaps_from_api
+
+
+def _fake_year_data(calls: list[int], years_with_data: dict[int, list[int]], failing: set[int]):
+    async def get_year_data(device_id, year):
+        calls.append(year)
+        await asyncio.sleep(0.01)
+        if year in failing:
+            raise ApiException("boom")
+        pv = [1.0 if month in years_with_data.get(year, []) else 0.0 for month in range(1, 13)]
+        return {"pv": pv, "grid": [0.0] * 12, "homeload": [0.0] * 12}
+
+    return get_year_data
+
+
+@pytest.mark.asyncio
+async def test_scan_is_concurrent_shared_and_cached():
+    """Test both callers share one concurrent scan and later calls hit the cache."""
+    year_scan.clear_year_scan()
+    this_year = dt.date.today().year
+    data = {this_year: [1, 2], this_year - 2: [11, 12]}
+    calls: list[int] = []
+    client = LumentreeHttpApiClient(None, "TEST123456")
+
+    with patch.object(LumentreeHttpApiClient, "get_year_data", side_effect=_fake_year_data(calls, data, set())):
+        gaps, earliest = await asyncio.gather(
+            detect_data_gaps_from_api(client, "TEST123456", 5),
+            find_earliest_data_from_api(client, "TEST123456", 5),
+        )
+        await detect_data_gaps_from_api(client, "TEST123456", 5)
+
+    assert gaps == data
+    assert earliest == (this_year - 2, 11)
+    assert sorted(calls) == sorted(range(this_year - 4, this_year + 1))
+
+
+@pytest.mark.asyncio
+async def test_failed_years_and_stale_current_year_are_rescanned():
+    """Test failed years are not cached and the current year expires after the TTL."""
+    year_scan.clear_year_scan()
+    this_year = dt.date.today().year
+    calls: list[int] = []
+    client = LumentreeHttpApiClient(None, "TEST123456")
+    fake = _fake_year_data(calls, {this_year: [1]}, {this_year - 1})
+
+    with patch.object(LumentreeHttpApiClient, "get_year_data", side_effect=fake):
+        assert await year_scan.scan_years(client, "TEST123456", 3) == {this_year: [1]}
+        calls.clear()
+        await year_scan.scan_years(client, "TEST123456", 3)
+        assert calls == [this_year - 1]
+
+        calls.clear()
+        with patch.object(year_scan, "YEAR_SCAN_TTL", 0):
+            await year_scan.scan_years(client, "TEST123456", 3)
+        assert sorted(calls) == [this_year - 1, this_year]
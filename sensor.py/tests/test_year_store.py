@@ -0,0 +1,107 @@
+"""Tests for the columnar binary year store."""
+
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services import year_store
+
+from . import DEVICE_ID
+
+
+def test_round_trip_matches_json_cache(cache_dir, year_cache):
+    """Test save/load through the binary store keeps days, aggregates and meta."""
+    cache_io.save_year(DEVICE_ID, 2024, year_cache)
+    loaded = cache_io.load_year(DEVICE_ID, 2024)
+
+    assert loaded["daily"] == year_cache["daily"]
+    assert loaded["monthly"] == year_cache["monthly"]
+    assert loaded["yearly_total"] == year_cache["yearly_total"]
+    assert loaded["meta"] == year_cache["meta"]
+
+    json_size = len(json.dumps(year_cache, ensure_ascii=False, indent=2))
+    assert os.path.getsize(cache_io.cache_path(DEVICE_ID, 2024)) * 5 < json_size
+
+
+def test_mapped_slices_match_summaries(cache_dir, monkeypatch, year_cache):
+    """Test mmap month/year/day reads match the dict summaries with and without NumPy."""
+    cache_io.save_year(DEVICE_ID, 2024, year_cache)
+
+    for use_numpy in (True, False):
+        if not use_numpy:
+            monkeypatch.setattr(year_store, "np", None)
+        for month in (1, 2, 12):
+            assert cache_io.read_month_totals(DEVICE_ID, 2024, month) == cache_io.summarize_month(year_cache, month)
+        assert cache_io.read_year_totals(DEVICE_ID, 2024) == cache_io.summarize_year(year_cache)
+        with year_store.MappedYear(cache_io.cache_path(DEVICE_ID, 2024)) as columns:
+            assert columns.day("2024-02-29") is None
+            assert columns.day("2024-03-05") == year_cache["daily"]["2024-03-05"]
+
+
+def test_legacy_json_is_converted_and_exported(cache_dir, year_cache):
+    """Test a legacy JSON year is read, replaced by the store on save and exportable."""
+    legacy = cache_io.legacy_cache_path(DEVICE_ID, 2024)
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump(year_cache, f, indent=2)
+
+    cache = cache_io.load_year(DEVICE_ID, 2024)
+    assert cache["daily"] == year_cache["daily"]
+    cache_io.save_year(DEVICE_ID, 2024, cache)
+    assert not os.path.exists(legacy)
+
+    path = cache_io.export_year_json(DEVICE_ID, 2024)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["yearly_total"] == year_cache["yearly_total"]
+
+
+def test_failed_write_keeps_previous_file(cache_dir, monkeypatch, year_cache):
+    """Test an interrupted write leaves the old store intact and the year queued for retry."""
+    cache_io.save_year(DEVICE_ID, 2024, year_cache)
+    path = cache_io.cache_path(DEVICE_ID, 2024)
+    with open(path, "rb") as f:
+        before = f.read()
+
+    def torn_replace(src, dst):
+        raise OSError("disk full")
+
+    changed = cache_io.load_year(DEVICE_ID, 2024)
+    cache_io.update_daily(changed, "2024-12-30", {"pv": 1.0})
+    with monkeypatch.context() as patched:
+        patched.setattr(os, "replace", torn_replace)
+        cache_io.save_year(DEVICE_ID, 2024, changed)
+
+    with open(path, "rb") as f:
+        assert f.read() == before
+    assert sorted(os.listdir(os.path.dirname(path))) == ["2024.bin"]
+    assert cache_io.YEAR_CACHE.flush(DEVICE_ID) == 1
+    assert "2024-12-30" in year_store.read_year_file(path)["daily"]
+
+
+def test_unreadable_store_is_quarantined(cache_dir):
+    """Test a corrupt store is moved aside instead of being overwritten."""
+    path = cache_io.cache_path(DEVICE_ID, 2023)
+    with open(path, "wb") as f:
+        f.write(b"LTYC\x01")
+
+    assert cache_io.load_year(DEVICE_ID, 2023)["daily"] == {}
+    names = os.listdir(os.path.dirname(path))
+    assert len(names) == 1 and names[0].startswith("2023.bin.corrupt-")
+
+
+def test_newer_store_is_left_in_place(cache_dir, year_cache):
+    """Test a store of an unsupported version raises and is not moved aside."""
+    path = cache_io.cache_path(DEVICE_ID, 2024)
+    encoded = bytearray(year_store.encode_year(2024, year_cache))
+    header = list(year_store._HEADER.unpack_from(encoded, 0))
+    header[1] = year_store.FORMAT_VERSION + 1
+    year_store._HEADER.pack_into(encoded, 0, *header)
+    with open(path, "wb") as f:
+        f.write(encoded)
+
+    with pytest.raises(year_store.UnsupportedYearStoreError):
+        cache_io.load_year(DEVICE_ID, 2024)
+    assert os.listdir(os.path.dirname(path)) == ["2024.bin"]